@@ -0,0 +1,140 @@
+# board/admin_lists.py
+from urllib.parse import urlencode
+
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .keyset import KeysetPage, beyond
+
+PAGE_SIZE = 25
+
+
+class ListFilter:
+    """A GET parameter that narrows the list with one exact lookup"""
+
+    def __init__(self, param, lookup, label, choices):
+        self.param = param
+        self.lookup = lookup
+        self.label = label
+        self._choices = choices
+
+    def choices(self):
+        choices = self._choices() if callable(self._choices) else self._choices
+        return [(str(value), label) for value, label in choices]
+
+    def apply(self, queryset, value):
+        if value in ('', None):
+            return queryset
+        if value not in {v for v, _ in self.choices()}:
+            return queryset
+        if value in ('true', 'false'):
+            value = value == 'true'
+        return queryset.filter(**{self.lookup: value})
+
+
+class AdminList:
+    """
+    Search, filter, sort and keyset-paginate a model for an admin list page.
+
+    Every sortable column is ordered together with the primary key, and each
+    (column, id) pair has a matching index, so fetching any page is one
+    bounded index range scan no matter how many rows the table holds.
+    """
+
+    def __init__(self, model, sort_fields, default_sort, search_fields=(),
+                 filters=(), select_related=(), page_size=PAGE_SIZE):
+        self.model = model
+        self.sort_fields = sort_fields
+        self.default_sort = default_sort
+        self.search_fields = search_fields
+        self.filters = filters
+        self.select_related = select_related
+        self.page_size = page_size
+
+    def page(self, request):
+        return AdminListPage(self, request.GET)
+
+    def queryset(self, params):
+        """Every row matching the search and filters in `params`, unpaginated"""
+        queryset = self.model.objects.all()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        search = params.get('q', '').strip()
+        if search and self.search_fields:
+            query = Q()
+            for field in self.search_fields:
+                query |= Q(**{f'{field}__icontains': search})
+            queryset = queryset.filter(query)
+        for list_filter in self.filters:
+            queryset = list_filter.apply(queryset, params.get(list_filter.param, ''))
+        return queryset
+
+
+class AdminListPage(KeysetPage):
+
+    def __init__(self, admin_list, params):
+        self.admin_list = admin_list
+        self.params = params
+        self.search = params.get('q', '').strip()
+        self.filter_values = {f.param: params.get(f.param, '') for f in admin_list.filters}
+
+        sort = params.get('sort', admin_list.default_sort)
+        if sort.lstrip('-') not in admin_list.sort_fields:
+            sort = admin_list.default_sort
+        self.sort = sort.lstrip('-')
+        self.descending = sort.startswith('-')
+
+        self.field_name = admin_list.sort_fields[self.sort]
+        field = admin_list.model._meta.get_field(self.field_name)
+        self.converters = (field.to_python, int)
+        self._paginate(params, admin_list.page_size)
+
+    @property
+    def is_filtered(self):
+        return bool(self.search) or any(self.filter_values.values())
+
+    def _key(self, obj):
+        value = getattr(obj, self.field_name)
+        return [None if value is None else str(value), obj.pk]
+
+    def _rows(self, cursor, backwards, limit):
+        # Walking backwards flips both the comparison and the ordering
+        descending = self.descending != backwards
+        op = 'lt' if descending else 'gt'
+        prefix = '-' if descending else ''
+
+        queryset = self.admin_list.queryset(self.params)
+        if cursor is not None:
+            queryset = queryset.filter(beyond((self.field_name, 'pk'), cursor, op))
+        return list(queryset.order_by(f'{prefix}{self.field_name}', f'{prefix}pk')[:limit])
+
+    def _url(self, **changes):
+        params = {'q': self.search, **self.filter_values,
+                  'sort': ('-' if self.descending else '') + self.sort}
+        params.update(changes)
+        return '?' + urlencode({k: v for k, v in params.items() if v not in ('', None)})
+
+    @cached_property
+    def columns(self):
+        """Per sortable column: the URL that sorts by it and its current arrow"""
+        columns = {}
+        for key in self.admin_list.sort_fields:
+            active = key == self.sort
+            descending = not self.descending if active else False
+            columns[key] = {
+                'url': self._url(sort=('-' if descending else '') + key),
+                'arrow': ('▼' if self.descending else '▲') if active else '',
+            }
+        return columns
+
+    @cached_property
+    def filters(self):
+        return [
+            {
+                'param': f.param,
+                'label': f.label,
+                'choices': f.choices(),
+                'value': self.filter_values[f.param],
+            }
+            for f in self.admin_list.filters
+        ]
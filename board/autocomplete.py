@@ -0,0 +1,148 @@
+# board/autocomplete.py
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Timetable, Result
+
+GENERATION_KEY = 'board:autocomplete:gen'
+DATA_KEY = 'board:autocomplete:{}'
+
+
+def _normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def _prefixes(text):
+    """The text from the start of each word, so 'data st' and 'struct' both match 'Data Structures'"""
+    words = _normalize(text).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+def _course_codes(code):
+    # 'CSC 301' is also typed as 'csc301'
+    normalized = _normalize(code)
+    return {normalized, normalized.replace(' ', '')}
+
+
+class _PrefixIndex:
+    """Sorted (key, suggestion) arrays: a prefix lookup is one bisect plus a short walk"""
+
+    def __init__(self, entries):
+        entries = sorted(entries)
+        self.keys = [key for key, _ in entries]
+        self.refs = [ref for _, ref in entries]
+
+    def search(self, prefix, limit):
+        found = []
+        i = bisect.bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix) and len(found) < limit:
+            if self.refs[i] not in found:
+                found.append(self.refs[i])
+            i += 1
+        return found
+
+
+class CourseIndex:
+    """
+    Process-local typeahead index over timetable course codes, titles and
+    lecturers and result course codes/titles, one per department plus one
+    for all of them.
+
+    Like the department registry, the built rows are shared through the
+    cache under a generation that timetable/result/department signals bump;
+    each worker re-checks the generation every AUTOCOMPLETE_LOCAL_TTL seconds
+    and rebuilds its arrays when it moves. The shared keys expire after
+    AUTOCOMPLETE_TIMEOUT, so workers that do not share a cache still catch
+    up within that time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        self._checked_at = 0
+        self._suggestions = []
+        self._indexes = {}
+
+    def _shared_generation(self):
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            # Seed from the clock so an evicted counter never reuses old data keys
+            cache.add(GENERATION_KEY, int(time.time() * 1000), settings.AUTOCOMPLETE_TIMEOUT)
+            generation = cache.get(GENERATION_KEY)
+        return generation
+
+    def _load_rows(self):
+        """[(department_id, kind, value, label)] for every live course and lecturer"""
+        rows = set()
+        timetables = Timetable.objects.filter(is_active=True, department__is_active=True)
+        for department_id, code, title, lecturer in timetables.values_list(
+            'department_id', 'course_code', 'course_title', 'lecturer'
+        ).distinct():
+            rows.add((department_id, 'course', code, title))
+            if lecturer:
+                rows.add((department_id, 'lecturer', lecturer, ''))
+        results = Result.objects.filter(is_published=True, department__is_active=True)
+        for department_id, code, title in results.values_list(
+            'department_id', 'course_code', 'course_title'
+        ).distinct():
+            rows.add((department_id, 'course', code, title))
+        return sorted(rows)
+
+    def _build(self, rows):
+        suggestions = []
+        refs = {}
+        entries = {None: set()}
+        for department_id, kind, value, label in rows:
+            suggestion = (kind, value, label)
+            if suggestion not in refs:
+                refs[suggestion] = len(suggestions)
+                suggestions.append({'kind': kind, 'value': value, 'label': label})
+            ref = refs[suggestion]
+            keys = _prefixes(value) if kind == 'lecturer' else _course_codes(value) | _prefixes(label)
+            for key in keys:
+                entries[None].add((key, ref))
+                entries.setdefault(department_id, set()).add((key, ref))
+        return suggestions, {dept: _PrefixIndex(keyed) for dept, keyed in entries.items()}
+
+    def _refresh(self):
+        ttl = settings.AUTOCOMPLETE_LOCAL_TTL
+        if self._generation is not None and time.monotonic() - self._checked_at < ttl:
+            return
+        with self._lock:
+            generation = self._shared_generation()
+            if generation != self._generation:
+                rows = cache.get(DATA_KEY.format(generation))
+                if rows is None:
+                    rows = self._load_rows()
+                    cache.set(DATA_KEY.format(generation), rows, settings.AUTOCOMPLETE_TIMEOUT)
+                self._suggestions, self._indexes = self._build(rows)
+                self._generation = generation
+            self._checked_at = time.monotonic()
+
+    def search(self, query, department_id=None, limit=None):
+        """Suggestions whose code, or any word of the title or lecturer name, starts with `query`"""
+        limit = min(limit or settings.AUTOCOMPLETE_DEFAULT_LIMIT, settings.AUTOCOMPLETE_MAX_LIMIT)
+        prefix = _normalize(query)
+        if not prefix:
+            return []
+        self._refresh()
+        index = self._indexes.get(department_id)
+        if index is None:
+            return []
+        return [self._suggestions[ref] for ref in index.search(prefix, limit)]
+
+    def invalidate(self):
+        """Drop the local index and move every worker to a new generation"""
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.add(GENERATION_KEY, int(time.time() * 1000), settings.AUTOCOMPLETE_TIMEOUT)
+        with self._lock:
+            self._generation = None
+
+
+courses = CourseIndex()
@@ -0,0 +1,160 @@
+# board/coalescing.py
+import hashlib
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+
+GENERATION_KEY = 'board:pages:gen'
+PAGE_KEY = 'board:pages:{generation}:{digest}'
+LOCK_KEY = 'board:pages:lock:{}'
+POLL_INTERVAL = 0.05
+
+# key -> threading.Event set when this process's leader has finished
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, int(time.time() * 1000), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate_pages():
+    """Start a new generation so the next request for any page re-renders it"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, int(time.time() * 1000), None)
+
+
+def page_key(request):
+    # Hashed: a long ?search= would otherwise break memcached's 250-character key limit
+    url = f'{request.path}?{urlencode(sorted(request.GET.items()))}'
+    return PAGE_KEY.format(generation=_generation(), digest=hashlib.sha1(url.encode()).hexdigest())
+
+
+def _cacheable(request):
+    return (
+        settings.PAGE_COALESCING
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        # A profiled request has to do the real work
+        and not getattr(request, 'profiling', False)
+        # A pending flash message makes the page personal
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def cached_page(request):
+    """The page cache's copy (fresh or stale) of this request's page, or None"""
+    if not _cacheable(request):
+        return None
+    return cache.get(page_key(request))
+
+
+def _response(entry, state):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['X-Page-Cache'] = state
+    return response
+
+
+def _render(key, view, request, args, kwargs):
+    response = view(request, *args, **kwargs)
+    if response.status_code == 200 and not response.streaming:
+        if hasattr(response, 'render'):
+            response.render()
+        now = time.time()
+        ttl, stale = settings.PAGE_CACHE_TTL, settings.PAGE_CACHE_STALE
+        entry = {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'fresh_until': now + ttl,
+        }
+        cache.set(key, entry, ttl + stale)
+    response['X-Page-Cache'] = 'miss'
+    return response
+
+
+def _wait_for(key):
+    """Poll for another process's render, up to PAGE_CACHE_WAIT seconds"""
+    deadline = time.monotonic() + settings.PAGE_CACHE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def coalesced(view):
+    """
+    Share one render of a public page between concurrent identical requests.
+
+    With PAGE_COALESCING on, anonymous GETs are answered from a rendered copy
+    that is fresh for PAGE_CACHE_TTL seconds. For PAGE_CACHE_STALE seconds
+    after that the old copy keeps being served while a single request
+    re-renders it (stale-while-revalidate). On a miss, one request per
+    process renders while the others wait on it, and a cache lock stops
+    other processes rendering the same page at the same time. Board writes
+    start a new generation of keys (see signals.py).
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _cacheable(request):
+            return view(request, *args, **kwargs)
+
+        key = page_key(request)
+        lock_key = LOCK_KEY.format(key)
+        entry = cache.get(key)
+        if entry is not None and time.time() < entry['fresh_until']:
+            return _response(entry, 'hit')
+
+        if entry is not None:
+            # Stale: one request refreshes, everyone else gets the old copy now
+            if cache.add(lock_key, 1, settings.PAGE_CACHE_WAIT):
+                try:
+                    return _render(key, view, request, args, kwargs)
+                finally:
+                    cache.delete(lock_key)
+            return _response(entry, 'stale')
+
+        with _flights_lock:
+            flight = _flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _flights[key] = threading.Event()
+
+        if not leader:
+            flight.wait(settings.PAGE_CACHE_WAIT)
+            entry = cache.get(key)
+            if entry is not None:
+                return _response(entry, 'coalesced')
+            return view(request, *args, **kwargs)
+
+        try:
+            if cache.add(lock_key, 1, settings.PAGE_CACHE_WAIT):
+                try:
+                    return _render(key, view, request, args, kwargs)
+                finally:
+                    cache.delete(lock_key)
+            # Another process is rendering this page
+            entry = _wait_for(key)
+            if entry is not None:
+                return _response(entry, 'coalesced')
+            return view(request, *args, **kwargs)
+        finally:
+            with _flights_lock:
+                _flights.pop(key, None)
+            flight.set()
+
+    return wrapper
@@ -0,0 +1,85 @@
+# board/departments.py
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Department
+
+GENERATION_KEY = 'board:departments:gen'
+DATA_KEY = 'board:departments:{}'
+
+
+class DepartmentRegistry:
+    """
+    Process-local snapshot of all live (not deleted) departments, backed by the shared cache.
+
+    Lookups by id or code are dict hits. The local copy is trusted for
+    DEPARTMENT_REGISTRY_LOCAL_TTL seconds before the shared generation is
+    re-checked; Department signals bump the generation so every worker
+    reloads on its next check. The shared keys expire after
+    DEPARTMENT_REGISTRY_TIMEOUT, so workers that do not share a cache
+    still pick up changes made elsewhere within that time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        self._checked_at = 0
+        self._departments = []
+        self._by_id = {}
+        self._by_code = {}
+
+    def _shared_generation(self):
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            # Seed from the clock so an evicted counter never reuses old data keys
+            cache.add(GENERATION_KEY, int(time.time() * 1000), settings.DEPARTMENT_REGISTRY_TIMEOUT)
+            generation = cache.get(GENERATION_KEY)
+        return generation
+
+    def _refresh(self):
+        ttl = settings.DEPARTMENT_REGISTRY_LOCAL_TTL
+        if self._generation is not None and time.monotonic() - self._checked_at < ttl:
+            return
+        with self._lock:
+            generation = self._shared_generation()
+            if generation != self._generation:
+                departments = cache.get(DATA_KEY.format(generation))
+                if departments is None:
+                    departments = list(Department.objects.filter(is_active=True))
+                    cache.set(DATA_KEY.format(generation), departments, settings.DEPARTMENT_REGISTRY_TIMEOUT)
+                self._departments = departments
+                self._by_id = {d.pk: d for d in departments}
+                self._by_code = {d.code.lower(): d for d in departments}
+                self._generation = generation
+            self._checked_at = time.monotonic()
+
+    def all(self):
+        self._refresh()
+        return self._departments
+
+    def get(self, pk):
+        """Department with this id (int or query-string value), or None"""
+        self._refresh()
+        try:
+            return self._by_id.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def by_code(self, code):
+        self._refresh()
+        return self._by_code.get((code or '').lower())
+
+    def invalidate(self):
+        """Drop the local snapshot and move every worker to a new generation"""
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.add(GENERATION_KEY, int(time.time() * 1000), settings.DEPARTMENT_REGISTRY_TIMEOUT)
+        with self._lock:
+            self._generation = None
+
+
+departments = DepartmentRegistry()
@@ -0,0 +1,214 @@
+# board/documents.py
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-flight within one process only
+    fcntl = None
+
+CHUNK_SIZE = 64 * 1024
+USER_AGENT = 'StudentInfoBoard-ResultProxy/1.0'
+RANGE_RE = re.compile(r'^bytes=\s*([0-9]*)-([0-9]*)\s*$')
+
+Document = namedtuple('Document', ['path', 'sha256', 'size', 'content_type', 'filename', 'fetched_at'])
+
+
+class DocumentUnavailable(Exception):
+    """The origin could not be reached and there is no stored copy to fall back on"""
+
+
+def _url_key(url):
+    return hashlib.sha1(url.encode()).hexdigest()
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class DocumentStore:
+    """
+    Content-addressed disk cache for result documents held on other servers.
+
+    Bodies live under blobs/ named by their SHA-256, so a document linked
+    from many results is stored once; index/ maps each URL to its blob and
+    the origin's validators. A copy is trusted for RESULT_PROXY_MAX_AGE
+    seconds, then revalidated, and served stale if the origin is down.
+
+    Concurrent requests for the same URL are single-flight: one thread per
+    process (and, where fcntl exists, one process per host) downloads while
+    the others wait on the lock and then read the stored copy.
+    """
+
+    def __init__(self, root=None):
+        self._root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @property
+    def root(self):
+        return Path(self._root or settings.RESULT_DOCUMENT_ROOT)
+
+    def _dirs(self):
+        for name in ('blobs', 'index', 'locks'):
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    def _blob_path(self, sha256):
+        return self.root / 'blobs' / sha256[:2] / sha256
+
+    def _index_path(self, url):
+        return self.root / 'index' / f'{_url_key(url)}.json'
+
+    def _entry(self, url):
+        try:
+            entry = json.loads(self._index_path(url).read_text())
+        except (OSError, ValueError):
+            return None
+        if entry.get('url') != url or not self._blob_path(entry['sha256']).exists():
+            return None
+        return entry
+
+    def _document(self, entry):
+        return Document(
+            path=self._blob_path(entry['sha256']),
+            sha256=entry['sha256'],
+            size=entry['size'],
+            content_type=entry['content_type'],
+            filename=entry['filename'],
+            fetched_at=entry['fetched_at'],
+        )
+
+    def _fresh(self, entry):
+        return entry is not None and time.time() - entry['fetched_at'] < settings.RESULT_PROXY_MAX_AGE
+
+    def _thread_lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, url):
+        """The stored document for `url`, fetching it from the origin at most once at a time"""
+        entry = self._entry(url)
+        if self._fresh(entry):
+            return self._document(entry)
+
+        self._dirs()
+        key = _url_key(url)
+        with self._thread_lock(key), open(self.root / 'locks' / key, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Whoever held the lock before us may have just fetched it
+                entry = self._entry(url)
+                if self._fresh(entry):
+                    return self._document(entry)
+                return self._document(self._fetch(url, entry))
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _fetch(self, url, entry):
+        headers = {'User-Agent': USER_AGENT}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=settings.RESULT_PROXY_TIMEOUT) as response:
+                sha256, size = self._store_body(response)
+                entry = {
+                    'url': url,
+                    'sha256': sha256,
+                    'size': size,
+                    'content_type': response.headers.get_content_type(),
+                    'filename': os.path.basename(urllib.parse.urlsplit(response.url).path) or 'result',
+                    'etag': response.headers.get('ETag', ''),
+                    'last_modified': response.headers.get('Last-Modified', ''),
+                }
+        except urllib.error.HTTPError as e:
+            if e.code != 304 or entry is None:
+                return self._stale(url, entry, e)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            return self._stale(url, entry, e)
+
+        entry['fetched_at'] = time.time()
+        _write_atomic(self._index_path(url), json.dumps(entry).encode())
+        return entry
+
+    def _stale(self, url, entry, error):
+        if entry is None:
+            raise DocumentUnavailable(f'{url}: {error}') from error
+        return entry
+
+    def _store_body(self, response):
+        limit = settings.RESULT_PROXY_MAX_BYTES
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=self.root / 'blobs', prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                    size += len(chunk)
+                    if size > limit:
+                        raise ValueError(f'document is larger than {limit} bytes')
+                    digest.update(chunk)
+                    f.write(chunk)
+            sha256 = digest.hexdigest()
+            path = self._blob_path(sha256)
+            path.parent.mkdir(exist_ok=True)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return sha256, size
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single `bytes=` range, None to send it all, or False if unsatisfiable"""
+    match = RANGE_RE.match(header)
+    if not match or match.group(1) == match.group(2) == '':
+        # Not a single well-formed range (int() alone would take '+1', ' 1' or '1_0')
+        return None
+    start, end = match.groups()
+    if not start:
+        length = int(end)
+        if length <= 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+documents = DocumentStore()
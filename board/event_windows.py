@@ -0,0 +1,119 @@
+# board/event_windows.py
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .keyset import KeysetPage, beyond, timestamp
+from .models import local_day_start
+
+PAGE_SIZE = 20
+WINDOW_CHOICES = [('upcoming', 'Upcoming'), ('today', 'Today'), ('month', 'Month'), ('past', 'Past')]
+# Dates outside this range cannot be moved a day/month either way (or converted
+# to UTC) without leaving what datetime can represent
+MIN_YEAR, MAX_YEAR = 2, 9998
+
+
+def _in_range(day):
+    return day if day is not None and MIN_YEAR <= day.year <= MAX_YEAR else None
+
+
+def _parse_month(value):
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        return _in_range(datetime.date(year, month, 1))
+    except (ValueError, TypeError):
+        return None
+
+
+def _parse_day(value):
+    try:
+        return _in_range(parse_date(value or ''))
+    except ValueError:
+        return None
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+class EventWindow:
+    """
+    The slice of the events table a page shows, from GET parameters:
+    ?window=upcoming|today|past|month (with ?month=YYYY-MM), or an explicit
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD range.
+
+    Every window is a bounded range on start_date/end_date, so a page costs
+    the same however many years of events the table holds.
+    """
+
+    def __init__(self, params, today=None):
+        self.today = today or timezone.localdate()
+        self.name = params.get('window', '')
+        if self.name not in dict(WINDOW_CHOICES):
+            self.name = 'upcoming'
+        self.month = _parse_month(params.get('month', '')) or self.today.replace(day=1)
+
+        self.date_from = _parse_day(params.get('from'))
+        self.date_to = _parse_day(params.get('to'))
+        if self.date_from or self.date_to:
+            self.name = 'range'
+
+    @property
+    def descending(self):
+        """Past events read newest first, every other window soonest first"""
+        return self.name == 'past'
+
+    @property
+    def previous_month(self):
+        return _add_months(self.month, -1).strftime('%Y-%m')
+
+    @property
+    def next_month(self):
+        return _add_months(self.month, 1).strftime('%Y-%m')
+
+    def apply(self, queryset):
+        queryset = queryset.with_status(self.today)
+        if self.name == 'month':
+            start = local_day_start(self.month)
+            end = local_day_start(_add_months(self.month, 1))
+            return queryset.between(start, end).order_by('start_date', 'id')
+        if self.name == 'range':
+            if self.date_from:
+                queryset = queryset.filter(end_date__gte=local_day_start(self.date_from))
+            if self.date_to:
+                next_day = self.date_to + datetime.timedelta(days=1)
+                queryset = queryset.filter(start_date__lt=local_day_start(next_day))
+            return queryset.order_by('start_date', 'id')
+        return queryset.window(self.name, self.today)
+
+
+class EventPage(KeysetPage):
+    """
+    One keyset page of a window, ordered by (start_date, id).
+
+    The cursor carries the last row's (start_date, id), so a page is one
+    bounded range read however deep the reader goes, and nothing is counted.
+    """
+
+    converters = (timestamp, int)
+
+    def __init__(self, queryset, params, descending=False, page_size=PAGE_SIZE, keep=()):
+        self.params = {key: params.get(key, '') for key in keep}
+        self.queryset = queryset
+        self.descending = descending
+        self._paginate(params, page_size)
+
+    def _key(self, event):
+        return [event.start_date.isoformat(), event.pk]
+
+    def _rows(self, cursor, backwards, limit):
+        queryset = self.queryset
+        if cursor is not None:
+            # Moving forward in a descending window means smaller keys
+            op = 'lt' if self.descending != backwards else 'gt'
+            queryset = queryset.filter(beyond(('start_date', 'id'), cursor, op))
+        if backwards:
+            queryset = queryset.reverse()
+        return list(queryset[:limit])
@@ -0,0 +1,113 @@
+# board/exports.py
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+CHUNK_SIZE = 2000
+
+# name -> [(column header, values_list lookup)]
+COLUMNS = {
+    'announcements': [
+        ('id', 'id'), ('title', 'title'), ('content', 'content'),
+        ('department', 'department__code'), ('priority', 'priority'),
+        ('is_active', 'is_active'), ('created_by', 'created_by__username'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'), ('expires_at', 'expires_at'),
+    ],
+    'events': [
+        ('id', 'id'), ('title', 'title'), ('description', 'description'),
+        ('department', 'department__code'), ('event_type', 'event_type'), ('venue', 'venue'),
+        ('start_date', 'start_date'), ('end_date', 'end_date'), ('is_active', 'is_active'),
+        ('created_by', 'created_by__username'), ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ],
+    'timetables': [
+        ('id', 'id'), ('department', 'department__code'), ('day_of_week', 'day_of_week'),
+        ('course_code', 'course_code'), ('course_title', 'course_title'), ('lecturer', 'lecturer'),
+        ('venue', 'venue'), ('start_time', 'start_time'), ('end_time', 'end_time'),
+        ('level', 'level'), ('semester', 'semester'), ('is_active', 'is_active'),
+        ('created_by', 'created_by__username'), ('created_at', 'created_at'),
+    ],
+    'results': [
+        ('id', 'id'), ('session', 'session'), ('semester', 'semester'),
+        ('department', 'department__code'), ('level', 'level'), ('course_code', 'course_code'),
+        ('course_title', 'course_title'), ('file_url', 'file_url'), ('description', 'description'),
+        ('is_published', 'is_published'), ('created_by', 'created_by__username'), ('created_at', 'created_at'),
+    ],
+    'departments': [
+        ('id', 'id'), ('name', 'name'), ('code', 'code'),
+        ('description', 'description'), ('is_active', 'is_active'),
+        ('created_at', 'created_at'), ('deleted_at', 'deleted_at'),
+    ],
+}
+
+
+def iter_rows(queryset, lookups, chunk_size=CHUNK_SIZE):
+    """
+    Yield value tuples for `queryset` in primary key order without holding
+    more than one chunk in memory.
+
+    On PostgreSQL .iterator() streams from a server-side cursor. Behind a
+    transaction-pooling PgBouncer those must be turned off
+    (DISABLE_SERVER_SIDE_CURSORS), and psycopg would then buffer the whole
+    result client-side, so the rows are walked in primary key batches instead.
+    """
+    rows = queryset.order_by('pk').values_list('pk', *lookups)
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and connection.settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        last = None
+        while True:
+            batch = list((rows if last is None else rows.filter(pk__gt=last))[:chunk_size])
+            for row in batch:
+                yield row[1:]
+            if len(batch) < chunk_size:
+                return
+            last = batch[-1][0]
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield row[1:]
+
+
+class _Echo:
+    """File-like object whose write() hands back what it was given, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows, batch=500):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    lines = []
+    for row in rows:
+        lines.append(writer.writerow(row))
+        if len(lines) >= batch:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def stream_json(header, rows, batch=500):
+    encoder = DjangoJSONEncoder()
+    yield '['
+    lines, first = [], True
+    for row in rows:
+        lines.append(('\n' if first else ',\n') + encoder.encode(dict(zip(header, row))))
+        first = False
+        if len(lines) >= batch:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines) + '\n]\n'
+
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', stream_csv),
+    'json': ('application/json', stream_json),
+}
+
+
+def stream_export(name, queryset, fmt):
+    """The rows of `queryset` as CSV or JSON text chunks, with the columns of COLUMNS[name]"""
+    columns = COLUMNS[name]
+    header = [column for column, _ in columns]
+    rows = iter_rows(queryset, [lookup for _, lookup in columns])
+    return FORMATS[fmt][1](header, rows)
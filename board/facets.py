@@ -0,0 +1,77 @@
+# board/facets.py
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+
+from .models import Announcement, Timetable, Result
+
+CACHE_KEY = 'board:facets:{}'
+
+# name -> (model, filter for rows shown publicly, field or expression, sort newest first)
+FACETS = {
+    'levels': (Timetable, {'is_active': True, 'department__is_active': True}, 'level', False),
+    'sessions': (Result, {'is_published': True, 'department__is_active': True}, 'session', True),
+    # UTC calendar years, the same boundaries as the announcement partitions
+    'years': (
+        Announcement, {'is_active': True, 'department__is_active': True},
+        ExtractYear('created_at', tzinfo=datetime.timezone.utc), True,
+    ),
+}
+
+
+def _load(name):
+    """{department_id: {value: count}} for a facet, computed in one grouped query"""
+    model, filters, field, _ = FACETS[name]
+    key = CACHE_KEY.format(name)
+    data = cache.get(key)
+    if data is None:
+        data = {}
+        rows = (
+            model.objects.filter(**filters)
+            .values_list('department_id', field)
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        for department_id, value, count in rows:
+            data.setdefault(department_id, {})[value] = count
+        cache.set(key, data, settings.FACET_CACHE_TIMEOUT)
+    return data
+
+
+def facet_counts(name, department_id=None):
+    """Sorted (value, count) pairs, scoped to one department if given"""
+    data = _load(name)
+    counts = {}
+    if department_id:
+        try:
+            counts = dict(data.get(int(department_id), {}))
+        except (TypeError, ValueError):
+            counts = {}
+    else:
+        for per_department in data.values():
+            for value, count in per_department.items():
+                counts[value] = counts.get(value, 0) + count
+    reverse = FACETS[name][3]
+    return sorted(counts.items(), reverse=reverse)
+
+
+def facet_values(name, department_id=None):
+    return [value for value, _ in facet_counts(name, department_id)]
+
+
+def facet_combinations(name):
+    """Every (department_id, value) pair that has at least one row"""
+    return {
+        (department_id, value)
+        for department_id, counts in _load(name).items()
+        for value in counts
+    }
+
+
+def invalidate(model):
+    for name, (facet_model, *_) in FACETS.items():
+        if facet_model is model:
+            cache.delete(CACHE_KEY.format(name))
@@ -0,0 +1,148 @@
+# board/feeds.py
+import datetime
+import time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from .departments import departments
+from .models import Announcement
+
+CHANGED_KEY = 'board:feeds:changed'
+BODY_KEY = 'board:feeds:{kind}:{department}:{priority}:{changed}'
+FEED_ITEMS = 30
+
+
+def feeds_changed_at():
+    """
+    When announcements or departments last changed (epoch seconds), kept in
+    the cache. It expires with the cached bodies, so a worker that missed a
+    bump (a per-process cache) re-renders within FEED_CACHE_TIMEOUT.
+    """
+    changed = cache.get(CHANGED_KEY)
+    if changed is None:
+        changed = time.time()
+        cache.add(CHANGED_KEY, changed, settings.FEED_CACHE_TIMEOUT)
+    return changed
+
+
+def invalidate_feeds():
+    # Last-Modified has one-second resolution: always move to a later second
+    previous = cache.get(CHANGED_KEY, 0)
+    cache.set(CHANGED_KEY, max(time.time(), int(previous) + 1), settings.FEED_CACHE_TIMEOUT)
+
+
+def feed_filters(request):
+    """The (department, priority) a feed request asks for; 404 for unknown values"""
+    department = None
+    value = request.GET.get('department', '')
+    if value:
+        department = departments.get(value) or departments.by_code(value)
+        if department is None:
+            raise Http404('Unknown department')
+    priority = request.GET.get('priority', '')
+    if priority and priority not in dict(Announcement.PRIORITY_CHOICES):
+        raise Http404('Unknown priority')
+    return department, priority
+
+
+class AnnouncementsFeed(Feed):
+    """Latest active announcements, optionally for one department and/or priority"""
+
+    def get_object(self, request):
+        return feed_filters(request)
+
+    def title(self, obj):
+        department, priority = obj
+        parts = [department.name if department else 'All Departments']
+        if priority:
+            parts.append(f'{dict(Announcement.PRIORITY_CHOICES)[priority]} Priority')
+        return f'Announcements - {" - ".join(parts)}'
+
+    def link(self, obj):
+        department, _ = obj
+        url = reverse('announcements')
+        return f'{url}?department={department.pk}' if department else url
+
+    def description(self, obj):
+        return 'Departmental announcements from the Student Information Board.'
+
+    def items(self, obj):
+        department, priority = obj
+        announcements = Announcement.objects.filter(is_active=True, department__is_active=True)
+        if department:
+            announcements = announcements.filter(department_id=department.pk)
+        if priority:
+            announcements = announcements.filter(priority=priority)
+        return announcements.order_by('-created_at')[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.content
+
+    def item_link(self, item):
+        return f'{reverse("announcements")}#announcement-{item.pk}'
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        department = departments.get(item.department_id)
+        return [c for c in (department and department.code, item.get_priority_display()) if c]
+
+
+class AnnouncementsAtomFeed(AnnouncementsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def cached_feed(feed, kind):
+    """
+    Serve `feed` from the cache, keyed on the feed's validated filters (so
+    '1', 'csc' and 'CSC' share one entry and junk values never get one) and
+    the last announcement change. Conditional GETs are answered from the
+    cached timestamp, so a 304 never touches the database and a miss costs
+    the single items query.
+    """
+
+    def last_modified(request, department, priority):
+        return datetime.datetime.fromtimestamp(feeds_changed_at(), tz=datetime.timezone.utc)
+
+    @condition(last_modified_func=last_modified)
+    def conditional(request, department, priority):
+        key = BODY_KEY.format(
+            kind=kind,
+            department=department.pk if department else '',
+            priority=priority,
+            changed=feeds_changed_at(),
+        )
+        cached = cache.get(key)
+        if cached is None:
+            response = feed(request)
+            cached = (response.content, response['Content-Type'])
+            cache.set(key, cached, settings.FEED_CACHE_TIMEOUT)
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response['Cache-Control'] = 'public, max-age=300'
+        return response
+
+    def view(request):
+        return conditional(request, *feed_filters(request))
+
+    return view
+
+
+rss_feed = cached_feed(AnnouncementsFeed(), 'rss')
+atom_feed = cached_feed(AnnouncementsAtomFeed(), 'atom')
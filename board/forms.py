@@ -1,7 +1,54 @@
 # board/forms.py
+import copy
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm
+from django.forms.models import ModelChoiceIterator
 from .models import Announcement, Event, Timetable, Result, Department
+from .departments import departments
+from .scheduling import find_conflicts, describe
+
+
+class DepartmentChoiceIterator(ModelChoiceIterator):
+    """Builds department options from the registry instead of the queryset"""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for department in departments.all():
+            yield self.choice(department)
+
+    def __len__(self):
+        return len(departments.all()) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(departments.all())
+
+
+class DepartmentChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField for Department that renders and validates from the
+    registry; an id the registry does not know yet (a department added on
+    another worker) is checked against the database before being refused
+    """
+    iterator = DepartmentChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        department = departments.get(value)
+        if department is None:
+            try:
+                department = Department.objects.filter(pk=int(value), is_active=True).first()
+            except (TypeError, ValueError):
+                department = None
+        if department is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return department
+
 
 class AdminLoginForm(AuthenticationForm):
     username = forms.CharField(
@@ -19,10 +66,20 @@ class AdminLoginForm(AuthenticationForm):
         })
     )
 
-class AnnouncementForm(forms.ModelForm):
+class VersionedModelForm(forms.ModelForm):
+    """Carries the row version the editor loaded so stale saves can be refused"""
+    version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['version'].initial = self.instance.version
+
+class AnnouncementForm(VersionedModelForm):
     class Meta:
         model = Announcement
         fields = ['title', 'content', 'department', 'priority', 'expires_at']
+        field_classes = {'department': DepartmentChoiceField}
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'form-input',
@@ -45,10 +102,11 @@ class AnnouncementForm(forms.ModelForm):
             })
         }
 
-class EventForm(forms.ModelForm):
+class EventForm(VersionedModelForm):
     class Meta:
         model = Event
         fields = ['title', 'description', 'department', 'event_type', 'venue', 'start_date', 'end_date']
+        field_classes = {'department': DepartmentChoiceField}
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'form-input',
@@ -79,11 +137,12 @@ class EventForm(forms.ModelForm):
             })
         }
 
-class TimetableForm(forms.ModelForm):
+class TimetableForm(VersionedModelForm):
     class Meta:
         model = Timetable
         fields = ['department', 'day_of_week', 'course_code', 'course_title', 'lecturer', 
                  'venue', 'start_time', 'end_time', 'level', 'semester']
+        field_classes = {'department': DepartmentChoiceField}
         widgets = {
             'department': forms.Select(attrs={
                 'class': 'form-select'
@@ -125,11 +184,30 @@ class TimetableForm(forms.ModelForm):
             })
         }
 
-class ResultForm(forms.ModelForm):
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        if start_time and end_time and end_time <= start_time:
+            raise forms.ValidationError('End time must be after start time.')
+        if self.errors or not self.instance.is_active:
+            return cleaned_data
+
+        candidate = copy.copy(self.instance)
+        for name, value in cleaned_data.items():
+            if name in self.Meta.fields:
+                setattr(candidate, name, value)
+        clashes = find_conflicts(candidate)
+        if clashes:
+            raise forms.ValidationError([describe(clash) for clash in clashes])
+        return cleaned_data
+
+class ResultForm(VersionedModelForm):
     class Meta:
         model = Result
         fields = ['session', 'semester', 'department', 'level', 'course_code', 
                  'course_title', 'file_url', 'description']
+        field_classes = {'department': DepartmentChoiceField}
         widgets = {
             'session': forms.TextInput(attrs={
                 'class': 'form-input',
@@ -164,7 +242,7 @@ class ResultForm(forms.ModelForm):
             })
         }
 
-class DepartmentForm(forms.ModelForm):
+class DepartmentForm(VersionedModelForm):
     class Meta:
         model = Department
         fields = ['name', 'code', 'description']
@@ -182,4 +260,13 @@ class DepartmentForm(forms.ModelForm):
                 'placeholder': 'Department description',
                 'rows': 3
             })
-        }
\ No newline at end of file
+        }
+
+    def clean_code(self):
+        # The unique constraint only covers live departments, which model
+        # validation cannot check without deleted_at on the form
+        code = self.cleaned_data['code']
+        taken = Department.objects.filter(code=code, deleted_at__isnull=True).exclude(pk=self.instance.pk)
+        if taken.exists():
+            raise forms.ValidationError('A department with this code already exists.', code='unique')
+        return code
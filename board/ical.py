@@ -0,0 +1,144 @@
+# board/ical.py
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+PRODID = '-//Student Information Board//Calendar Feed//EN'
+CHUNK_SIZE = 500
+# Past events older than this are left out of the feed
+EVENT_HISTORY_DAYS = 90
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+BYDAY = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+def escape(text):
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line at 75 octets as RFC 5545 requires"""
+    raw = line.encode('utf-8')
+    if len(raw) <= 75:
+        return line + '\r\n'
+    parts, start, limit = [], 0, 75
+    while start < len(raw):
+        end = min(start + limit, len(raw))
+        # Never split a multi-byte character
+        while end < len(raw) and (raw[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(raw[start:end].decode('utf-8'))
+        start, limit = end, 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def utc_stamp(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def local_stamp(date, time):
+    return datetime.datetime.combine(date, time).strftime('%Y%m%dT%H%M%S')
+
+
+def vtimezone():
+    """Single-offset VTIMEZONE for TIME_ZONE (exact for zones without DST, such as Africa/Lagos)"""
+    offset = timezone.localtime().utcoffset()
+    minutes = int(offset.total_seconds() // 60)
+    sign = '+' if minutes >= 0 else '-'
+    tzoffset = f'{sign}{abs(minutes) // 60:02d}{abs(minutes) % 60:02d}'
+    return [
+        'BEGIN:VTIMEZONE',
+        f'TZID:{settings.TIME_ZONE}',
+        'BEGIN:STANDARD',
+        'DTSTART:19700101T000000',
+        f'TZOFFSETFROM:{tzoffset}',
+        f'TZOFFSETTO:{tzoffset}',
+        'END:STANDARD',
+        'END:VTIMEZONE',
+    ]
+
+
+def event_lines(event, host, stamp):
+    return [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.pk}@{host}',
+        f'DTSTAMP:{stamp}',
+        f'SEQUENCE:{event.version}',
+        f'DTSTART:{utc_stamp(event.start_date)}',
+        f'DTEND:{utc_stamp(event.end_date)}',
+        f'SUMMARY:{escape(event.title)}',
+        f'LOCATION:{escape(event.venue)}',
+        f'CATEGORIES:{escape(event.get_event_type_display())}',
+        f'DESCRIPTION:{escape(event.description)}',
+        'END:VEVENT',
+    ]
+
+
+def first_occurrence(entry):
+    """Date of the first class on or after the day the entry was created"""
+    start = timezone.localtime(entry.created_at).date()
+    target = WEEKDAYS.index(entry.day_of_week)
+    return start + datetime.timedelta(days=(target - start.weekday()) % 7)
+
+
+def timetable_lines(entry, host, stamp):
+    tzid = settings.TIME_ZONE
+    first = first_occurrence(entry)
+    byday = BYDAY[WEEKDAYS.index(entry.day_of_week)]
+    return [
+        'BEGIN:VEVENT',
+        f'UID:timetable-{entry.pk}@{host}',
+        f'DTSTAMP:{stamp}',
+        f'SEQUENCE:{entry.version}',
+        f'DTSTART;TZID={tzid}:{local_stamp(first, entry.start_time)}',
+        f'DTEND;TZID={tzid}:{local_stamp(first, entry.end_time)}',
+        f'RRULE:FREQ=WEEKLY;BYDAY={byday}',
+        f'SUMMARY:{escape(entry.course_code)} - {escape(entry.course_title)}',
+        f'LOCATION:{escape(entry.venue)}',
+        f'DESCRIPTION:{escape(f"Lecturer: {entry.lecturer}, Level: {entry.level}, Semester: {entry.semester}")}',
+        'END:VEVENT',
+    ]
+
+
+def stream_calendar(name, host, events=None, timetables=None):
+    """Yield the calendar a few rows at a time so memory stays flat"""
+    stamp = utc_stamp(timezone.now())
+    header = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape(name)}',
+        f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+    ]
+    if timetables is not None:
+        header += vtimezone()
+    yield ''.join(fold(line) for line in header)
+
+    if events is not None:
+        for event in events.iterator(chunk_size=CHUNK_SIZE):
+            yield ''.join(fold(line) for line in event_lines(event, host, stamp))
+    if timetables is not None:
+        for entry in timetables.iterator(chunk_size=CHUNK_SIZE):
+            yield ''.join(fold(line) for line in timetable_lines(entry, host, stamp))
+
+    yield fold('END:VCALENDAR')
+
+
+def feed_etag(queryset, *extra):
+    """Strong ETag from one aggregate query: row count, max id and sum of row versions"""
+    state = queryset.order_by().aggregate(n=Count('id'), last=Max('id'), versions=Sum('version'))
+    key = '|'.join(str(v) for v in (state['n'], state['last'], state['versions'], *extra))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def event_window(queryset):
+    since = timezone.now() - datetime.timedelta(days=EVENT_HISTORY_DAYS)
+    return queryset.filter(end_date__gte=since)
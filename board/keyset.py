@@ -0,0 +1,107 @@
+# board/keyset.py
+import base64
+import json
+from urllib.parse import urlencode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(values):
+    """An opaque, URL-safe token for a row's sort key (a list of JSON values)"""
+    raw = json.dumps(values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, converters):
+    """The sort key in `cursor`, each value passed through its converter, or None if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(converters):
+            return None
+        return tuple(convert(value) for convert, value in zip(converters, values))
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def timestamp(value):
+    """Cursor converter for an ISO datetime"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Not a datetime: {value!r}')
+    return parsed
+
+
+def beyond(fields, key, op):
+    """Rows strictly past `key` in `fields` order: a row comparison spelled out as ORs"""
+    query = Q()
+    for i, field in enumerate(fields):
+        equal = dict(zip(fields[:i], key[:i]))
+        query |= Q(**equal, **{f'{field}__{op}': key[i]})
+    return query
+
+
+class KeysetPage:
+    """
+    One page of rows read by keyset rather than by offset.
+
+    ?after=<cursor> continues past the last row of the previous page and
+    ?before=<cursor> goes back from the first row of the next one, so every
+    page is a bounded index range read however deep the reader goes, and
+    nothing is counted. Subclasses set `converters` and `params` (the GET
+    parameters page links keep), implement `_key(row)` and `_rows(cursor,
+    backwards, limit)`, then call `_paginate()`.
+    """
+
+    converters = ()
+    params = {}
+
+    def _key(self, row):
+        """The row's sort key as JSON values, decodable by `converters`"""
+        raise NotImplementedError
+
+    def _rows(self, cursor, backwards, limit):
+        """Up to `limit` rows past `cursor` (None: from the start), nearest first"""
+        raise NotImplementedError
+
+    def _paginate(self, params, page_size):
+        after = params.get('after')
+        before = params.get('before')
+        token = after or before
+        cursor = decode_cursor(token, self.converters) if token else None
+        backwards = not after and cursor is not None
+
+        rows = self._rows(cursor, backwards, page_size + 1)
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+            self.object_list, self.has_next, self.has_previous = rows, True, more
+        else:
+            self.object_list, self.has_next, self.has_previous = rows, more, cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _url(self, **changes):
+        params = {**self.params, **changes}
+        return '?' + urlencode({k: v for k, v in params.items() if v not in ('', None)})
+
+    @property
+    def next_url(self):
+        if self.has_next and self.object_list:
+            return self._url(after=encode_cursor(self._key(self.object_list[-1])))
+        return None
+
+    @property
+    def previous_url(self):
+        if self.has_previous and self.object_list:
+            return self._url(before=encode_cursor(self._key(self.object_list[0])))
+        return None
+
+    @property
+    def first_url(self):
+        return self._url()
@@ -0,0 +1,81 @@
+# board/management/commands/benchmark_requests.py
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+PUBLIC_PAGES = ['home', 'announcements', 'events', 'timetable', 'results']
+SESSION_TABLES = ('FROM "django_session"', 'FROM "auth_user"')
+
+
+class StaleCookieClient(Client):
+    """A visitor whose session cookie no longer matches a stored session"""
+
+    def request(self, **request):
+        self.cookies[settings.SESSION_COOKIE_NAME] = 'x' * 32
+        return super().request(**request)
+
+
+class Command(BaseCommand):
+    help = (
+        'Request each public page in-process and report the database queries '
+        'it runs, split into session/auth queries and page queries, for an '
+        'anonymous visitor, a visitor with a stale session cookie and '
+        '(with --user) a signed-in staff member.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Also benchmark as this (existing) user')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per page and scenario')
+
+    def handle(self, *args, **options):
+        repeat = max(options['repeat'], 1)
+        scenarios = [('anonymous', Client())]
+        scenarios.append(('stale cookie', StaleCookieClient()))
+
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'User {options["user"]} does not exist.')
+            staff = Client()
+            staff.force_login(user)
+            scenarios.append((f'as {user.username}', staff))
+
+        self.stdout.write(
+            f'SESSION_ENGINE={settings.SESSION_ENGINE}\n'
+            f'MESSAGE_STORAGE={settings.MESSAGE_STORAGE}\n'
+        )
+        self.stdout.write(f'{"page":<15}{"scenario":<16}{"session":>8}{"other":>8}{"ms/req":>9}')
+        totals = {}
+        for name in PUBLIC_PAGES:
+            url = reverse(name)
+            for label, client in scenarios:
+                client.get(url)  # warm caches (registry, facets, cached_db sessions)
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    for _ in range(repeat):
+                        response = client.get(url)
+                    elapsed = (time.perf_counter() - started) / repeat * 1000
+                if response.status_code != 200:
+                    raise CommandError(f'{url} returned {response.status_code} ({label})')
+                session = sum(
+                    1 for q in ctx.captured_queries
+                    if any(table in q['sql'] for table in SESSION_TABLES)
+                ) / repeat
+                other = len(ctx.captured_queries) / repeat - session
+                totals.setdefault(label, [0, 0])
+                totals[label][0] += session
+                totals[label][1] += other
+                self.stdout.write(f'{url:<15}{label:<16}{session:>8.1f}{other:>8.1f}{elapsed:>9.2f}')
+
+        for label, (session, other) in totals.items():
+            self.stdout.write(self.style.SUCCESS(
+                f'{label}: {session:.1f} session/auth and {other:.1f} page queries across '
+                f'{len(PUBLIC_PAGES)} pages per visit'
+            ))
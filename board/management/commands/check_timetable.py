@@ -0,0 +1,95 @@
+# board/management/commands/check_timetable.py
+import csv
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+
+from board.departments import departments
+from board.models import Timetable
+from board.scheduling import EXCLUSION_CONSTRAINTS, describe, exclusion_constraint_sql, validate_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Report venue, lecturer and department/level clashes in the timetable. '
+        'With --csv, validate a semester file before importing it (against itself '
+        'and the saved timetable).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', help='Only check this semester')
+        parser.add_argument('--csv', help='CSV with department (code), day_of_week, course_code, '
+                                          'course_title, lecturer, venue, start_time, end_time, level, semester')
+        parser.add_argument('--install-constraint', action='store_true',
+                            help='PostgreSQL only: add exclusion constraints that reject venue, lecturer and class overlaps')
+
+    def handle(self, *args, **options):
+        if options['install_constraint']:
+            return self.install_constraint()
+
+        saved = Timetable.objects.filter(is_active=True)
+        if options['semester']:
+            saved = saved.filter(semester__iexact=options['semester'])
+        entries = list(saved.order_by('day_of_week', 'start_time'))
+        if options['csv']:
+            entries += self.read_csv(options['csv'])
+
+        clashes = validate_batch(entries)
+        for clash in clashes:
+            entry = clash.entry
+            label = f'#{entry.pk}' if entry.pk else 'new'
+            self.stdout.write(f'{label} {entry.course_code} {entry.start_time:%H:%M}-{entry.end_time:%H:%M}: {describe(clash)}')
+
+        if clashes:
+            raise CommandError(f'{len(clashes)} clash(es) in {len(entries)} entries.')
+        self.stdout.write(self.style.SUCCESS(f'No clashes in {len(entries)} entries.'))
+
+    def read_csv(self, path):
+        entries = []
+        with open(path, newline='') as fh:
+            for line, row in enumerate(csv.DictReader(fh), start=2):
+                department = departments.by_code(row.get('department', ''))
+                if department is None:
+                    raise CommandError(f'{path}:{line}: unknown department {row.get("department")!r}')
+                try:
+                    start_time = datetime.time.fromisoformat(row['start_time'])
+                    end_time = datetime.time.fromisoformat(row['end_time'])
+                except (KeyError, ValueError):
+                    raise CommandError(f'{path}:{line}: start_time/end_time must be HH:MM')
+                entries.append(Timetable(
+                    department_id=department.pk,
+                    day_of_week=row['day_of_week'].strip().lower(),
+                    course_code=row.get('course_code', ''),
+                    course_title=row.get('course_title', ''),
+                    lecturer=row.get('lecturer', ''),
+                    venue=row.get('venue', ''),
+                    start_time=start_time,
+                    end_time=end_time,
+                    level=row.get('level') or '100L',
+                    semester=row.get('semester') or 'First',
+                ))
+        return entries
+
+    def install_constraint(self):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The exclusion constraints need PostgreSQL; the form and this command '
+                               'already check clashes on other databases.')
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+            cursor.execute(
+                "SELECT conname FROM pg_constraint WHERE conrelid = 'board_timetable'::regclass AND conname = ANY(%s)",
+                [list(EXCLUSION_CONSTRAINTS)],
+            )
+            installed = {row[0] for row in cursor.fetchall()}
+            for name in EXCLUSION_CONSTRAINTS:
+                if name in installed:
+                    self.stdout.write(f'{name} is already installed.')
+                    continue
+                try:
+                    with transaction.atomic():
+                        cursor.execute(exclusion_constraint_sql(name))
+                except IntegrityError as e:
+                    raise CommandError(f'Could not add {name}: the saved timetable already has clashes '
+                                       f'(run check_timetable to list them).\n{e}')
+                self.stdout.write(self.style.SUCCESS(f'Installed {name}.'))
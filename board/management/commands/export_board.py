@@ -0,0 +1,52 @@
+# board/management/commands/export_board.py
+import gzip
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from django.utils import timezone
+
+from board.exports import COLUMNS, FORMATS, stream_export
+from board.views import ADMIN_LISTS
+
+
+class Command(BaseCommand):
+    help = (
+        'Write board data to gzip-compressed CSV or JSON files, streamed a '
+        'chunk of rows at a time so memory stays flat however large the '
+        'tables are. Filters use the same parameters as the admin lists.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='.', help='Directory for the export files')
+        parser.add_argument('--model', action='append', choices=list(COLUMNS),
+                            help='Only export these lists (repeatable; default all)')
+        parser.add_argument('--format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--search', default='', help='Same as the admin list search box')
+        parser.add_argument('--filter', action='append', default=[], metavar='PARAM=VALUE',
+                            help='Admin list filter, e.g. department=1 or status=true (repeatable)')
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        if options['search']:
+            params['q'] = options['search']
+        for item in options['filter']:
+            param, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'--filter expects PARAM=VALUE, got "{item}".')
+            params[param] = value
+
+        output = Path(options['output'])
+        output.mkdir(parents=True, exist_ok=True)
+        stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+        fmt = options['format']
+
+        for name in options['model'] or list(COLUMNS):
+            queryset = ADMIN_LISTS[name].queryset(params)
+            path = output / f'{name}-{stamp}.{fmt}.gz'
+            with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+                for chunk in stream_export(name, queryset, fmt):
+                    f.write(chunk)
+            self.stdout.write(f'  wrote {path} ({path.stat().st_size} bytes)')
+
+        self.stdout.write(self.style.SUCCESS(f'Exported to {output.resolve()}'))
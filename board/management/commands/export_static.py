@@ -0,0 +1,59 @@
+# board/management/commands/export_static.py
+from django.core.management.base import BaseCommand, CommandError
+
+from board.models import Department
+from board.static_export import DATED_ROUTES, ROUTES, StaticExporter, iter_pages
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the public pages and every department/level/session/year filter '
+        'combination, event window and event page to static HTML plus JSON '
+        'under STATIC_EXPORT_ROOT. Only snapshots whose content changed are '
+        'rewritten, and snapshots of pages that no longer exist are removed. '
+        'A URL /<route>/?<query> is saved as <route>/<key>-<value>/.../index.html '
+        '(and index.json) with the query keys sorted; manifest.json maps each '
+        'public URL to its files so a front end can rewrite requests to them. '
+        'Searches are never exported. Run with --expired daily, shortly after '
+        'midnight, to refresh event status and the today/upcoming windows '
+        '(the task worker does this itself when STATIC_EXPORT_ON_CHANGE is on).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Export root (defaults to STATIC_EXPORT_ROOT)')
+        parser.add_argument('--route', action='append', choices=list(ROUTES),
+                            help='Only export these pages (repeatable)')
+        parser.add_argument('--department', type=int,
+                            help='Only re-render pages affected by this department')
+        parser.add_argument('--expired', action='store_true',
+                            help='Only re-render the date-dependent pages ({})'.format(', '.join(DATED_ROUTES)))
+
+    def handle(self, *args, **options):
+        routes = options['route'] or list(ROUTES)
+        department_id = options['department']
+        if options['expired']:
+            if options['route'] or department_id is not None:
+                raise CommandError('--expired re-renders every date-dependent page; drop --route/--department.')
+            routes = list(DATED_ROUTES)
+
+        if department_id is not None:
+            if not Department.objects.filter(pk=department_id).exists():
+                raise CommandError(f'Department {department_id} does not exist.')
+            pages = [
+                page for page in iter_pages(routes)
+                if page.department_id() in (None, str(department_id))
+            ]
+        else:
+            pages = list(iter_pages(routes))
+
+        # Only a full export knows every page, so only it can drop whole departments
+        full = department_id is None and not options['route'] and not options['expired']
+        exporter = StaticExporter(options['output'])
+        written, unchanged, removed = exporter.export(pages, prune=full)
+
+        for page in written:
+            self.stdout.write(f'  wrote {page.path}  ({page.url})')
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {len(pages)} pages to {exporter.root}: '
+            f'{len(written)} written, {len(unchanged)} unchanged, {len(removed)} removed.'
+        ))
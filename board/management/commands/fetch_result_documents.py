@@ -0,0 +1,41 @@
+# board/management/commands/fetch_result_documents.py
+from django.core.management.base import BaseCommand
+
+from board.documents import DocumentUnavailable, documents
+from board.models import Result
+
+
+class Command(BaseCommand):
+    help = (
+        'Download the documents linked from published results into '
+        'RESULT_DOCUMENT_ROOT ahead of time, so the proxy serves them locally '
+        'even if the origin servers go down under results-day traffic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', help='Only results for this session, e.g. 2023/2024')
+        parser.add_argument('--department', type=int, help='Only results for this department id')
+
+    def handle(self, *args, **options):
+        results = Result.objects.filter(is_published=True).exclude(file_url='')
+        if options['session']:
+            results = results.filter(session=options['session'])
+        if options['department']:
+            results = results.filter(department_id=options['department'])
+
+        urls = sorted(set(results.values_list('file_url', flat=True)))
+        stored, failed = set(), 0
+        for url in urls:
+            try:
+                document = documents.get(url)
+            except DocumentUnavailable as e:
+                failed += 1
+                self.stderr.write(f'  failed {e}')
+                continue
+            stored.add(document.sha256)
+            self.stdout.write(f'  {document.sha256[:12]}  {document.size:>10}  {url}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(urls) - failed} of {len(urls)} documents available '
+            f'({len(stored)} distinct files), {failed} failed.'
+        ))
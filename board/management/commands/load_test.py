@@ -0,0 +1,85 @@
+# board/management/commands/load_test.py
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer one public URL from in-process threads at rising concurrency '
+        'and report requests and database queries per second, with page '
+        'coalescing on and off. With coalescing, queries per second should '
+        'stay flat as concurrency grows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='?', default='/results/',
+                            help='Path to request, e.g. "/results/?session=2023/2024"')
+        parser.add_argument('--concurrency', default='1,4,16,32',
+                            help='Comma-separated thread counts')
+        parser.add_argument('--duration', type=float, default=3, help='Seconds per run')
+        parser.add_argument('--mode', choices=['both', 'on', 'off'], default='both',
+                            help='Run with PAGE_COALESCING on, off or both')
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(n) for n in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency must be a comma-separated list of integers.')
+        modes = {'both': [False, True], 'on': [True], 'off': [False]}[options['mode']]
+        url, duration = options['url'], options['duration']
+
+        status = Client().get(url).status_code
+        if status != 200:
+            raise CommandError(f'{url} returned {status}')
+
+        self.stdout.write(f'{"coalescing":<12}{"threads":>8}{"req/s":>10}{"queries/s":>11}{"q/req":>8}')
+        for coalescing in modes:
+            with override_settings(PAGE_COALESCING=coalescing):
+                for threads in levels:
+                    requests, queries = self._run(url, threads, duration)
+                    self.stdout.write(
+                        f'{"on" if coalescing else "off":<12}{threads:>8}'
+                        f'{requests / duration:>10.1f}{queries / duration:>11.1f}'
+                        f'{queries / max(requests, 1):>8.2f}'
+                    )
+
+    def _run(self, url, threads, duration):
+        counter = QueryCounter()
+        done = [0] * threads
+        deadline = time.monotonic() + duration
+        start = threading.Barrier(threads)
+
+        def worker(n):
+            client = Client()
+            try:
+                with connection.execute_wrapper(counter):
+                    start.wait()
+                    while time.monotonic() < deadline:
+                        client.get(url)
+                        done[n] += 1
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        return sum(done), counter.count
@@ -0,0 +1,151 @@
+# board/management/commands/partitions.py
+import datetime
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from board import partitions
+from board.models import Announcement, Result, Department
+from board.partitions import PARTITIONED_TABLES
+
+ANNOUNCEMENTS = 'board_announcement'
+RESULTS = 'board_result'
+BENCH_CODE = 'BENCH'
+
+
+def _scanned(plan, table):
+    """Partitions of `table` an EXPLAIN ANALYZE plan actually read"""
+    found = set()
+    relation = plan.get('Relation Name', '')
+    if relation.startswith(table) and plan.get('Actual Loops', 1):
+        found.add(relation)
+    for child in plan.get('Plans', ()):
+        found |= _scanned(child, table)
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        'Show the PostgreSQL partitions of announcements (by year) and results '
+        '(by academic session), or benchmark typical page queries and the '
+        'partitions they read (optionally on seeded multi-year data).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', nargs='?', default='status',
+                            choices=['status', 'benchmark'])
+        parser.add_argument('--seed', type=int, default=0,
+                            help='benchmark: first add this many years of synthetic rows (department BENCH)')
+        parser.add_argument('--rows-per-year', type=int, default=20000, help='benchmark: rows per table per seeded year')
+        parser.add_argument('--cleanup', action='store_true', help='benchmark: remove the BENCH department and its rows afterwards')
+        parser.add_argument('--repeat', type=int, default=20, help='benchmark: runs per query')
+
+    def handle(self, *args, **options):
+        action = options['action']
+        if action != 'benchmark' and not partitions.available(connection):
+            raise CommandError('Partitioning needs PostgreSQL.')
+        getattr(self, f'_{action}')(options)
+
+    def _status(self, options):
+        with connection.cursor() as cursor:
+            for table in PARTITIONED_TABLES:
+                if not partitions.is_partitioned(cursor, table):
+                    self.stdout.write(f'{table}: not partitioned')
+                    continue
+                self.stdout.write(f'{table}:')
+                for name, bound, rows in partitions.partitions(cursor, table):
+                    self.stdout.write(f'  {name:<36}{max(rows, 0):>10} rows  {bound}')
+
+    # Benchmark
+
+    def _seed(self, years, per_year):
+        user = User.objects.filter(is_staff=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('Seeding needs a staff user to own the rows.')
+        department, _ = Department.objects.get_or_create(code=BENCH_CODE, deleted_at=None, defaults={'name': 'Benchmark data'})
+        this_year = timezone.now().year
+        for year in range(this_year - years + 1, this_year + 1):
+            session = f'{year - 1}/{year}'
+            for month in range(1, 13):
+                count = per_year // 12
+                created = Announcement.objects.bulk_create([
+                    Announcement(
+                        title=f'Benchmark {year}-{month:02d} #{i}', content='Seeded for the partition benchmark.',
+                        department=department, priority='medium', priority_weight=2, created_by=user,
+                    )
+                    for i in range(count)
+                ], batch_size=1000)
+                # created_at is auto_now_add: backdate each month's batch afterwards
+                stamp = timezone.make_aware(datetime.datetime(year, month, 15, 12))
+                Announcement.objects.filter(pk__in=[a.pk for a in created]).update(created_at=stamp)
+                Result.objects.bulk_create([
+                    Result(
+                        session=session, semester='first' if month < 7 else 'second', department=department,
+                        level=str(100 * (i % 5 + 1)), course_code=f'BEN{i % 400:03d}',
+                        course_title='Benchmark course', is_published=True, created_by=user,
+                    )
+                    for i in range(count)
+                ], batch_size=1000)
+            self.stdout.write(f'  seeded {year} ({session})')
+
+    def _queries(self):
+        now = timezone.now()
+        session = Result.objects.order_by('-session').values_list('session', flat=True).first() or ''
+        announcements = Announcement.objects.filter(is_active=True, department__is_active=True)
+        # As the announcements page filters for ?year= (see views.announcements_view)
+        year = now.year - 1
+        start, end = partitions.year_bounds(year)
+        return [
+            ('announcements page', ANNOUNCEMENTS, announcements.order_by('-created_at')[:10]),
+            (f'announcements {year}', ANNOUNCEMENTS,
+             announcements.filter(created_at__gte=start, created_at__lt=end).order_by('-created_at')[:10]),
+            ('announcements last 30 days', ANNOUNCEMENTS,
+             announcements.filter(created_at__gte=now - datetime.timedelta(days=30)).order_by('-created_at')[:10]),
+            (f'results {session}', RESULTS,
+             Result.objects.filter(is_published=True, session=session).order_by('course_code')[:50]),
+            (f'results {session} count', RESULTS,
+             Result.objects.filter(is_published=True, session=session).values('pk')),
+        ]
+
+    def _benchmark(self, options):
+        if options['seed']:
+            self.stdout.write(f'Seeding {options["seed"]} year(s) of {options["rows_per_year"]} rows per table...')
+            self._seed(options['seed'], options['rows_per_year'])
+
+        postgres = partitions.available(connection)
+        self.stdout.write(f'{"query":<32}{"median ms":>10}{"partitions read":>17}')
+        for label, table, queryset in self._queries():
+            if label.endswith('count'):
+                run = lambda qs=queryset: qs.count()
+            else:
+                run = lambda qs=queryset: list(qs.all())
+            run()
+            timings = []
+            for _ in range(max(options['repeat'], 1)):
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+
+            read = '-'
+            if postgres:
+                sql, params = queryset.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}', params)
+                    plan = cursor.fetchone()[0]
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                scanned = _scanned(plan[0]['Plan'], table)
+                read = str(len(scanned)) if any(name != table for name in scanned) else 'n/a'
+            self.stdout.write(f'{label:<32}{statistics.median(timings):>10.2f}{read:>17}')
+
+        if options['cleanup']:
+            from board.purge import purge_department
+            department = Department.objects.filter(code=BENCH_CODE, deleted_at=None).first()
+            if department is not None:
+                department.soft_delete()
+                progress = purge_department(department.pk)
+                self.stdout.write(f'Removed {progress["deleted"]} benchmark rows.')
@@ -0,0 +1,34 @@
+# board/management/commands/purge_departments.py
+from django.core.management.base import BaseCommand
+
+from board.models import Department
+from board.purge import purge_department
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete soft-deleted departments and their announcements, events, '
+        'timetables and results in bounded batches. Finishes purges that were '
+        'interrupted (e.g. by a worker restart); safe to run from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows per DELETE (defaults to DEPARTMENT_PURGE_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        deleted = list(Department.objects.filter(is_active=False).order_by('deleted_at'))
+        if not deleted:
+            self.stdout.write('No deleted departments to purge.')
+            return
+
+        for department in deleted:
+            self.stdout.write(f'Purging {department.code} ({department.name})...')
+
+            def report(progress):
+                self.stdout.write(f'  {progress["deleted"]}/{progress["total"]} rows', ending='\r')
+                self.stdout.flush()
+
+            progress = purge_department(department.pk, options['batch_size'], on_progress=report)
+            self.stdout.write(self.style.SUCCESS(
+                f'  removed {department.code} and {progress["deleted"]} related rows'
+            ))
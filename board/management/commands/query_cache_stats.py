@@ -0,0 +1,34 @@
+# board/management/commands/query_cache_stats.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from board.querycache import stats
+
+
+class Command(BaseCommand):
+    help = 'Show query cache hits, misses and hit ratio per table (shared by all workers).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clear the counters afterwards')
+
+    def handle(self, *args, **options):
+        if not settings.QUERY_CACHE_ENABLED:
+            self.stdout.write(self.style.WARNING('QUERY_CACHE_ENABLED is off.'))
+
+        rows = stats.report()
+        if not rows:
+            self.stdout.write('No cached reads recorded yet (workers flush their counts every few seconds).')
+        else:
+            self.stdout.write(f'{"table":<24}{"hits":>10}{"misses":>10}{"ratio":>8}')
+            for table, hits, misses, ratio in rows:
+                self.stdout.write(f'{table:<24}{hits:>10}{misses:>10}{ratio:>8.1%}')
+            hits = sum(r[1] for r in rows)
+            misses = sum(r[2] for r in rows)
+            total = hits + misses
+            self.stdout.write(self.style.SUCCESS(
+                f'{"total":<24}{hits:>10}{misses:>10}{(hits / total if total else 0):>8.1%}'
+            ))
+
+        if options['reset']:
+            stats.reset()
+            self.stdout.write('Counters reset.')
@@ -0,0 +1,66 @@
+# board/management/commands/run_tasks.py
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from board.tasks import claim, requeue_stale, run, worker_name
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background tasks (department purges, static export '
+        'refreshes, ...) from the board_task table. Any number of workers '
+        'can run side by side. Use --once from cron on hosts without '
+        'long-running processes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--max-time', type=float, default=0,
+                            help='Stop taking new tasks after this many seconds (0 = no limit)')
+        parser.add_argument('--sleep', type=float, default=2, help='Seconds to wait when idle')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        worker = worker_name()
+        deadline = time.monotonic() + options['max_time'] if options['max_time'] else None
+        ran = failed = 0
+        self.stdout.write(f'Worker {worker} started')
+
+        while not self.stopping and (deadline is None or time.monotonic() < deadline):
+            close_old_connections()
+            requeued, abandoned = requeue_stale()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale task(s)'))
+            if abandoned:
+                self.stdout.write(self.style.ERROR(f'Failed {abandoned} stale task(s) out of attempts'))
+
+            task = claim(worker)
+            if task is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f'Running {task.name} #{task.pk} {task.args} (attempt {task.attempts})')
+            started = time.monotonic()
+            ok = run(task)
+            ran += 1
+            elapsed = time.monotonic() - started
+            if ok:
+                self.stdout.write(self.style.SUCCESS(f'  done in {elapsed:.1f}s'))
+            else:
+                failed += 1
+                last_line = task.error.strip().splitlines()[-1] if task.error else ''
+                self.stdout.write(self.style.ERROR(f'  {task.status} after {elapsed:.1f}s: {last_line}'))
+
+        self.stdout.write(f'Worker {worker} stopped: {ran} task(s) run, {failed} failed')
+
+    def _stop(self, signum, frame):
+        # Finish the task in hand, then exit
+        self.stopping = True
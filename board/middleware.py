@@ -0,0 +1,53 @@
+# board/middleware.py
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+
+from . import profiling
+
+
+class PublicPageMiddleware:
+    """
+    Serve pages outside SESSION_PATH_PREFIXES as an anonymous user.
+
+    `request.user` is replaced before anything evaluates it, so the session
+    is never loaded and public pages never read the session store, even for
+    visitors who carry a session cookie. Staff following "Admin Login" from
+    a public page are sent straight on to the dashboard by admin_login.
+    Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefixes = tuple(settings.SESSION_PATH_PREFIXES)
+
+    def __call__(self, request):
+        if not request.path_info.startswith(self.prefixes):
+            request.user = AnonymousUser()
+        return self.get_response(request)
+
+
+class ProfilingMiddleware:
+    """
+    Profile single requests on demand for staff.
+
+    A request carrying the PROFILE_PARAM query flag or the PROFILE_HEADER
+    header from a staff user runs under cProfile with a trace of every SQL
+    statement; the capture goes into a ring buffer listed at
+    /admin/profiles/. Only flagged requests look at the session, so every
+    other request pays for one dict lookup. Must come after
+    AuthenticationMiddleware and before PublicPageMiddleware, so staff are
+    recognised on public pages, which are then profiled as the public sees them.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.requested(request) or not request.user.is_staff:
+            return self.get_response(request)
+        username = request.user.get_username()
+        # Keep the flag out of the page's own links and cache keys
+        request.GET = request.GET.copy()
+        request.GET.pop(settings.PROFILE_PARAM, None)
+        request.profiling = True
+        return profiling.capture(request, self.get_response, username)
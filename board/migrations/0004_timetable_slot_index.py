@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0003_row_versions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timetable',
+            index=models.Index(fields=['day_of_week', 'start_time', 'end_time'], name='board_tt_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0004_timetable_slot_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['is_active', 'created_at'], name='board_ann_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['department', 'is_active', 'created_at'], name='board_ann_dept_recent_idx'),
+        ),
+    ]
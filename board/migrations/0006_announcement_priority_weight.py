@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:33
+
+from django.db import migrations, models
+
+
+PRIORITY_WEIGHTS = {'low': 1, 'medium': 2, 'high': 3, 'urgent': 4}
+
+
+def fill_priority_weight(apps, schema_editor):
+    Announcement = apps.get_model('board', 'Announcement')
+    for priority, weight in PRIORITY_WEIGHTS.items():
+        Announcement.objects.filter(priority=priority).update(priority_weight=weight)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0005_announcement_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='priority_weight',
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.RunPython(fill_priority_weight, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['priority_weight', 'id'], name='board_ann_weight_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['is_active', 'priority_weight', 'created_at', 'id'], name='board_ann_active_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['department', 'is_active', 'priority_weight', 'created_at', 'id'], name='board_ann_dept_rank_idx'),
+        ),
+    ]
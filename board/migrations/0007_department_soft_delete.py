@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0006_announcement_priority_weight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='is_active',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='department',
+            name='code',
+            field=models.CharField(max_length=10),
+        ),
+        migrations.AddConstraint(
+            model_name='department',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('code',), name='board_dept_live_code_uniq', violation_error_message='A department with this code already exists.'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0008_task_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['is_active', 'start_date', 'end_date'], name='board_event_window_idx'),
+        ),
+    ]
@@ -1,40 +1,188 @@
 # board/models.py
-from django.db import models
+import datetime
+
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 
-class Department(models.Model):
+from .querycache import CachingQuerySet
+
+
+class VersionConflict(Exception):
+    """The row was saved by someone else after the caller loaded it"""
+
+
+class VersionedModel(models.Model):
+    """
+    Optimistic locking: every update is `UPDATE ... WHERE id = %s AND version = %s`
+    and bumps `version`, so a save based on a stale copy raises VersionConflict
+    instead of silently overwriting the newer row.
+
+    Instances also remember the column values they were loaded (or last
+    saved) with, so post_save receivers can tell what a save changed
+    without querying for the old row.
+    """
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_values()
+
+    def _remember_values(self):
+        self._loaded_values = {f.attname: getattr(self, f.attname) for f in self._meta.concrete_fields}
+
+    def loaded_value(self, attname, default=None):
+        """The column's value when the row was loaded or last saved (`default` for a new row)"""
+        return getattr(self, '_loaded_values', {}).get(attname, default)
+
+    def changed_fields(self, update_fields=None):
+        """
+        Names of the fields whose values differ from the loaded row, limited to
+        `update_fields` if given; every field for a row that was not loaded
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        changed = set()
+        for field in self._meta.concrete_fields:
+            if update_fields is not None and field.name not in update_fields:
+                continue
+            if loaded is None or field.attname not in loaded or loaded[field.attname] != getattr(self, field.attname):
+                changed.add(field.name)
+        return changed - {'version'}
+
+    def save(self, *args, **kwargs):
+        super_save = super().save
+        if self._state.adding or self.pk is None:
+            super_save(*args, **kwargs)
+            self._remember_values()
+            return
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # auto_now columns are only refreshed when they are listed
+            auto_now = {f.name for f in self._meta.concrete_fields if getattr(f, 'auto_now', False)}
+            kwargs['update_fields'] = set(update_fields) | auto_now | {'version'}
+
+        self._expected_version = self.version
+        self.version += 1
+        try:
+            # A savepoint, so a conflict leaves the caller's transaction usable
+            with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self), instance=self)):
+                super_save(*args, **kwargs)
+        except VersionConflict:
+            self.version = self._expected_version
+            raise
+        finally:
+            self._expected_version = None
+        self._remember_values()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, '_expected_version', None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        updated = super()._do_update(
+            base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update
+        )
+        if not updated and base_qs.filter(pk=pk_val).exists():
+            raise VersionConflict(f'{self._meta.label} {pk_val} is no longer at version {expected}')
+        return updated
+
+
+class Department(VersionedModel):
     name = models.CharField(max_length=100)
-    code = models.CharField(max_length=10, unique=True)
+    # Unique among live departments (see Meta): a deleted one frees its code at once
+    code = models.CharField(max_length=10)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Soft delete: hidden everywhere at once, its rows are purged in the background
+    is_active = models.BooleanField(default=True, editable=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = CachingQuerySet.as_manager()
     
     def __str__(self):
         return self.name
+
+    def soft_delete(self):
+        self.is_active = False
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['is_active', 'deleted_at'])
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='board_dept_name_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='board_dept_created_id_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['code'], condition=models.Q(deleted_at__isnull=True), name='board_dept_live_code_uniq',
+                violation_error_message='A department with this code already exists.',
+            ),
+        ]
+
+class AnnouncementQuerySet(CachingQuerySet):
+
+    RANK_ORDER = ('-priority_weight', '-created_at', '-id')
+
+    def ranked(self, now=None):
+        """
+        Rank order as two segments: announcements that have not expired, then
+        expired ones, each by priority weight and newest first (id breaks ties
+        for keyset paging). Each segment's ORDER BY is the
+        (is_active, priority_weight, created_at) index order, which a single
+        ORDER BY on a liveness expression could not use; `is_live` is a
+        constant per segment, so it costs nothing.
+        """
+        # Expiry is judged to the minute so the SQL (and any cached result) is stable
+        now = now or timezone.now().replace(second=0, microsecond=0)
+        live = models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=now)
+        return (
+            self.filter(live).annotate(is_live=models.Value(1)).order_by(*self.RANK_ORDER),
+            self.exclude(live).annotate(is_live=models.Value(0)).order_by(*self.RANK_ORDER),
+        )
+
 
-class Announcement(models.Model):
+class Announcement(VersionedModel):
     PRIORITY_CHOICES = [
         ('low', 'Low'),
         ('medium', 'Medium'),
         ('high', 'High'),
         ('urgent', 'Urgent'),
     ]
+    PRIORITY_WEIGHTS = {'low': 1, 'medium': 2, 'high': 3, 'urgent': 4}
     
     title = models.CharField(max_length=200)
     content = models.TextField()
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
+    # Integer copy of `priority` so ranking can ORDER BY an indexed column
+    priority_weight = models.PositiveSmallIntegerField(default=2, editable=False)
     is_active = models.BooleanField(default=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     expires_at = models.DateTimeField(null=True, blank=True)
+
+    objects = AnnouncementQuerySet.as_manager()
     
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        self.priority_weight = self.PRIORITY_WEIGHTS.get(self.priority, 0)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'priority' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'priority_weight'}
+        super().save(*args, **kwargs)
     
     def is_expired(self):
         if self.expires_at:
@@ -43,8 +191,62 @@ class Announcement(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='board_ann_created_id_idx'),
+            models.Index(fields=['title', 'id'], name='board_ann_title_id_idx'),
+            # The admin list's priority column sorts on the weight
+            models.Index(fields=['priority_weight', 'id'], name='board_ann_weight_id_idx'),
+            models.Index(fields=['is_active', 'created_at'], name='board_ann_active_recent_idx'),
+            models.Index(fields=['department', 'is_active', 'created_at'], name='board_ann_dept_recent_idx'),
+            models.Index(fields=['is_active', 'priority_weight', 'created_at', 'id'], name='board_ann_active_rank_idx'),
+            models.Index(fields=['department', 'is_active', 'priority_weight', 'created_at', 'id'], name='board_ann_dept_rank_idx'),
+        ]
+
+def local_day_start(day):
+    """Aware datetime for local midnight at the start of `day`"""
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+class EventQuerySet(CachingQuerySet):
+
+    def between(self, start, end):
+        """Events overlapping [start, end): a range read on the (is_active, start_date, end_date) index"""
+        return self.filter(start_date__lt=end, end_date__gte=start)
 
-class Event(models.Model):
+    def window(self, name, today=None):
+        """
+        Events in a named window relative to `today` (a local date):
+        'today' (running at some point today), 'upcoming' (not yet over,
+        soonest first), 'past' (over before today, latest first)
+        """
+        today = today or timezone.localdate()
+        day_start = local_day_start(today)
+        next_day = local_day_start(today + datetime.timedelta(days=1))
+        if name == 'today':
+            return self.between(day_start, next_day).order_by('start_date', 'id')
+        if name == 'past':
+            return self.filter(end_date__lt=day_start).order_by('-start_date', '-id')
+        return self.filter(end_date__gte=day_start).order_by('start_date', 'id')
+
+    def with_status(self, today=None):
+        """
+        Annotate `status` ('past', 'today' or 'upcoming') in SQL. The bounds
+        are whole local days, so the SQL only changes at midnight.
+        """
+        today = today or timezone.localdate()
+        day_start = local_day_start(today)
+        next_day = local_day_start(today + datetime.timedelta(days=1))
+        return self.annotate(
+            status=models.Case(
+                models.When(end_date__lt=day_start, then=models.Value('past')),
+                models.When(start_date__lt=next_day, then=models.Value('today')),
+                default=models.Value('upcoming'),
+                output_field=models.CharField(),
+            )
+        )
+
+
+class Event(VersionedModel):
     EVENT_TYPE_CHOICES = [
         ('lecture', 'Lecture'),
         ('exam', 'Examination'),
@@ -66,6 +268,8 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = EventQuerySet.as_manager()
+    
     def __str__(self):
         return self.title
     
@@ -78,8 +282,14 @@ class Event(models.Model):
     
     class Meta:
         ordering = ['start_date']
+        indexes = [
+            models.Index(fields=['start_date', 'id'], name='board_event_start_id_idx'),
+            models.Index(fields=['title', 'id'], name='board_event_title_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='board_event_created_id_idx'),
+            models.Index(fields=['is_active', 'start_date', 'end_date'], name='board_event_window_idx'),
+        ]
 
-class Timetable(models.Model):
+class Timetable(VersionedModel):
     DAY_CHOICES = [
         ('monday', 'Monday'),
         ('tuesday', 'Tuesday'),
@@ -104,13 +314,21 @@ class Timetable(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = CachingQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.course_code} - {self.day_of_week} {self.start_time}"
     
     class Meta:
         ordering = ['day_of_week', 'start_time']
+        indexes = [
+            models.Index(fields=['course_code', 'id'], name='board_tt_course_id_idx'),
+            models.Index(fields=['level', 'id'], name='board_tt_level_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='board_tt_created_id_idx'),
+            models.Index(fields=['day_of_week', 'start_time', 'end_time'], name='board_tt_slot_idx'),
+        ]
 
-class Result(models.Model):
+class Result(VersionedModel):
     SEMESTER_CHOICES = [
         ('first', 'First Semester'),
         ('second', 'Second Semester'),
@@ -128,8 +346,57 @@ class Result(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = CachingQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.course_code} - {self.session} {self.semester}"
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['course_code', 'id'], name='board_result_course_id_idx'),
+            models.Index(fields=['session', 'id'], name='board_result_session_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='board_result_created_id_idx'),
+        ]
+
+class Task(models.Model):
+    """A unit of background work, claimed and run by `manage.py run_tasks`"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    message = models.CharField(max_length=200, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
+
+    @property
+    def percent(self):
+        if not self.progress_total:
+            return 100 if self.status == 'done' else 0
+        return min(100, self.progress_done * 100 // self.progress_total)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's claim query: next queued task that is due
+            models.Index(fields=['status', 'run_after', 'id'], name='board_task_claim_idx'),
+            models.Index(fields=['created_at', 'id'], name='board_task_created_id_idx'),
+        ]
@@ -0,0 +1,54 @@
+# board/partitions.py
+"""
+Partition-friendly queries for the two tables that grow without bound:
+announcements by calendar year of created_at and results by academic
+session. On PostgreSQL these are the natural RANGE and LIST partition keys,
+so a page filtered on them (the announcements page's year filter via
+year_bounds, the results page's session filter) reads one partition.
+
+Nothing here converts or rebuilds tables. `manage.py partitions status`
+shows the partitions of a database partitioned by hand, and `benchmark`
+times the filtered page queries and counts the partitions each reads.
+"""
+import datetime
+
+# table -> (method, column)
+PARTITIONED_TABLES = {
+    'board_announcement': ('RANGE', 'created_at'),
+    'board_result': ('LIST', 'session'),
+}
+
+
+def available(connection):
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        'SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid '
+        'WHERE c.relname = %s AND pg_table_is_visible(c.oid)',
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def partitions(cursor, table):
+    """[(name, bound expression, estimated rows)] for each partition of `table`"""
+    cursor.execute(
+        'SELECT child.relname, pg_get_expr(child.relpartbound, child.oid), child.reltuples::bigint '
+        'FROM pg_inherits i '
+        'JOIN pg_class parent ON parent.oid = i.inhparent '
+        'JOIN pg_class child ON child.oid = i.inhrelid '
+        'WHERE parent.relname = %s AND pg_table_is_visible(parent.oid) '
+        'ORDER BY child.relname',
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def year_bounds(year):
+    """[start, end) of a calendar year in UTC: exactly one year's announcement partition"""
+    return (
+        datetime.datetime(year, 1, 1, tzinfo=datetime.timezone.utc),
+        datetime.datetime(year + 1, 1, 1, tzinfo=datetime.timezone.utc),
+    )
@@ -0,0 +1,125 @@
+# board/profiling.py
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+SEQUENCE_KEY = 'board:profiles:seq'
+SLOT_KEY = 'board:profiles:slot:{}'
+STATS_LINES = 60
+
+
+def requested(request):
+    """Whether the request asks to be profiled (cheap: no session or user lookup)"""
+    return settings.PROFILE_PARAM in request.GET or settings.PROFILE_HEADER in request.META
+
+
+class SQLTrace:
+    """Connection execute wrapper that records every statement with its duration"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': repr(params)[:500],
+                'many': many,
+                'ms': (time.perf_counter() - started) * 1000,
+            })
+
+
+def capture(request, get_response, username):
+    """Run the rest of the request under cProfile and an SQL trace, store the capture, return the response"""
+    trace = SQLTrace()
+    profiler = cProfile.Profile()
+    started_at = timezone.now()
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(trace))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    duration = (time.perf_counter() - started) * 1000
+
+    profile_id = save({
+        'path': request.path,
+        'query': request.META.get('QUERY_STRING', ''),
+        'method': request.method,
+        'user': username,
+        'status': response.status_code,
+        'started_at': started_at,
+        'ms': duration,
+        'sql': trace.queries,
+        'sql_ms': sum(q['ms'] for q in trace.queries),
+        'stats': marshal.dumps(pstats.Stats(profiler).stats),
+    })
+    response['X-Profile-Id'] = str(profile_id)
+    return response
+
+
+def save(capture):
+    """Put a capture in the ring buffer, overwriting the oldest once PROFILE_BUFFER_SIZE are held"""
+    if cache.add(SEQUENCE_KEY, 1, None):
+        profile_id = 1
+    else:
+        profile_id = cache.incr(SEQUENCE_KEY)
+    capture['id'] = profile_id
+    cache.set(SLOT_KEY.format(profile_id % settings.PROFILE_BUFFER_SIZE), capture, settings.PROFILE_TTL)
+    return profile_id
+
+
+def recent():
+    """Captures still in the buffer, newest first"""
+    slots = [SLOT_KEY.format(slot) for slot in range(settings.PROFILE_BUFFER_SIZE)]
+    captures = cache.get_many(slots).values()
+    return sorted(captures, key=lambda c: c['id'], reverse=True)
+
+
+def get(profile_id):
+    found = cache.get(SLOT_KEY.format(profile_id % settings.PROFILE_BUFFER_SIZE))
+    if found is None or found['id'] != profile_id:
+        return None
+    return found
+
+
+def report(capture):
+    """Plain-text summary: request, top functions by cumulative time, then every SQL statement"""
+    out = io.StringIO()
+    out.write(
+        f'{capture["method"]} {capture["path"]}{"?" + capture["query"] if capture["query"] else ""}\n'
+        f'user {capture["user"] or "-"}, status {capture["status"]}, at {capture["started_at"].isoformat()}\n'
+        f'{capture["ms"]:.1f} ms total, {len(capture["sql"])} queries in {capture["sql_ms"]:.1f} ms\n\n'
+    )
+    stats = pstats.Stats(_Loaded(capture['stats']), stream=out)
+    stats.sort_stats('cumulative').print_stats(STATS_LINES)
+    out.write('\nSQL\n')
+    for number, query in enumerate(capture['sql'], 1):
+        many = ' (executemany)' if query['many'] else ''
+        out.write(f'\n#{number} [{query["alias"]}] {query["ms"]:.2f} ms{many}\n{query["sql"]}\n  params: {query["params"]}\n')
+    return out.getvalue()
+
+
+class _Loaded:
+    """Lets pstats.Stats read stats kept in memory (it normally loads them from a file)"""
+
+    def __init__(self, raw):
+        self.stats = marshal.loads(raw)
+
+    def create_stats(self):
+        pass
@@ -0,0 +1,96 @@
+# board/purge.py
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import Announcement, Event, Timetable, Result, Department
+
+PROGRESS_KEY = 'board:purge:{}'
+# Rows that point at a department, deleted before the department itself
+PURGE_MODELS = (Announcement, Event, Timetable, Result)
+
+
+def purge_progress(department_id):
+    """{'total', 'deleted', 'state', 'started_at', 'finished_at'} for a purge, or None"""
+    return cache.get(PROGRESS_KEY.format(department_id))
+
+
+def _report(department_id, progress):
+    cache.set(PROGRESS_KEY.format(department_id), progress, 24 * 60 * 60)
+
+
+def _delete_ids(table, ids):
+    placeholders = ', '.join(['%s'] * len(ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {connection.ops.quote_name(table)} WHERE id IN ({placeholders})', ids
+        )
+        return cursor.rowcount
+
+
+def invalidate_after_purge():
+    """Raw deletes send no signals: drop the caches the signal receivers would have"""
+    from . import facets
+    from .autocomplete import courses
+    from .coalescing import invalidate_pages
+    from .departments import departments
+    from .feeds import invalidate_feeds
+    facets.invalidate(Timetable)
+    facets.invalidate(Result)
+    facets.invalidate(Announcement)
+    invalidate_feeds()
+    invalidate_pages()
+    departments.invalidate()
+    courses.invalidate()
+
+
+def purge_department(department_id, batch_size=None, on_progress=None):
+    """
+    Delete a soft-deleted department and everything that points at it.
+
+    Each batch is one short `DELETE ... WHERE id IN (...)` transaction, so
+    nothing is loaded into memory, no per-row signals are sent and no lock
+    is held for long. Safe to re-run after an interruption.
+    """
+    batch_size = batch_size or settings.DEPARTMENT_PURGE_BATCH_SIZE
+    if Department.objects.filter(pk=department_id, is_active=True).exists():
+        raise ValueError(f'Department {department_id} has not been deleted')
+
+    progress = {
+        'total': sum(m.objects.filter(department_id=department_id).count() for m in PURGE_MODELS),
+        'deleted': 0,
+        'state': 'running',
+        'started_at': time.time(),
+        'finished_at': None,
+    }
+    _report(department_id, progress)
+
+    try:
+        for model in PURGE_MODELS:
+            rows = model.objects.filter(department_id=department_id).order_by('id')
+            while True:
+                ids = list(rows.values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                progress['deleted'] += _delete_ids(model._meta.db_table, ids)
+                _report(department_id, progress)
+                if on_progress:
+                    on_progress(progress)
+    except Exception:
+        _report(department_id, {**progress, 'state': 'failed'})
+        raise
+
+    _delete_ids(Department._meta.db_table, [department_id])
+    progress['state'] = 'done'
+    progress['finished_at'] = time.time()
+    _report(department_id, progress)
+    invalidate_after_purge()
+    return progress
+
+
+def start_purge(department_id, user=None):
+    """Queue the purge for the task worker (manage.py run_tasks)"""
+    from .tasks import enqueue
+    return enqueue('purge_department', department_id, user=user, unique=True)
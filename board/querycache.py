@@ -0,0 +1,167 @@
+# board/querycache.py
+import hashlib
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import QuerySet
+
+GENERATION_KEY = 'board:qc:gen:{}'
+RESULT_KEY = 'board:qc:{}'
+STATS_KEY = 'board:qc:stats:{table}:{kind}'
+STATS_TABLES_KEY = 'board:qc:stats:tables'
+STATS_FLUSH_INTERVAL = 10
+
+# Tables a SELECT reads (subqueries included) and the table a write touches
+READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+[`"]?(\w+)[`"]?', re.I)
+WRITE_TABLE = re.compile(r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|REPLACE\s+INTO)\s+[`"]?(\w+)', re.I)
+
+
+def _generations(tables):
+    keys = [GENERATION_KEY.format(t) for t in tables]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Seed from the clock so an evicted counter never reuses old result keys
+            cache.add(key, int(time.time() * 1000), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(table):
+    """Invalidate every cached read that touched `table`"""
+    key = GENERATION_KEY.format(table)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+
+
+def watch_writes(execute, sql, params, many, context):
+    """
+    Connection execute wrapper: bump the generation of any table written to.
+
+    It sees every statement on the connection, so update(), bulk_create(),
+    queryset deletes and raw SQL all invalidate. A write inside a
+    transaction bumps again on commit, so a read that raced the uncommitted
+    write cannot leave old rows cached under the new generation.
+    """
+    result = execute(sql, params, many, context)
+    match = WRITE_TABLE.match(sql)
+    if match:
+        table = match.group(1)
+        bump(table)
+        connection = context['connection']
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: bump(table), using=connection.alias)
+    return result
+
+
+class Stats:
+    """Per-table hit/miss counts, kept per process and added to shared cache counters every few seconds"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+
+    def record(self, table, hit):
+        kind = 'hits' if hit else 'misses'
+        with self._lock:
+            self._pending[(table, kind)] = self._pending.get((table, kind), 0) + 1
+            if time.monotonic() - self._flushed_at < STATS_FLUSH_INTERVAL:
+                return
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        self._flush(pending)
+
+    def _flush(self, pending):
+        tables = set(cache.get(STATS_TABLES_KEY) or ())
+        for (table, kind), count in pending.items():
+            key = STATS_KEY.format(table=table, kind=kind)
+            if not cache.add(key, count, None):
+                try:
+                    cache.incr(key, count)
+                except ValueError:
+                    cache.set(key, count, None)
+            tables.add(table)
+        cache.set(STATS_TABLES_KEY, sorted(tables), None)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        self._flush(pending)
+
+    def report(self):
+        """[(table, hits, misses, hit ratio)] across all processes that have flushed"""
+        rows = []
+        for table in cache.get(STATS_TABLES_KEY) or ():
+            hits = cache.get(STATS_KEY.format(table=table, kind='hits'), 0)
+            misses = cache.get(STATS_KEY.format(table=table, kind='misses'), 0)
+            total = hits + misses
+            rows.append((table, hits, misses, hits / total if total else 0.0))
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._pending = {}
+        for table in cache.get(STATS_TABLES_KEY) or ():
+            cache.delete_many([STATS_KEY.format(table=table, kind=k) for k in ('hits', 'misses')])
+        cache.delete(STATS_TABLES_KEY)
+
+
+stats = Stats()
+
+
+class CachingQuerySet(QuerySet):
+    """
+    QuerySet with an opt-in read cache: `.cached()` marks a queryset whose
+    rows may be served from the shared cache (QUERY_CACHE_ENABLED).
+
+    The key is the compiled SQL and params plus the current generation of
+    every table the SQL reads, so any write to one of those tables makes the
+    entry unreachable. Reads inside a transaction always go to the database,
+    since they may need to see the transaction's own uncommitted writes.
+    """
+
+    _use_query_cache = False
+
+    def cached(self):
+        clone = self._chain()
+        clone._use_query_cache = True
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._use_query_cache = self._use_query_cache
+        return clone
+
+    def _fetch_all(self):
+        if self._result_cache is None and self._use_query_cache and settings.QUERY_CACHE_ENABLED:
+            if not connections[self.db].in_atomic_block:
+                self._result_cache = self._cached_rows()
+        super()._fetch_all()
+
+    def _cached_rows(self):
+        try:
+            sql, params = self.query.get_compiler(self.db).as_sql()
+        except Exception:
+            # EmptyResultSet and friends: let Django handle it the normal way
+            return None
+        tables = sorted(set(READ_TABLES.findall(sql)))
+        signature = '|'.join([
+            self.db, self._iterable_class.__name__, repr(self._fields), sql, repr(params),
+            *map(str, _generations(tables)),
+        ])
+        key = RESULT_KEY.format(hashlib.sha1(signature.encode()).hexdigest())
+        primary = self.model._meta.db_table
+
+        rows = cache.get(key)
+        stats.record(primary, rows is not None)
+        if rows is None:
+            rows = list(self._iterable_class(self))
+            cache.set(key, rows, settings.QUERY_CACHE_TIMEOUT)
+        return rows
@@ -0,0 +1,57 @@
+# board/ranking.py
+from .keyset import KeysetPage, beyond, timestamp
+
+PAGE_SIZE = 10
+SORT_CHOICES = [('', 'Newest first'), ('priority', 'Priority')]
+
+# The rank order within each segment of AnnouncementQuerySet.ranked(), all descending
+RANK_FIELDS = ('priority_weight', 'created_at', 'pk')
+
+
+def _walk(segments, start, key, backwards, limit):
+    """
+    Up to `limit` rows from segment `start` past `key`, carrying on into the
+    following (or, backwards, preceding) segments from their ends
+    """
+    rows = []
+    step = -1 if backwards else 1
+    index = start
+    while 0 <= index < len(segments) and len(rows) < limit:
+        queryset = segments[index]
+        if key is not None and index == start:
+            queryset = queryset.filter(beyond(RANK_FIELDS, key, 'gt' if backwards else 'lt'))
+        if backwards:
+            queryset = queryset.reverse()
+        rows += list(queryset[:limit - len(rows)])
+        index += step
+    return rows
+
+
+class RankedPage(KeysetPage):
+    """
+    One keyset page of announcements in rank order.
+
+    The cursor carries the last row's segment (live or expired) and its
+    sort key within it. A page is a range read on the
+    (is_active, priority_weight, created_at, id) index in one segment, plus a
+    second from the start of the next segment when the first runs out,
+    however deep the reader pages.
+    """
+
+    converters = (int, int, timestamp, int)
+
+    def __init__(self, queryset, params, page_size=PAGE_SIZE, keep=()):
+        self.params = {key: params.get(key, '') for key in keep}
+        self.segments = queryset.ranked()
+        self._paginate(params, page_size)
+
+    def _key(self, announcement):
+        return [
+            announcement.is_live, announcement.priority_weight,
+            announcement.created_at.isoformat(), announcement.pk,
+        ]
+
+    def _rows(self, cursor, backwards, limit):
+        if cursor is None:
+            return _walk(self.segments, 0, None, backwards, limit)
+        return _walk(self.segments, 0 if cursor[0] else 1, cursor[1:], backwards, limit)
@@ -0,0 +1,161 @@
+# board/scheduling.py
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+
+from .models import Timetable
+
+Clash = namedtuple('Clash', ['kind', 'entry', 'others'])
+
+KIND_LABELS = {
+    'venue': 'Venue',
+    'lecturer': 'Lecturer',
+    'cohort': 'Department and level',
+}
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _norm(text):
+    """Case- and whitespace-insensitive form of a venue, lecturer, level or semester"""
+    return ' '.join(str(text).split()).lower()
+
+
+def slot_keys(entry):
+    """Keys under which two entries must not overlap: same room, same lecturer, same class"""
+    base = (_norm(entry.semester), entry.day_of_week)
+    return [
+        ('venue', base + (_norm(entry.venue),)),
+        ('lecturer', base + (_norm(entry.lecturer),)),
+        ('cohort', base + (entry.department_id, _norm(entry.level))),
+    ]
+
+
+class IntervalSet:
+    """
+    Disjoint, sorted blocks of busy time on one key.
+
+    Overlapping entries are merged into one block that remembers its members,
+    so the blocks' starts and ends are both sorted and the blocks touching a
+    new interval are found with two binary searches: a lookup is O(log n + k)
+    for n blocks and k matches. Adding splices the Python lists, which is
+    O(n); n is the number of separate blocks on one room, lecturer or class
+    in a day, so a few dozen at most.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.members = []
+
+    def _span(self, start, end):
+        # Blocks overlap [start, end) iff block.end > start and block.start < end
+        return bisect_right(self.ends, start), bisect_left(self.starts, end)
+
+    def overlapping(self, start, end):
+        i, j = self._span(start, end)
+        return [
+            member for block in self.members[i:j]
+            for member_start, member_end, member in block
+            if member_start < end and member_end > start
+        ]
+
+    def add(self, start, end, member):
+        busy = (start, end, member)
+        i, j = self._span(start, end)
+        if i < j:
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[j - 1])
+            merged = [m for block in self.members[i:j] for m in block]
+        else:
+            merged = []
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+        self.members[i:j] = [merged + [busy]]
+
+
+class ScheduleIndex:
+    """In-memory conflict index over timetable entries (saved or not)"""
+
+    def __init__(self, entries=()):
+        self._sets = defaultdict(IntervalSet)
+        for entry in entries:
+            self.add(entry)
+
+    def conflicts(self, entry):
+        start, end = _minutes(entry.start_time), _minutes(entry.end_time)
+        clashes = []
+        for kind, key in slot_keys(entry):
+            others = [
+                other for other in self._sets[(kind, key)].overlapping(start, end)
+                if other is not entry and (other.pk is None or other.pk != entry.pk)
+            ]
+            if others:
+                clashes.append(Clash(kind, entry, others))
+        return clashes
+
+    def add(self, entry):
+        start, end = _minutes(entry.start_time), _minutes(entry.end_time)
+        for kind, key in slot_keys(entry):
+            self._sets[(kind, key)].add(start, end, entry)
+
+
+def validate_batch(entries):
+    """All clashes within `entries` (e.g. a semester being imported) and against each other"""
+    index = ScheduleIndex()
+    clashes = []
+    for entry in entries:
+        clashes.extend(index.conflicts(entry))
+        index.add(entry)
+    return clashes
+
+
+def find_conflicts(entry):
+    """
+    Saved, active entries that clash with `entry`.
+
+    One query on the (day_of_week, start_time, end_time) index fetches the
+    classes running at that time; the semester, venue, lecturer and cohort
+    are then compared in Python with _norm, exactly as validate_batch does.
+    """
+    if not (entry.start_time and entry.end_time and entry.day_of_week):
+        return []
+    candidates = Timetable.objects.filter(
+        is_active=True,
+        department__is_active=True,
+        day_of_week=entry.day_of_week,
+        start_time__lt=entry.end_time,
+        end_time__gt=entry.start_time,
+    )
+    if entry.pk:
+        candidates = candidates.exclude(pk=entry.pk)
+    return ScheduleIndex(candidates).conflicts(entry)
+
+
+def describe(clash):
+    others = ', '.join(
+        f'{o.course_code} {o.start_time:%H:%M}-{o.end_time:%H:%M}' for o in clash.others
+    )
+    return f'{KIND_LABELS[clash.kind]} already booked on {clash.entry.day_of_week.title()}: {others}'
+
+
+# Optional database-level guard for PostgreSQL (manage.py check_timetable --install-constraint):
+# one exclusion constraint per slot key, comparing text the way _norm does
+_NORM_SQL = "lower(regexp_replace(btrim({}), '\\s+', ' ', 'g'))"
+_SLOT_SQL = "tsrange(DATE '2000-01-01' + start_time, DATE '2000-01-01' + end_time) WITH &&"
+EXCLUSION_CONSTRAINTS = {
+    'board_tt_no_venue_overlap': [_NORM_SQL.format('semester'), 'day_of_week', _NORM_SQL.format('venue')],
+    'board_tt_no_lecturer_overlap': [_NORM_SQL.format('semester'), 'day_of_week', _NORM_SQL.format('lecturer')],
+    'board_tt_no_cohort_overlap': [
+        _NORM_SQL.format('semester'), 'day_of_week', 'department_id', _NORM_SQL.format('level'),
+    ],
+}
+
+
+def exclusion_constraint_sql(name):
+    columns = ''.join(f'{column} WITH =, ' for column in EXCLUSION_CONSTRAINTS[name])
+    return (
+        f'ALTER TABLE board_timetable ADD CONSTRAINT {name} '
+        f'EXCLUDE USING gist ({columns}{_SLOT_SQL}) WHERE (is_active)'
+    )
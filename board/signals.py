@@ -0,0 +1,129 @@
+# board/signals.py
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Announcement, Event, Timetable, Result, Department
+
+BOARD_MODELS = (Announcement, Event, Timetable, Result, Department)
+
+
+def _shown(instance, values):
+    """Whether a row with these column values appears on public pages"""
+    flag = 'is_published' if isinstance(instance, Result) else 'is_active'
+    return values(flag)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def refresh_static_export(sender, instance, signal, created=False, update_fields=None, **kwargs):
+    """
+    Re-render the static snapshots touched by a board change. The row's
+    loaded values say what changed, so saves that change nothing shown
+    (a draft edited, a save with no changes) render nothing.
+    """
+    if sender not in BOARD_MODELS or not settings.STATIC_EXPORT_ON_CHANGE:
+        return
+    deleted = signal is post_delete
+    fields = None
+    if not (created or deleted):
+        fields = instance.changed_fields(update_fields)
+        if not fields:
+            return
+        was_shown = _shown(instance, lambda attname: instance.loaded_value(attname, True))
+        if not was_shown and not _shown(instance, lambda attname: getattr(instance, attname)):
+            return
+    elif not _shown(instance, lambda attname: getattr(instance, attname)):
+        return
+
+    if sender is Department:
+        department_ids = [instance.pk]
+        fields = sorted(fields) if fields is not None else None
+    else:
+        # A row moving department changes the snapshots of both
+        department_ids = [instance.department_id]
+        previous = instance.loaded_value('department_id')
+        if previous is not None and previous not in department_ids:
+            department_ids.append(previous)
+        fields = None
+    # Rendering can take a while: leave it to the task worker
+    from .tasks import enqueue
+    enqueue('export_changed', sender._meta.label, department_ids, fields)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_department_registry(sender, **kwargs):
+    """Make every worker reload the department registry"""
+    from .departments import departments
+    departments.invalidate()
+    transaction.on_commit(departments.invalidate)
+
+
+@receiver(post_save, sender=Timetable)
+@receiver(post_delete, sender=Timetable)
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_facets(sender, **kwargs):
+    """Recount the level/session/year filter options after a write"""
+    from . import facets
+    # Deleting a department hides its levels, sessions and years too
+    models = (Timetable, Result, Announcement) if sender is Department else (sender,)
+
+    def invalidate():
+        for model in models:
+            facets.invalidate(model)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Timetable)
+@receiver(post_delete, sender=Timetable)
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_course_autocomplete(sender, **kwargs):
+    """Rebuild the course/lecturer typeahead index on every worker"""
+    from .autocomplete import courses
+    courses.invalidate()
+    transaction.on_commit(courses.invalidate)
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_announcement_feeds(sender, **kwargs):
+    """Start a new generation of cached RSS/Atom bodies"""
+    from .feeds import invalidate_feeds
+    invalidate_feeds()
+    transaction.on_commit(invalidate_feeds)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_pages(sender, **kwargs):
+    """Stop serving coalesced copies of public pages rendered before a write"""
+    if sender not in BOARD_MODELS:
+        return
+    from .coalescing import invalidate_pages
+    invalidate_pages()
+    transaction.on_commit(invalidate_pages)
+
+
+@receiver(connection_created)
+def watch_query_cache_writes(sender, connection, **kwargs):
+    """Bump query cache generations for every write made on this connection"""
+    if not settings.QUERY_CACHE_ENABLED:
+        return
+    from .querycache import watch_writes
+    if watch_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(watch_writes)
@@ -0,0 +1,421 @@
+# board/static_export.py
+import datetime
+import hashlib
+import inspect
+import json
+import os
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Min
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import Announcement, Event, Timetable, Result, Department
+from .event_windows import WINDOW_CHOICES, EventPage, EventWindow
+from .facets import FACETS, facet_combinations
+
+MANIFEST_NAME = 'manifest.json'
+
+# Public pages and the models whose changes affect them
+ROUTES = {
+    'home': (Announcement, Event, Department),
+    'announcements': (Announcement, Department),
+    'events': (Event, Department),
+    'timetable': (Timetable, Department),
+    'results': (Result, Department),
+}
+# Pages whose content depends on today's date (event status, upcoming/today windows)
+DATED_ROUTES = ('home', 'events')
+# Keyset cursors are case-sensitive url-safe base64: kept verbatim in paths
+CURSOR_PARAMS = ('after', 'before')
+
+# What each page's index.json holds: name -> context variable of the view
+JSON_CONTEXT = {
+    'home': {'announcements': 'announcements', 'upcoming_events': 'upcoming_events'},
+    'announcements': {'announcements': 'page_obj'},
+    'events': {'events': 'events'},
+    'timetable': {'timetable': 'timetable_by_day'},
+    'results': {'results': 'results'},
+}
+PRIVATE_FIELDS = ('created_by', 'version')
+# Department fields public pages show, and the routes showing them
+DEPARTMENT_FIELDS = {
+    'name': tuple(ROUTES),
+    'code': tuple(ROUTES),
+    'is_active': tuple(ROUTES),
+    'description': ('home',),
+}
+
+
+class Page:
+    """
+    A public page plus one combination of its GET filters.
+
+    Its snapshot lives at <route>/<key>-<value>/.../index.html (and
+    index.json) with the keys in sorted order, the home page at the root:
+    /announcements/?page=2&department=1 is
+    announcements/department-1/page-2/index.html. snapshot_path() does this
+    for any URL, and manifest.json lists every exported URL with its files.
+    """
+
+    def __init__(self, route, params=None):
+        self.route = route
+        self.params = {k: str(v) for k, v in (params or {}).items() if v not in (None, '')}
+
+    @classmethod
+    def from_url(cls, url):
+        """The page a public URL shows, or None for a URL that is not exported"""
+        parts = urlsplit(url)
+        try:
+            route = resolve(parts.path).url_name
+        except Exception:
+            return None
+        if route not in ROUTES:
+            return None
+        return cls(route, dict(parse_qsl(parts.query)))
+
+    @property
+    def url(self):
+        url = reverse(self.route)
+        if self.params:
+            url += '?' + urlencode(sorted(self.params.items()))
+        return url
+
+    @property
+    def path(self):
+        """Location of the snapshot relative to the export root"""
+        parts = [self.route] if self.route != 'home' else []
+        for key, value in sorted(self.params.items()):
+            parts.append(f'{key}-{value if key in CURSOR_PARAMS else slugify(value)}')
+        return os.path.join(*parts, 'index.html') if parts else 'index.html'
+
+    @property
+    def json_path(self):
+        return self.path[:-len('.html')] + '.json'
+
+    def department_id(self):
+        return self.params.get('department')
+
+    def __eq__(self, other):
+        return isinstance(other, Page) and self.url == other.url
+
+    def __hash__(self):
+        return hash(self.url)
+
+    def __repr__(self):
+        return f'<Page {self.url}>'
+
+
+def snapshot_path(url):
+    """Export-relative file holding the snapshot of `url`, or None (e.g. a search)"""
+    page = Page.from_url(url)
+    return page.path if page is not None else None
+
+
+def iter_pages(routes=None):
+    """Yield every public page and filter combination worth exporting"""
+    routes = routes or list(ROUTES)
+    department_ids = list(Department.objects.filter(is_active=True).values_list('id', flat=True))
+
+    if 'home' in routes:
+        yield Page('home')
+        for dept_id in department_ids:
+            yield Page('home', {'department': dept_id})
+
+    if 'events' in routes:
+        yield from _event_pages(department_ids)
+
+    if 'announcements' in routes:
+        yield from _announcement_pages(department_ids)
+
+    if 'timetable' in routes:
+        yield from _combinations('timetable', department_ids, 'level', facet_combinations('levels'))
+
+    if 'results' in routes:
+        yield from _combinations('results', department_ids, 'session', facet_combinations('sessions'))
+
+
+def _announcement_pages(department_ids, per_page=10):
+    """Every numbered page, for all departments or one, all years or one"""
+    announcements = Announcement.objects.filter(is_active=True, department__is_active=True)
+    counts = {}
+    for dept_id, year, n in (
+        announcements.values_list('department_id', FACETS['years'][2]).annotate(n=Count('id')).order_by()
+    ):
+        counts[dept_id, year] = n
+    years = sorted({year for _, year in counts}, reverse=True)
+    for dept_id in [None] + department_ids:
+        for year in [None] + years:
+            total = sum(
+                n for (d, y), n in counts.items()
+                if dept_id in (None, d) and year in (None, y)
+            )
+            if year is not None and not total:
+                continue
+            num_pages = max(1, -(-total // per_page))
+            for page in range(1, num_pages + 1):
+                yield Page('announcements', {
+                    'department': dept_id,
+                    'year': year,
+                    'page': page if page > 1 else None,
+                })
+
+
+def _event_pages(department_ids):
+    """
+    Every window the events page links to (each tab, and each month from the
+    first event's to the last's), followed through its keyset pages in both
+    directions, so every Next/Previous link of an exported page is exported
+    """
+    today = timezone.localdate()
+    events = Event.objects.filter(is_active=True, department__is_active=True)
+    windows = [{}] + [{'window': name} for name, _ in WINDOW_CHOICES]
+    windows += [{'window': 'month', 'month': month} for month in _event_months(events, today)]
+    for dept_id in [None] + department_ids:
+        scoped = events.filter(department_id=dept_id) if dept_id else events
+        for window in windows:
+            yield from _walk_events(scoped, {**window, 'department': dept_id}, today)
+
+
+def _event_months(events, today):
+    """'YYYY-MM' for every month from the earliest event (or this month) to the latest"""
+    bounds = events.aggregate(first=Min('start_date'), last=Max('start_date'))
+    this_month = today.replace(day=1)
+    first = min(timezone.localdate(bounds['first']).replace(day=1), this_month) if bounds['first'] else this_month
+    last = max(timezone.localdate(bounds['last']).replace(day=1), this_month) if bounds['last'] else this_month
+    months = []
+    while first <= last:
+        months.append(first.strftime('%Y-%m'))
+        first = (first + datetime.timedelta(days=32)).replace(day=1)
+    return months
+
+
+def _walk_events(events, params, today):
+    params = {k: str(v) for k, v in params.items() if v not in (None, '')}
+    window = EventWindow(params, today=today)
+    keep = ('window', 'month', 'department')
+    queryset = window.apply(events)
+    yield Page('events', params)
+    page = EventPage(queryset, params, window.descending, keep=keep)
+    while page.next_url:
+        following = dict(parse_qsl(page.next_url[1:]))
+        page = EventPage(queryset, following, window.descending, keep=keep)
+        yield Page('events', following)
+        # Its Previous link: the page before, reached by cursor from the other side
+        yield Page('events', dict(parse_qsl(page.previous_url[1:])))
+
+
+def _combinations(route, department_ids, key, combos):
+    combos = set(combos)
+    values = sorted({value for _, value in combos})
+    yield Page(route)
+    for value in values:
+        yield Page(route, {key: value})
+    for dept_id in department_ids:
+        yield Page(route, {'department': dept_id})
+        for value in values:
+            if (dept_id, value) in combos:
+                yield Page(route, {'department': dept_id, key: value})
+
+
+def pages_for_change(model, department_ids=None, fields=None):
+    """
+    Pages whose content depends on a row of `model` in any of `department_ids`
+    (all departments if None). For a department, `fields` names what changed
+    (None: the department was added or removed): its name and code are in
+    every page's department filter, its description only on the home page.
+    """
+    if model is Department:
+        routes = set(ROUTES)
+        if fields is not None:
+            routes = set().union(*(DEPARTMENT_FIELDS.get(field, ()) for field in fields))
+        return list(iter_pages([route for route in ROUTES if route in routes])) if routes else []
+    routes = [route for route, models in ROUTES.items() if model in models]
+    if not department_ids or None in department_ids:
+        return list(iter_pages(routes))
+    department_ids = {str(department_id) for department_id in department_ids}
+    return [
+        page for page in iter_pages(routes)
+        if page.department_id() is None or page.department_id() in department_ids
+    ]
+
+
+def _row(obj):
+    row = {'id': obj.pk}
+    for field in obj._meta.concrete_fields:
+        if not field.primary_key and field.name not in PRIVATE_FIELDS:
+            row[field.name] = field.value_from_object(obj)
+    if hasattr(obj, 'status'):
+        row['status'] = obj.status
+    return row
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    return [_row(obj) for obj in getattr(value, 'object_list', value)]
+
+
+def render_page(page):
+    """
+    Render a page through its view exactly as an anonymous visitor sees it.
+    Returns the HTML and the JSON of the rows it lists (see JSON_CONTEXT).
+    """
+    request = RequestFactory().get(page.url)
+    request.user = AnonymousUser()
+    match = resolve(request.path_info)
+    request.resolver_match = match
+    # The bare view: a snapshot never comes from the page cache or the search throttle
+    view = inspect.unwrap(match.func)
+    response = view(request, *match.args, **match.kwargs)
+    response.render()
+    context = response.context_data
+    data = {name: _jsonable(context[variable]) for name, variable in JSON_CONTEXT[page.route].items()}
+    data['url'] = page.url
+    return response.content, json.dumps(data, cls=DjangoJSONEncoder, indent=2, sort_keys=True).encode()
+
+
+def next_midnight():
+    """The coming local midnight, in UTC (manifest times compare as strings)"""
+    tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+    midnight = timezone.make_aware(datetime.datetime.combine(tomorrow, datetime.time.min))
+    return midnight.astimezone(datetime.timezone.utc)
+
+
+def _write(target, content):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + '.tmp'
+    with open(tmp, 'wb') as fh:
+        fh.write(content)
+    os.replace(tmp, target)
+
+
+class StaticExporter:
+    """Writes page snapshots under `root` and keeps a manifest of their hashes"""
+
+    def __init__(self, root=None):
+        self.root = str(root or settings.STATIC_EXPORT_ROOT)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.root, MANIFEST_NAME)) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {'pages': {}}
+
+    def _save_manifest(self):
+        self.manifest['generated_at'] = timezone.now().isoformat()
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, MANIFEST_NAME + '.tmp')
+        with open(tmp, 'w') as fh:
+            json.dump(self.manifest, fh, indent=2, sort_keys=True)
+        os.replace(tmp, os.path.join(self.root, MANIFEST_NAME))
+
+    def _remove(self, path):
+        """Delete a snapshot file and the directories it leaves empty, up to the root"""
+        try:
+            os.remove(os.path.join(self.root, path))
+        except OSError:
+            return
+        directory = os.path.dirname(path)
+        while directory:
+            try:
+                os.rmdir(os.path.join(self.root, directory))
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+    def has_expired(self, now=None):
+        """Whether a date-dependent page was rendered before the most recent local midnight"""
+        now = (now or timezone.now()).astimezone(datetime.timezone.utc).isoformat()
+        return any(
+            entry.get('expires_at') and entry['expires_at'] <= now
+            for entry in self.manifest['pages'].values()
+        )
+
+    def export(self, pages, prune=False, drop_departments=()):
+        """
+        Render `pages`, writing only snapshots whose content changed.
+
+        `pages` must hold every page of each (route, department) it touches,
+        as iter_pages() and pages_for_change() produce: snapshots of other
+        URLs in those scopes (a page number or cursor that no longer exists)
+        are removed, as are all snapshots filtered by a department in
+        `drop_departments`. With `prune`, `pages` is the whole site and every
+        other snapshot goes.
+        """
+        pages = list(pages)
+        written, unchanged = [], []
+        seen = set()
+        for page in pages:
+            if page.url in seen:
+                continue
+            seen.add(page.url)
+            content, data = render_page(page)
+            digest = hashlib.sha256(content + data).hexdigest()
+            entry = self.manifest['pages'].get(page.url)
+            target = os.path.join(self.root, page.path)
+            json_target = os.path.join(self.root, page.json_path)
+            expires_at = next_midnight().isoformat() if page.route in DATED_ROUTES else None
+            if (entry and entry['sha256'] == digest
+                    and os.path.exists(target) and os.path.exists(json_target)):
+                entry['expires_at'] = expires_at
+                unchanged.append(page)
+                continue
+            _write(target, content)
+            _write(json_target, data)
+            self.manifest['pages'][page.url] = {
+                'route': page.route,
+                'params': page.params,
+                'path': page.path,
+                'json': page.json_path,
+                'sha256': digest,
+                'rendered_at': timezone.now().isoformat(),
+                'expires_at': expires_at,
+            }
+            written.append(page)
+
+        scopes = {(page.route, page.department_id()) for page in pages}
+        dropped = {str(department_id) for department_id in drop_departments}
+        removed = []
+        for url in set(self.manifest['pages']) - seen:
+            entry = self.manifest['pages'][url]
+            scope = (entry.get('route'), entry.get('params', {}).get('department'))
+            if prune or scope in scopes or scope[1] in dropped:
+                del self.manifest['pages'][url]
+                for path in (entry['path'], entry.get('json')):
+                    if path:
+                        self._remove(path)
+                removed.append(url)
+
+        self._save_manifest()
+        return written, unchanged, removed
+
+
+def export_changed(model, department_ids=None, fields=None):
+    """
+    Re-render the snapshots affected by a change to `model` in
+    `department_ids` (an announcement that moved passes both departments),
+    and the date-dependent pages if a day has passed since they were
+    rendered. The snapshots of a department that was deleted go.
+    """
+    exporter = StaticExporter()
+    pages = pages_for_change(model, department_ids, fields)
+    if exporter.has_expired():
+        pages += iter_pages(DATED_ROUTES)
+    dropped = ()
+    if model is Department and department_ids:
+        live = set(Department.objects.filter(pk__in=department_ids, is_active=True).values_list('pk', flat=True))
+        dropped = [department_id for department_id in department_ids if department_id not in live]
+    return exporter.export(pages, drop_departments=dropped)
+
+
+def export_expired():
+    """Re-render the date-dependent pages (event status, today/upcoming windows)"""
+    return StaticExporter().export(iter_pages(DATED_ROUTES))
@@ -0,0 +1,178 @@
+# board/tasks.py
+import datetime
+import os
+import socket
+import traceback
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+# name -> function(task, *args)
+REGISTRY = {}
+
+
+def task(name):
+    """Register a function as background work; it is called as fn(task, *args)"""
+    def register(fn):
+        REGISTRY[name] = fn
+        return fn
+    return register
+
+
+def enqueue(name, *args, user=None, delay=0, max_attempts=None, unique=False):
+    """
+    Queue `name` to run in a worker. Inside a transaction the row only
+    becomes visible to workers when (and if) the transaction commits.
+    With `unique`, a task with the same name and args that is still queued
+    is returned instead of queueing another.
+    """
+    if name not in REGISTRY:
+        raise KeyError(f'Unknown task {name}')
+    if unique:
+        pending = Task.objects.filter(name=name, args=list(args), status='queued').order_by('id').first()
+        if pending is not None:
+            return pending
+    queued = Task.objects.create(
+        name=name,
+        args=list(args),
+        created_by=user if user is not None and user.is_authenticated else None,
+        run_after=timezone.now() + datetime.timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.TASK_MAX_ATTEMPTS,
+    )
+    if settings.TASKS_EAGER and not delay:
+        # No worker (local development): run it here once the row is committed
+        transaction.on_commit(lambda: _run_eagerly(queued.pk))
+    return queued
+
+
+def report(task, done, total=None, message=None):
+    """Record progress on a running task (a single-row UPDATE)"""
+    task.progress_done = done
+    changes = {'progress_done': done}
+    if total is not None:
+        task.progress_total = changes['progress_total'] = total
+    if message is not None:
+        task.message = changes['message'] = message[:200]
+    Task.objects.filter(pk=task.pk).update(**changes)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def requeue_stale():
+    """
+    Deal with tasks whose worker died mid-run (running for longer than
+    TASK_TIMEOUT). The lost run counts as an attempt (claiming counted it):
+    tasks with attempts left are queued again, the rest are failed, so a
+    task that keeps killing its worker stops being retried.
+    Returns (requeued, failed).
+    """
+    now = timezone.now()
+    stale = Task.objects.filter(status='running', started_at__lt=now - datetime.timedelta(seconds=settings.TASK_TIMEOUT))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', worker='', finished_at=now,
+        error=f'Worker stopped responding (no result after {settings.TASK_TIMEOUT}s)',
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(status='queued', worker='')
+    return requeued, failed
+
+
+def claim(worker):
+    """
+    Take the next due task, or return None.
+
+    On PostgreSQL the candidate is locked with SELECT ... FOR UPDATE SKIP
+    LOCKED, so concurrent workers never wait on each other. SQLite has no
+    row locks (it serialises writers), so there the conditional UPDATE below
+    is what decides which worker wins; it is harmless on PostgreSQL.
+    """
+    with transaction.atomic():
+        candidates = Task.objects.filter(status='queued', run_after__lte=timezone.now()).order_by('run_after', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        task = candidates.first()
+        if task is None or not _take(task, worker):
+            return None
+    return task
+
+
+def _take(task, worker):
+    claimed = Task.objects.filter(pk=task.pk, status='queued').update(
+        status='running', worker=worker, started_at=timezone.now(), attempts=task.attempts + 1,
+    )
+    if claimed:
+        task.refresh_from_db()
+    return bool(claimed)
+
+
+def _run_eagerly(pk):
+    task = Task.objects.filter(pk=pk, status='queued').first()
+    if task is not None and _take(task, f'eager:{worker_name()}'):
+        run(task)
+
+
+def run(task):
+    """Run a claimed task, then mark it done, or queue a retry with backoff, or fail it"""
+    fn = REGISTRY.get(task.name)
+    try:
+        if fn is None:
+            raise KeyError(f'Unknown task {task.name}')
+        fn(task, *task.args)
+    except Exception:
+        task.error = traceback.format_exc()[-5000:]
+        task.finished_at = timezone.now()
+        if fn is not None and task.attempts < task.max_attempts:
+            delay = settings.TASK_RETRY_DELAY * 2 ** (task.attempts - 1)
+            task.status = 'queued'
+            task.run_after = timezone.now() + datetime.timedelta(seconds=delay)
+        else:
+            task.status = 'failed'
+        task.save(update_fields=['status', 'error', 'run_after', 'finished_at'])
+        return False
+    task.status = 'done'
+    task.finished_at = timezone.now()
+    if task.progress_total:
+        task.progress_done = task.progress_total
+    task.save(update_fields=['status', 'finished_at', 'progress_done'])
+    return True
+
+
+# Built-in tasks
+
+@task('purge_department')
+def purge_department_task(task, department_id):
+    from .purge import purge_department
+    report(task, 0, message='Removing related rows')
+    purge_department(
+        department_id,
+        on_progress=lambda progress: report(task, progress['deleted'], progress['total']),
+    )
+
+
+def _schedule_export_expired():
+    """Queue one re-render of the date-dependent snapshots for just after local midnight"""
+    from .static_export import next_midnight
+    delay = (next_midnight() - timezone.now()).total_seconds() + 60
+    enqueue('export_expired', delay=delay, unique=True)
+
+
+@task('export_changed')
+def export_changed_task(task, model_label, department_ids, fields=None):
+    from .static_export import export_changed
+    written, unchanged, removed = export_changed(apps.get_model(model_label), department_ids, fields)
+    report(task, len(written), len(written) + len(unchanged), f'{len(written)} pages rewritten')
+    _schedule_export_expired()
+
+
+@task('export_expired')
+def export_expired_task(task):
+    from .static_export import export_expired
+    written, unchanged, removed = export_expired()
+    report(task, len(written), len(written) + len(unchanged), f'{len(written)} pages rewritten')
+    _schedule_export_expired()
@@ -1,3 +1,1385 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import http.server
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django import forms
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.template import engines
+from django.template.response import TemplateResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import coalescing, profiling, purge, throttling
+from .autocomplete import CourseIndex
+from .management.commands.benchmark_requests import PUBLIC_PAGES, SESSION_TABLES, StaleCookieClient
+from .departments import departments
+from .documents import Document, DocumentStore, DocumentUnavailable, parse_range
+from .event_windows import EventWindow
+from .exports import stream_csv, stream_json
+from .keyset import beyond, decode_cursor, encode_cursor, timestamp
+from .facets import facet_combinations, facet_counts, facet_values
+from .feeds import CHANGED_KEY
+from .ical import escape, fold
+from .forms import DepartmentChoiceField, DepartmentForm
+from .models import Announcement, Department, Event, Result, Task, Timetable
+from .querycache import READ_TABLES, WRITE_TABLE, watch_writes
+from .purge import purge_department, purge_progress
+from .ranking import RankedPage
+from .scheduling import EXCLUSION_CONSTRAINTS, IntervalSet, exclusion_constraint_sql, find_conflicts, validate_batch
+from .static_export import Page, StaticExporter, export_changed, iter_pages, pages_for_change, snapshot_path
+from .tasks import REGISTRY, claim, enqueue, requeue_stale, run
+from .throttling import take_token, throttled_search
+
+
+class BoardTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        cls.department = Department.objects.create(name='Computer Science', code='CSC')
+
+    def setUp(self):
+        cache.clear()
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+class PublicSessionTests(BoardTestCase):
+
+    def _session_queries(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return [q['sql'] for q in queries.captured_queries if any(t in q['sql'] for t in SESSION_TABLES)]
+
+    def test_public_pages_never_read_sessions_or_users(self):
+        signed_in = self.client_class()
+        signed_in.force_login(self.staff)
+        for client in (self.client_class(), StaleCookieClient(), signed_in):
+            for name in PUBLIC_PAGES:
+                self.assertEqual(self._session_queries(client, reverse(name)), [], (name, client))
+
+    def test_admin_pages_still_authenticate(self):
+        self.assertRedirects(self.client.get('/admin/'), '/admin/login/?next=/admin/', fetch_redirect_response=False)
+        self.client.force_login(self.staff)
+        self.assertTrue(self._session_queries(self.client, '/admin/'))
+
+
+class EventWindowTests(BoardTestCase):
+
+    def test_out_of_range_dates_fall_back_to_the_default_window(self):
+        for params in (
+            {'window': 'month', 'month': '9999-12'},
+            {'window': 'month', 'month': '0001-01'},
+            {'to': '9999-12-31'},
+            {'from': '0001-01-01'},
+            {'from': '2026-02-30'},
+        ):
+            window = EventWindow(params, today=datetime.date(2026, 10, 19))
+            self.assertIn(window.name, ('upcoming', 'month'), params)
+            self.assertIsNone(window.date_from)
+            self.assertIsNone(window.date_to)
+            window.previous_month, window.next_month
+
+    def test_extreme_inputs_do_not_break_the_page(self):
+        for query in (
+            'window=month&month=9999-12', 'window=month&month=9998-12', 'to=9999-12-31',
+            'to=9998-12-31', 'from=0001-01-01', 'from=0002-01-01', 'after=garbage', 'before=e30',
+        ):
+            response = self.client.get(f'/events/?{query}')
+            self.assertEqual(response.status_code, 200, query)
+
+    def test_month_and_range_parsing(self):
+        window = EventWindow({'window': 'month', 'month': '2026-12'})
+        self.assertEqual(window.month, datetime.date(2026, 12, 1))
+        self.assertEqual((window.previous_month, window.next_month), ('2026-11', '2027-01'))
+        window = EventWindow({'from': '2026-01-01', 'to': '2026-01-31'})
+        self.assertEqual(window.name, 'range')
+
+    def test_past_window_pages_by_keyset_newest_first(self):
+        now = timezone.now()
+        for days in range(1, 46):
+            Event.objects.create(
+                title=f'Past {days}', description='d', department=self.department, venue='Hall',
+                start_date=now - datetime.timedelta(days=days + 1),
+                end_date=now - datetime.timedelta(days=days + 1, hours=-1),
+                created_by=self.staff,
+            )
+        seen = []
+        url = '/events/?window=past'
+        while url:
+            response = self.client.get(url if url.startswith('/') else '/events/' + url)
+            page = response.context['page_obj']
+            seen += [event.title for event in page.object_list]
+            url = page.next_url
+        self.assertEqual(seen, [f'Past {days}' for days in range(1, 46)])
+
+        back = self.client.get('/events/' + page.previous_url).context['page_obj']
+        self.assertEqual([e.title for e in back.object_list], [f'Past {d}' for d in range(21, 41)])
+        self.assertTrue(back.has_next)
+
+
+@override_settings(SEARCH_RATE=0.5, SEARCH_BURST=2)
+class SearchThrottleTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        throttling._search_slots = None
+        Announcement.objects.create(
+            title='Exam timetable out', content='See the board', department=self.department, created_by=self.staff,
+        )
+
+    def test_over_the_rate_serves_the_unfiltered_page_with_retry_after(self):
+        statuses = [self.client.get('/announcements/?search=exam').status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        response = self.client.get('/announcements/?search=exam')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertContains(response, 'Search is busy', status_code=429)
+        self.assertContains(self.client.get('/announcements/'), 'Exam timetable out')
+        self.assertNotContains(self.client.get('/announcements/'), 'Search is busy')
+        # Other clients and pages have their own buckets
+        self.assertEqual(self.client.get('/announcements/?search=exam', REMOTE_ADDR='10.0.0.2').status_code, 200)
+        self.assertEqual(self.client.get('/events/?search=exam').status_code, 200)
+
+    @override_settings(PAGE_COALESCING=True)
+    def test_fallback_and_cached_searches_come_from_the_page_cache(self):
+        self.client.get('/announcements/')
+        self.client.get('/announcements/?search=exam')
+        for _ in range(3):
+            self.client.get('/announcements/?search=other')
+        with CaptureQueriesContext(connection) as queries:
+            throttled = self.client.get('/announcements/?search=third')
+            cached_search = self.client.get('/announcements/?search=exam')
+        self.assertEqual(throttled.status_code, 429)
+        self.assertEqual(throttled['X-Page-Cache'], 'hit')
+        self.assertContains(throttled, 'Search is busy', status_code=429)
+        self.assertEqual(cached_search.status_code, 200)
+        self.assertEqual(len(queries.captured_queries), 0)
+        # The notice never leaks into the cached copy
+        self.assertNotContains(self.client.get('/announcements/'), 'Search is busy')
+
+    def test_buckets_fall_back_to_process_memory_when_the_cache_is_down(self):
+        with mock.patch.object(throttling.cache, 'get', side_effect=ConnectionRefusedError):
+            self.assertEqual([take_token('board:test', 1, 2)[0] for _ in range(3)], [True, True, False])
+        with mock.patch.object(throttling.cache, 'get', side_effect=KeyError):
+            with self.assertRaises(KeyError):
+                take_token('board:test', 1, 2)
+
+    @override_settings(SEARCH_MAX_CONCURRENT=1, SEARCH_QUEUE_WAIT=0.1, SEARCH_BURST=100)
+    def test_no_free_slot_answers_503(self):
+        release = threading.Event()
+
+        @throttled_search('search')
+        def slow(request):
+            if 'search' in request.GET:
+                release.wait(5)
+            return HttpResponse('ok')
+
+        factory = RequestFactory()
+        first = []
+        worker = threading.Thread(target=lambda: first.append(slow(factory.get('/x', {'search': 'a'})).status_code))
+        worker.start()
+        time.sleep(0.05)
+        busy = slow(factory.get('/x', {'search': 'b'}))
+        release.set()
+        worker.join()
+        self.assertEqual((busy.status_code, busy['Retry-After']), (503, '1'))
+        self.assertEqual(first, [200])
+        self.assertEqual(slow(factory.get('/x', {'search': 'c'})).status_code, 200)
+
+    @override_settings(SEARCH_MAX_CONCURRENT=1, SEARCH_QUEUE_WAIT=0.1, SEARCH_BURST=100)
+    def test_lazy_template_queries_run_inside_the_slot(self):
+        template = engines['django'].from_string('{% for a in rows %}{{ a.title }}{% endfor %}')
+
+        @throttled_search('search')
+        def search(request):
+            rows = Announcement.objects.filter(title__icontains=request.GET['search'])
+            return TemplateResponse(request, template, {'rows': rows})
+
+        slot_free = []
+
+        def record(execute, sql, params, many, context):
+            free = throttling._slots().acquire(blocking=False)
+            if free:
+                throttling._slots().release()
+            slot_free.append(free)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = search(RequestFactory().get('/x', {'search': 'exam'})).render()
+        self.assertEqual(response.content, b'Exam timetable out')
+        self.assertEqual(slot_free, [False])
+
+    @override_settings(SEARCH_RATE=0)
+    def test_zero_rate_turns_the_limit_off(self):
+        self.assertEqual(take_token('board:test', 0, 2), (True, 0))
+        statuses = {self.client.get('/announcements/?search=exam').status_code for _ in range(5)}
+        self.assertEqual(statuses, {200})
+
+
+class KeysetTests(BoardTestCase):
+
+    def test_cursor_values_are_converted_or_rejected(self):
+        when = timezone.now().replace(microsecond=0)
+        token = encode_cursor([when.isoformat(), 7])
+        self.assertNotIn('=', token)
+        self.assertEqual(decode_cursor(token, (timestamp, int)), (when, 7))
+        self.assertIsNone(decode_cursor(token, (timestamp,)))
+        self.assertIsNone(decode_cursor(encode_cursor(['tomorrow', 7]), (timestamp, int)))
+        self.assertIsNone(decode_cursor(encode_cursor({'a': 1}), (int,)))
+
+    def test_beyond_matches_tuple_comparison(self):
+        start = timezone.now().replace(microsecond=0)
+        for n in range(12):
+            Event.objects.create(
+                title=f'E{n}', description='d', department=self.department, venue='Hall',
+                start_date=start + datetime.timedelta(hours=n % 4), end_date=start + datetime.timedelta(hours=5),
+                created_by=self.staff,
+            )
+        rows = [(e.start_date, e.pk) for e in Event.objects.all()]
+        for key in rows:
+            for op, compare in (('gt', lambda row: row > key), ('lt', lambda row: row < key)):
+                found = Event.objects.filter(beyond(('start_date', 'id'), key, op)).values_list('start_date', 'id')
+                self.assertEqual(sorted(found), sorted(filter(compare, rows)), (key, op))
+
+
+class RankedPageTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.expected = []
+        for live in (True, False):
+            for priority in ('urgent', 'high', 'low'):
+                for n in range(3):
+                    announcement = Announcement.objects.create(
+                        title=f'{"live" if live else "expired"} {priority} {n}', content='c',
+                        department=self.department, priority=priority, created_by=self.staff,
+                        expires_at=None if live else now - datetime.timedelta(days=1),
+                    )
+                    self.expected.append(announcement)
+        # Within a segment: weight, then newest first
+        self.expected = sorted(
+            self.expected,
+            key=lambda a: (a.expires_at is None, a.priority_weight, a.created_at, a.pk), reverse=True,
+        )
+
+    def _pages(self, params, page_size):
+        queryset = Announcement.objects.filter(is_active=True)
+        page = RankedPage(queryset, params, page_size=page_size)
+        return page, [a.title for a in page.object_list]
+
+    def test_cursor_round_trip(self):
+        announcement = Announcement.objects.ranked()[0].first()
+        page = RankedPage(Announcement.objects.all(), {})
+        cursor = decode_cursor(encode_cursor(page._key(announcement)), page.converters)
+        self.assertEqual(cursor, (1, announcement.priority_weight, announcement.created_at, announcement.pk))
+        for garbage in ('', 'x', 'W10', 'WyJhIl0', '!!!', encode_cursor([1, 2, 'not a date', 3])):
+            self.assertIsNone(decode_cursor(garbage, page.converters))
+
+    def test_pages_cross_from_live_to_expired_and_back(self):
+        titles, params, pages = [], {}, []
+        while True:
+            page, page_titles = self._pages(params, 4)
+            pages.append(page_titles)
+            titles += page_titles
+            if not page.next_url:
+                break
+            params = {'after': page.next_url.split('after=')[1]}
+        self.assertEqual(titles, [a.title for a in self.expected])
+
+        back, back_titles = self._pages({'before': page.previous_url.split('before=')[1]}, 4)
+        self.assertEqual(back_titles, pages[-2])
+        self.assertTrue(back.has_next)
+
+    def test_each_segment_orders_by_indexed_columns_only(self):
+        for segment in Announcement.objects.filter(is_active=True).ranked():
+            sql = str(segment.query)
+            order_by = sql[sql.index('ORDER BY'):]
+            self.assertNotIn('CASE', sql)
+            self.assertEqual(
+                order_by,
+                'ORDER BY "board_announcement"."priority_weight" DESC, '
+                '"board_announcement"."created_at" DESC, "board_announcement"."id" DESC',
+            )
+
+
+class DepartmentChoiceFieldTests(BoardTestCase):
+
+    def test_department_missing_from_the_registry_is_checked_in_the_database(self):
+        departments.all()
+        # As if added on another worker: this process's registry is not told
+        with mock.patch.object(departments, 'invalidate'):
+            added = Department.objects.create(name='Mathematics', code='MTH')
+            retired = Department.objects.create(name='Old', code='OLD', is_active=False)
+        self.assertIsNone(departments.get(added.pk))
+
+        field = DepartmentChoiceField(queryset=Department.objects.all())
+        self.assertEqual(field.clean(str(self.department.pk)), self.department)
+        with self.assertNumQueries(1):
+            self.assertEqual(field.clean(str(added.pk)), added)
+        for value in (str(retired.pk), '999999', 'abc'):
+            with self.assertRaises(forms.ValidationError):
+                field.clean(value)
+
+
+class DepartmentCodeTests(BoardTestCase):
+
+    def test_deleted_department_frees_its_code(self):
+        form = DepartmentForm({'name': 'Computing', 'code': 'CSC'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('already exists', str(form.errors))
+
+        self.department.soft_delete()
+        form = DepartmentForm({'name': 'Computing', 'code': 'CSC'})
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertEqual(Department.objects.filter(code='CSC').count(), 2)
+
+
+class ExportTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='staff', password='pw')
+        for n, priority in enumerate(['high', 'low', 'high']):
+            Announcement.objects.create(
+                title=f'Notice {n}', content='Line one,\n"quoted" line two', priority=priority,
+                department=self.department, created_by=self.staff,
+            )
+
+    def _download(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        return b''.join(response.streaming_content).decode()
+
+    def test_json_is_one_array_with_filters_applied(self):
+        rows = json.loads(self._download('/admin/export/announcements.json'))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['department'], 'CSC')
+        self.assertEqual(rows[0]['content'], 'Line one,\n"quoted" line two')
+
+        rows = json.loads(self._download('/admin/export/announcements.json?priority=high&q=notice'))
+        self.assertEqual(sorted(r['title'] for r in rows), ['Notice 0', 'Notice 2'])
+        self.assertEqual(json.loads(self._download('/admin/export/announcements.json?q=nothing')), [])
+
+    def test_csv_rows_survive_commas_quotes_and_newlines(self):
+        rows = list(csv.reader(io.StringIO(self._download('/admin/export/announcements.csv?priority=low'))))
+        self.assertEqual(rows[0][:3], ['id', 'title', 'content'])
+        self.assertEqual([(r[1], r[2]) for r in rows[1:]], [('Notice 1', 'Line one,\n"quoted" line two')])
+
+    def test_streams_stay_valid_across_batches(self):
+        for count in (0, 1, 2, 5):
+            rows = [(n, f'row {n}') for n in range(count)]
+            chunks = list(stream_json(['id', 'name'], iter(rows), batch=2))
+            self.assertEqual(json.loads(''.join(chunks)), [{'id': n, 'name': name} for n, name in rows])
+            lines = ''.join(stream_csv(['id', 'name'], iter(rows), batch=2)).splitlines()
+            self.assertEqual(len(lines), count + 1)
+
+    def test_export_board_writes_gzip_files(self):
+        output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output)
+        call_command(
+            'export_board', output=output, model=['announcements', 'departments'], format='json',
+            filter=['priority=high'], stdout=io.StringIO(),
+        )
+        files = sorted(os.listdir(output))
+        self.assertEqual([f.split('-')[0] for f in files], ['announcements', 'departments'])
+        self.assertTrue(all(f.endswith('.json.gz') for f in files))
+        with gzip.open(os.path.join(output, files[0]), 'rt', encoding='utf-8') as fh:
+            self.assertEqual(sorted(r['title'] for r in json.load(fh)), ['Notice 0', 'Notice 2'])
+        with gzip.open(os.path.join(output, files[1]), 'rt', encoding='utf-8') as fh:
+            self.assertEqual([r['code'] for r in json.load(fh)], ['CSC'])
+
+    def test_departments_tell_deleted_from_live(self):
+        self.department.soft_delete()
+        Department.objects.create(name='Computing', code='CSC')
+        lines = self._download('/admin/export/departments.csv').splitlines()
+        self.assertEqual(
+            lines[0].split(','), ['id', 'name', 'code', 'description', 'is_active', 'created_at', 'deleted_at'],
+        )
+        self.assertEqual(sorted(line.split(',')[4] for line in lines[1:]), ['False', 'True'])
+
+
+class FacetTests(BoardTestCase):
+
+    def _result(self, session, department=None, **fields):
+        values = {
+            'session': session, 'semester': 'first', 'level': '100L',
+            'department': department or self.department, 'course_code': 'CSC 101',
+            'course_title': 'Intro', 'is_published': True, 'created_by': self.staff,
+        }
+        values.update(fields)
+        return Result.objects.create(**values)
+
+    def test_counts_per_department_and_overall(self):
+        maths = Department.objects.create(name='Mathematics', code='MTH')
+        self._result('2022/2023')
+        self._result('2023/2024')
+        self._result('2023/2024', department=maths)
+        self._result('2024/2025', is_published=False)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(facet_counts('sessions'), [('2023/2024', 2), ('2022/2023', 1)])
+            self.assertEqual(facet_values('sessions', maths.pk), ['2023/2024'])
+            self.assertEqual(facet_values('sessions', str(self.department.pk)), ['2023/2024', '2022/2023'])
+            self.assertEqual(facet_values('sessions', 'junk'), [])
+            self.assertEqual(
+                facet_combinations('sessions'),
+                {(self.department.pk, '2022/2023'), (self.department.pk, '2023/2024'), (maths.pk, '2023/2024')},
+            )
+
+    def test_writes_refresh_the_facet(self):
+        self.assertEqual(facet_values('sessions'), [])
+        result = self._result('2023/2024')
+        self.assertEqual(facet_values('sessions'), ['2023/2024'])
+        result.is_published = False
+        result.save()
+        self.assertEqual(facet_values('sessions'), [])
+
+    def test_inactive_departments_are_left_out(self):
+        Timetable.objects.create(
+            department=self.department, day_of_week='monday', course_code='CSC 101', course_title='Intro',
+            lecturer='Ada Obi', venue='LT1', level='100L', start_time=datetime.time(9),
+            end_time=datetime.time(10), created_by=self.staff,
+        )
+        self.assertEqual(facet_values('levels'), ['100L'])
+        self.department.is_active = False
+        self.department.save()
+        self.assertEqual(facet_values('levels'), [])
+
+
+class DepartmentPurgeTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.maths = Department.objects.create(name='Mathematics', code='MTH')
+        now = timezone.now()
+        for department in (self.department, self.maths):
+            for n in range(3):
+                Announcement.objects.create(title=f'A{n}', content='c', department=department, created_by=self.staff)
+                Event.objects.create(
+                    title=f'E{n}', description='d', department=department, venue='Hall',
+                    start_date=now, end_date=now + datetime.timedelta(hours=1), created_by=self.staff,
+                )
+                Timetable.objects.create(
+                    department=department, day_of_week='monday', course_code=f'C{n}', course_title='T',
+                    lecturer=f'L{n}', venue=f'V{n}', level='100L', start_time=datetime.time(9),
+                    end_time=datetime.time(10), created_by=self.staff,
+                )
+                Result.objects.create(
+                    session='2023/2024', semester='first', department=department, level='100L',
+                    course_code=f'C{n}', course_title='T', created_by=self.staff,
+                )
+
+    def _remaining(self, department):
+        return [m.objects.filter(department=department).count() for m in (Announcement, Event, Timetable, Result)]
+
+    def test_live_departments_are_refused(self):
+        with self.assertRaises(ValueError):
+            purge_department(self.department.pk)
+        self.assertEqual(self._remaining(self.department), [3, 3, 3, 3])
+
+    def test_purge_deletes_in_batches_and_reports_progress(self):
+        self.department.soft_delete()
+        seen = []
+        with CaptureQueriesContext(connection) as queries:
+            progress = purge_department(self.department.pk, batch_size=2, on_progress=lambda p: seen.append(p['deleted']))
+
+        self.assertEqual((progress['total'], progress['deleted'], progress['state']), (12, 12, 'done'))
+        self.assertIsNotNone(progress['finished_at'])
+        self.assertEqual(purge_progress(self.department.pk), progress)
+        # Two batches per table: one of two rows, then the last row
+        self.assertEqual(seen, [2, 3, 5, 6, 8, 9, 11, 12])
+        # Eight batch deletes, then the department row
+        deletes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 9)
+
+        self.assertFalse(Department.objects.filter(pk=self.department.pk).exists())
+        self.assertEqual(self._remaining(self.department.pk), [0, 0, 0, 0])
+        self.assertEqual(self._remaining(self.maths), [3, 3, 3, 3])
+
+    def test_rerun_after_an_interruption_finishes_the_job(self):
+        self.department.soft_delete()
+        real_delete = purge._delete_ids
+        calls = []
+
+        def flaky(table, ids):
+            calls.append(table)
+            if len(calls) == 3:
+                raise ConnectionError('lost the database')
+            return real_delete(table, ids)
+
+        with mock.patch.object(purge, '_delete_ids', flaky), self.assertRaises(ConnectionError):
+            purge_department(self.department.pk, batch_size=2)
+        failed = purge_progress(self.department.pk)
+        self.assertEqual((failed['state'], failed['deleted']), ('failed', 3))
+        self.assertEqual(self._remaining(self.department), [0, 3, 3, 3])
+
+        progress = purge_department(self.department.pk, batch_size=2)
+        self.assertEqual((progress['total'], progress['deleted'], progress['state']), (9, 9, 'done'))
+        self.assertEqual(self._remaining(self.department.pk), [0, 0, 0, 0])
+
+        # Running it again once the department is gone changes nothing
+        again = purge_department(self.department.pk, batch_size=2)
+        self.assertEqual((again['total'], again['deleted'], again['state']), (0, 0, 'done'))
+        self.assertEqual(self._remaining(self.maths), [3, 3, 3, 3])
+
+
+class CourseIndexTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Timetable.objects.create(
+            department=self.department, day_of_week='Monday', course_code='CSC 301',
+            course_title='Data Structures', lecturer='Ada Obi', venue='LT1',
+            start_time=datetime.time(9), end_time=datetime.time(11), created_by=self.staff,
+        )
+
+    def test_codes_titles_and_lecturers_match_by_word_prefix(self):
+        index = CourseIndex()
+        for query in ('csc3', 'CSC 30', 'data st', 'struct', 'obi'):
+            self.assertTrue(index.search(query), query)
+        self.assertEqual(index.search('tures'), [])
+        self.assertEqual(index.search('csc', department_id=self.department.pk + 1), [])
+
+    @override_settings(AUTOCOMPLETE_LOCAL_TTL=0)
+    def test_index_reloads_once_the_shared_keys_expire(self):
+        index = CourseIndex()
+        index.search('csc')
+        with mock.patch('board.autocomplete.CourseIndex.invalidate'):
+            Timetable.objects.create(
+                department=self.department, day_of_week='Friday', course_code='MTH 101',
+                course_title='Calculus', lecturer='B. Eze', venue='LT2',
+                start_time=datetime.time(9), end_time=datetime.time(11), created_by=self.staff,
+            )
+        self.assertEqual(index.search('calc'), [])
+        # The other worker's bump never arrives here; the keys expiring does
+        cache.clear()
+        self.assertEqual([s['value'] for s in index.search('calc')], ['MTH 101'])
+
+
+class CalendarFeedTests(BoardTestCase):
+
+    def test_escape_and_fold(self):
+        self.assertEqual(escape('a;b,c\\d\r\ne'), 'a\\;b\\,c\\\\d\\ne')
+        self.assertEqual(fold('SUMMARY:short'), 'SUMMARY:short\r\n')
+        line = 'DESCRIPTION:' + 'é' * 60
+        folded = fold(line)
+        parts = folded[:-2].split('\r\n ')
+        self.assertEqual(''.join(parts), line)
+        self.assertTrue(all(len(part.encode()) <= 75 - bool(i) for i, part in enumerate(parts)))
+
+    def test_feed_lists_events_and_revalidates(self):
+        now = timezone.now()
+        Event.objects.create(
+            title='Open day, again', description='All welcome', department=self.department, venue='Hall',
+            start_date=now, end_date=now + datetime.timedelta(hours=2), created_by=self.staff,
+        )
+        response = self.client.get('/calendar/events.ics')
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+        self.assertIn('SUMMARY:Open day\\, again\r\n', body)
+
+        revalidated = self.client.get('/calendar/events.ics', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        # Any edit bumps the row version and with it the ETag
+        event = Event.objects.get()
+        event.title = 'Changed'
+        event.save()
+        self.assertEqual(self.client.get('/calendar/events.ics', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class FeedTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Announcement.objects.create(
+            title='Exam timetable out', content='See the board', department=self.department, created_by=self.staff,
+        )
+
+    def test_equivalent_filters_share_one_cached_body(self):
+        self.client.get('/feeds/announcements.rss?department=CSC&priority=medium')
+        with self.assertNumQueries(0):
+            for department in (str(self.department.pk), 'csc'):
+                response = self.client.get(f'/feeds/announcements.rss?department={department}&priority=medium')
+                self.assertContains(response, 'Exam timetable out')
+
+    def test_unknown_filters_are_refused_before_caching(self):
+        for query in ('department=nope', 'department=999999', 'priority=extreme'):
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(f'/feeds/announcements.rss?{query}').status_code, 404, query)
+        self.assertFalse([k for k in cache._cache if 'board:feeds:rss' in k])
+
+    def test_change_marker_expires_with_the_bodies(self):
+        with override_settings(FEED_CACHE_TIMEOUT=60):
+            cache.clear()
+            self.client.get('/feeds/announcements.rss')
+            expires = cache._expire_info[cache.make_key(CHANGED_KEY)]
+        self.assertAlmostEqual(expires, time.time() + 60, delta=5)
+
+
+class AnnouncementYearTests(BoardTestCase):
+
+    def test_year_filter_reads_one_calendar_year(self):
+        for year in (2024, 2025):
+            announcement = Announcement.objects.create(
+                title=f'From {year}', content='c', department=self.department, created_by=self.staff,
+            )
+            Announcement.objects.filter(pk=announcement.pk).update(
+                created_at=datetime.datetime(year, 12, 31, 23, tzinfo=datetime.timezone.utc),
+            )
+        cache.clear()
+        response = self.client.get('/announcements/')
+        self.assertEqual(list(response.context['years']), [2025, 2024])
+
+        response = self.client.get('/announcements/?year=2024')
+        self.assertEqual([a.title for a in response.context['page_obj']], ['From 2024'])
+        for junk in ('1999', 'abc', '2024x'):
+            response = self.client.get(f'/announcements/?year={junk}')
+            self.assertEqual(len(response.context['page_obj']), 2, junk)
+
+
+class StaticExportTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        now = timezone.now()
+        for days in range(1, 26):
+            Event.objects.create(
+                title=f'Past {days}', description='d', department=self.department, venue='Hall',
+                start_date=now - datetime.timedelta(days=days + 1),
+                end_date=now - datetime.timedelta(days=days + 1, hours=-1),
+                created_by=self.staff,
+            )
+
+    def _export(self, pages=None, prune=True):
+        with override_settings(STATIC_EXPORT_ROOT=self.root):
+            return StaticExporter().export(pages if pages is not None else iter_pages(), prune=prune)
+
+    def test_pages_are_written_as_html_and_json_at_their_mapped_paths(self):
+        self._export()
+        path = snapshot_path(f'/events/?window=past&department={self.department.pk}')
+        self.assertEqual(path, os.path.join('events', f'department-{self.department.pk}', 'window-past', 'index.html'))
+        with open(os.path.join(self.root, path[:-len('html')] + 'json')) as fh:
+            data = json.load(fh)
+        self.assertEqual([e['title'] for e in data['events']], [f'Past {d}' for d in range(1, 21)])
+        self.assertNotIn('created_by', data['events'][0])
+
+    def test_every_event_page_link_has_a_snapshot(self):
+        self._export()
+        with open(os.path.join(self.root, 'manifest.json')) as fh:
+            exported = json.load(fh)['pages']
+        response = self.client.get('/events/?window=past')
+        second = response.context['page_obj'].next_url
+        response = self.client.get('/events/' + second)
+        for link in (second, response.context['page_obj'].previous_url):
+            self.assertIn(Page.from_url('/events/' + link).url, exported)
+
+    def test_deleted_department_and_moved_rows_are_re_rendered(self):
+        maths = Department.objects.create(name='Mathematics', code='MTH')
+        announcement = Announcement.objects.create(
+            title='Moving', content='c', department=self.department, created_by=self.staff,
+        )
+        with override_settings(STATIC_EXPORT_ON_CHANGE=True):
+            announcement.department = maths
+            announcement.save()
+        task = Task.objects.filter(name='export_changed').latest('id')
+        self.assertEqual(task.args, ['board.Announcement', [maths.pk, self.department.pk], None])
+
+        self._export()
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'announcements', f'department-{maths.pk}', 'index.json')))
+        other = os.path.join(self.root, 'announcements', f'department-{self.department.pk}', 'index.json')
+        with override_settings(STATIC_EXPORT_ON_CHANGE=True):
+            maths.soft_delete()
+        task = Task.objects.filter(name='export_changed').latest('id')
+        self.assertEqual(task.args, ['board.Department', [maths.pk], ['deleted_at', 'is_active']])
+        with override_settings(STATIC_EXPORT_ROOT=self.root):
+            written, unchanged, removed = export_changed(Department, *task.args[1:])
+        self.assertIn(f'/announcements/?department={maths.pk}', removed)
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'announcements', f'department-{maths.pk}')))
+        self.assertTrue(os.path.exists(other))
+
+    def test_saves_only_queue_the_pages_they_change(self):
+        announcement = Announcement.objects.create(
+            title='Draft', content='c', department=self.department, created_by=self.staff, is_active=False,
+        )
+        announcement = Announcement.objects.get(pk=announcement.pk)
+        queued = Task.objects.filter(name='export_changed')
+        with override_settings(STATIC_EXPORT_ON_CHANGE=True):
+            with CaptureQueriesContext(connection) as queries:
+                announcement.content = 'Still a draft'
+                announcement.save()
+            # No lookup of the old row: the instance remembers what it loaded
+            self.assertFalse([q for q in queries if q['sql'].lstrip().upper().startswith('SELECT')])
+            self.assertFalse(queued.exists())
+            announcement.save()
+            self.assertFalse(queued.exists())
+            announcement.is_active = True
+            announcement.save()
+            self.assertEqual(queued.count(), 1)
+
+            department = Department.objects.get(pk=self.department.pk)
+            department.description = 'Programs and people'
+            department.save()
+        task = queued.latest('id')
+        self.assertEqual(task.args, ['board.Department', [self.department.pk], ['description']])
+        self.assertEqual({page.route for page in pages_for_change(Department, *task.args[1:])}, {'home'})
+        self.assertEqual(pages_for_change(Department, [self.department.pk], ['created_at']), [])
+        self.assertEqual(
+            {page.route for page in pages_for_change(Department, [self.department.pk], ['name'])},
+            {'home', 'announcements', 'events', 'timetable', 'results'},
+        )
+
+    def test_dated_pages_expire_at_midnight(self):
+        self._export()
+        with override_settings(STATIC_EXPORT_ROOT=self.root):
+            exporter = StaticExporter()
+        self.assertFalse(exporter.has_expired())
+        self.assertTrue(exporter.has_expired(now=timezone.now() + datetime.timedelta(days=1)))
+
+
+@override_settings(TASK_TIMEOUT=60, TASKS_EAGER=False)
+@override_settings(TASK_MAX_ATTEMPTS=3, TASK_RETRY_DELAY=30, TASKS_EAGER=False)
+class TaskQueueTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+
+        def record(task, *args):
+            self.calls.append(args)
+            if 'fail' in args:
+                raise RuntimeError('task blew up')
+            task.progress_total = 4
+
+        patcher = mock.patch.dict(REGISTRY, {'record': record})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_claim_takes_due_tasks_oldest_first(self):
+        now = timezone.now()
+        later = Task.objects.create(name='record', run_after=now - datetime.timedelta(minutes=1))
+        sooner = Task.objects.create(name='record', run_after=now - datetime.timedelta(minutes=5))
+        Task.objects.create(name='record', run_after=now + datetime.timedelta(minutes=5))
+
+        first = claim('w1')
+        self.assertEqual((first.pk, first.status, first.worker, first.attempts), (sooner.pk, 'running', 'w1', 1))
+        self.assertEqual(claim('w2').pk, later.pk)
+        # The last one is not due yet
+        self.assertIsNone(claim('w3'))
+
+    def test_claim_locks_with_skip_locked_where_supported(self):
+        Task.objects.create(name='record')
+        with mock.patch.object(connection.features, 'has_select_for_update_skip_locked', True), \
+                mock.patch.object(QuerySet, 'first', autospec=True, return_value=None) as first:
+            self.assertIsNone(claim('w1'))
+        query = first.call_args[0][0].query
+        self.assertTrue(query.select_for_update and query.select_for_update_skip_locked)
+
+    def test_claim_loses_a_race_gracefully(self):
+        task = Task.objects.create(name='record')
+        Task.objects.filter(pk=task.pk).update(status='running', worker='w0')
+        with mock.patch.object(QuerySet, 'first', autospec=True, return_value=task):
+            self.assertIsNone(claim('w1'))
+        task.refresh_from_db()
+        self.assertEqual(task.worker, 'w0')
+
+    def test_run_marks_success_done(self):
+        enqueue('record', 1, 'a')
+        task = claim('w1')
+        self.assertTrue(run(task))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.progress_done, task.percent), ('done', 4, 100))
+        self.assertEqual(self.calls, [(1, 'a')])
+
+    def test_failures_back_off_then_fail(self):
+        task = enqueue('record', 'fail')
+        delays = []
+        for _ in range(3):
+            Task.objects.filter(pk=task.pk).update(run_after=timezone.now())
+            task = claim('w1')
+            before = timezone.now()
+            self.assertFalse(run(task))
+            task.refresh_from_db()
+            delays.append(round((task.run_after - before).total_seconds()))
+        self.assertEqual(task.status, 'failed')
+        self.assertEqual(task.attempts, 3)
+        self.assertIn('task blew up', task.error)
+        # Retries wait 30s, then 60s; the last attempt is not retried
+        self.assertEqual(delays[:2], [30, 60])
+        self.assertIsNone(claim('w1'))
+
+    def test_unknown_tasks_fail_without_retrying(self):
+        task = Task.objects.create(name='gone')
+        self.assertFalse(run(claim('w1')))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ('failed', 1))
+        with self.assertRaises(KeyError):
+            enqueue('gone')
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = enqueue('record', 2)
+            self.assertEqual(self.calls, [])
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.worker.startswith('eager:')), ('done', True))
+        self.assertEqual(self.calls, [(2,)])
+        # Delayed tasks still wait for a worker
+        with self.captureOnCommitCallbacks(execute=True):
+            delayed = enqueue('record', 3, delay=60)
+        delayed.refresh_from_db()
+        self.assertEqual(delayed.status, 'queued')
+
+    def test_unique_enqueue_reuses_the_queued_task(self):
+        first = enqueue('record', 5, unique=True)
+        self.assertEqual(enqueue('record', 5, unique=True).pk, first.pk)
+        self.assertNotEqual(enqueue('record', 6, unique=True).pk, first.pk)
+        self.assertNotEqual(enqueue('record', 5).pk, first.pk)
+        run(claim('w1'))
+        self.assertNotEqual(enqueue('record', 5, unique=True).pk, first.pk)
+
+    def test_stale_runs_use_up_attempts(self):
+        task = Task.objects.create(name='export_expired', max_attempts=2)
+        for expected in ('queued', 'failed'):
+            self.assertEqual(claim('w1').pk, task.pk)
+            Task.objects.filter(pk=task.pk).update(started_at=timezone.now() - datetime.timedelta(minutes=5))
+            requeue_stale()
+            task.refresh_from_db()
+            self.assertEqual(task.status, expected)
+        self.assertEqual(task.attempts, 2)
+        self.assertIn('stopped responding', task.error)
+        self.assertIsNone(claim('w2'))
+
+
+@override_settings(PAGE_COALESCING=True, PAGE_CACHE_TTL=60, PAGE_CACHE_STALE=60, PAGE_CACHE_WAIT=5)
+class PageCoalescingTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.renders = 0
+        self.rendering = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+        @coalescing.coalesced
+        def view(request):
+            self.renders += 1
+            self.rendering.set()
+            self.release.wait(5)
+            return HttpResponse(f'render {self.renders}')
+
+        self.view = view
+
+    def _get(self, path='/page/', **params):
+        request = RequestFactory().get(path, params)
+        request.user = AnonymousUser()
+        return self.view(request)
+
+    def test_fresh_copy_is_reused(self):
+        self.assertEqual(self._get()['X-Page-Cache'], 'miss')
+        response = self._get()
+        self.assertEqual((response['X-Page-Cache'], response.content), ('hit', b'render 1'))
+        # Query order does not matter, but the query does
+        self.assertEqual(self._get(b=2, a=1)['X-Page-Cache'], 'miss')
+        self.assertEqual(self._get(a=1, b=2)['X-Page-Cache'], 'hit')
+
+    def test_long_queries_make_short_keys(self):
+        request = RequestFactory().get('/page/', {'search': 'x' * 1000})
+        self.assertLess(len(coalescing.LOCK_KEY.format(coalescing.page_key(request))), 250)
+        self.assertNotEqual(coalescing.page_key(request), coalescing.page_key(RequestFactory().get('/page/')))
+
+    def test_concurrent_misses_share_one_render(self):
+        self.release.clear()
+        responses = []
+        leader = threading.Thread(target=lambda: responses.append(self._get()))
+        leader.start()
+        self.assertTrue(self.rendering.wait(5))
+        followers = [threading.Thread(target=lambda: responses.append(self._get())) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(self.renders, 1)
+        states = sorted(r['X-Page-Cache'] for r in responses)
+        # A follower that only got going after the render finished sees a plain hit
+        self.assertEqual(states.pop(), 'miss')
+        self.assertLessEqual(set(states), {'coalesced', 'hit'})
+        self.assertEqual({r.content for r in responses}, {b'render 1'})
+
+    def test_stale_copy_is_served_while_one_request_refreshes(self):
+        self._get()
+        key = coalescing.page_key(RequestFactory().get('/page/'))
+        entry = cache.get(key)
+        cache.set(key, dict(entry, fresh_until=time.time() - 1))
+
+        cache.add(coalescing.LOCK_KEY.format(key), 1)
+        response = self._get()
+        self.assertEqual((response['X-Page-Cache'], self.renders), ('stale', 1))
+
+        cache.delete(coalescing.LOCK_KEY.format(key))
+        response = self._get()
+        self.assertEqual((response['X-Page-Cache'], response.content), ('miss', b'render 2'))
+        self.assertEqual(self._get()['X-Page-Cache'], 'hit')
+
+    def test_invalidation_and_signed_in_users_bypass_the_copy(self):
+        self._get()
+        coalescing.invalidate_pages()
+        self.assertEqual(self._get()['X-Page-Cache'], 'miss')
+
+        request = RequestFactory().get('/page/')
+        request.user = self.staff
+        response = self.view(request)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertEqual(self.renders, 3)
+
+
+class AdminListTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='staff', password='pw')
+        # Repeated titles: the id tie-breaker has to keep pages apart
+        for n in range(60):
+            Announcement.objects.create(
+                title=f'Notice {n % 7}', content='c', department=self.department, created_by=self.staff,
+            )
+        self.by_title = list(Announcement.objects.order_by('title', 'pk').values_list('pk', flat=True))
+
+    def _walk(self, url):
+        seen, pages = [], []
+        while url:
+            listing = self.client.get('/admin/announcements/' + url).context['listing']
+            pages.append([a.pk for a in listing.object_list])
+            seen += pages[-1]
+            last, url = listing, listing.next_url
+        return seen, pages, last
+
+    def test_keyset_pages_cover_every_row_once_in_both_directions(self):
+        seen, pages, last = self._walk('?sort=title')
+        self.assertEqual(seen, self.by_title)
+        self.assertEqual([len(p) for p in pages], [25, 25, 10])
+
+        back = self.client.get('/admin/announcements/' + last.previous_url).context['listing']
+        self.assertEqual([a.pk for a in back.object_list], pages[1])
+        self.assertTrue(back.has_next and back.has_previous)
+
+        seen, _, _ = self._walk('?sort=-title')
+        self.assertEqual(seen, self.by_title[::-1])
+
+    def test_priority_sorts_by_urgency_not_alphabetically(self):
+        priorities = ['low', 'urgent', 'medium', 'high']
+        for n, announcement in enumerate(Announcement.objects.order_by('pk')):
+            announcement.priority = priorities[n % 4]
+            announcement.save()
+        seen, pages, _ = self._walk('?sort=-priority')
+        self.assertEqual(len(seen), 60)
+        order = [Announcement.objects.get(pk=pk).priority for pk in seen]
+        self.assertEqual(order, ['urgent'] * 15 + ['high'] * 15 + ['medium'] * 15 + ['low'] * 15)
+        seen, _, _ = self._walk('?sort=priority')
+        self.assertEqual(Announcement.objects.get(pk=seen[0]).priority, 'low')
+
+    def test_cursor_round_trip_and_garbage(self):
+        converters = (Announcement._meta.get_field('created_at').to_python, int)
+        announcement = Announcement.objects.first()
+        cursor = decode_cursor(encode_cursor([str(announcement.created_at), announcement.pk]), converters)
+        self.assertEqual(cursor, (announcement.created_at, announcement.pk))
+        for garbage in ('', 'x', 'W10', 'WyJ4IiwgMV0', '!!!'):
+            self.assertIsNone(decode_cursor(garbage, converters), garbage)
+        for query in ('?after=garbage', '?before=W10', '?sort=nonsense', '?status=maybe'):
+            self.assertEqual(self.client.get('/admin/announcements/' + query).status_code, 200, query)
+
+
+class OptimisticLockTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='staff', password='pw')
+        self.announcement = Announcement.objects.create(
+            title='Original', content='c', department=self.department, created_by=self.staff,
+        )
+        self.url = f'/admin/announcements/edit/{self.announcement.pk}/'
+
+    def _post(self, version, title, **headers):
+        return self.client.post(self.url, {
+            'title': title, 'content': 'c', 'department': self.department.pk,
+            'priority': 'medium', 'version': version,
+        }, **headers)
+
+    def test_stale_save_is_refused_with_409(self):
+        self.assertEqual(self.client.get(self.url)['ETag'], '"1"')
+        self.assertEqual(self._post(1, 'First').status_code, 302)
+
+        response = self._post(1, 'Second')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertContains(response, 'Someone else saved', status_code=409)
+        self.announcement.refresh_from_db()
+        self.assertEqual((self.announcement.title, self.announcement.version), ('First', 2))
+
+        # The re-shown form carries the new version, so saving again overwrites
+        self.assertEqual(self._post(2, 'Second').status_code, 302)
+        self.announcement.refresh_from_db()
+        self.assertEqual((self.announcement.title, self.announcement.version), ('Second', 3))
+
+    def test_if_match_header_wins_over_the_form_field(self):
+        response = self._post(1, 'Header', HTTP_IF_MATCH='W/"7"')
+        self.assertEqual(response.status_code, 409)
+
+    def test_only_changed_columns_are_written(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._post(1, 'Renamed')
+        update = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "board_announcement"'))
+        self.assertIn('"title"', update)
+        self.assertNotIn('"content"', update)
+        self.assertIn('"version" = 1', update.split('WHERE')[1].replace('%s', '1'))
+
+
+class QueryCacheTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Announcement.objects.create(title='First', content='c', department=self.department, created_by=self.staff)
+        # The test case's transaction would otherwise send every read to the database
+        patcher = mock.patch.object(connection, 'in_atomic_block', False)
+        self.addCleanup(patcher.stop)
+        self.outside_transaction = patcher
+
+    def _titles(self, **filters):
+        self.outside_transaction.start()
+        try:
+            return list(Announcement.objects.filter(**filters).cached().values_list('title', flat=True))
+        finally:
+            self.outside_transaction.stop()
+
+    def test_table_regexes(self):
+        sql = (
+            'SELECT "board_announcement"."id" FROM "board_announcement" '
+            'INNER JOIN "board_department" ON (1) WHERE "id" IN (SELECT "id" FROM board_event)'
+        )
+        self.assertEqual(sorted(set(READ_TABLES.findall(sql))), ['board_announcement', 'board_department', 'board_event'])
+        self.assertEqual(WRITE_TABLE.match('UPDATE "board_event" SET x = 1').group(1), 'board_event')
+        self.assertEqual(WRITE_TABLE.match(' delete from board_result WHERE 1').group(1), 'board_result')
+        self.assertIsNone(WRITE_TABLE.match('SELECT 1 FROM board_event'))
+
+    @override_settings(QUERY_CACHE_ENABLED=True)
+    def test_repeated_read_is_served_from_cache(self):
+        self.assertEqual(self._titles(), ['First'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._titles(), ['First'])
+
+    @override_settings(QUERY_CACHE_ENABLED=False)
+    def test_disabled_cache_always_queries(self):
+        self._titles()
+        with self.assertNumQueries(1):
+            self._titles()
+
+    @override_settings(QUERY_CACHE_ENABLED=True)
+    def test_reads_inside_a_transaction_skip_the_cache(self):
+        self._titles()
+        with self.assertNumQueries(1):
+            list(Announcement.objects.cached())
+
+    @override_settings(QUERY_CACHE_ENABLED=True)
+    def test_writes_invalidate_the_tables_they_touch(self):
+        self._titles()
+        with connection.execute_wrapper(watch_writes):
+            # A write to an unrelated table leaves the entry alone
+            Event.objects.filter(pk=0).update(title='x')
+            with self.assertNumQueries(0):
+                self._titles()
+            Announcement.objects.update(title='Renamed')
+        with self.assertNumQueries(1):
+            self.assertEqual(self._titles(), ['Renamed'])
+
+    @override_settings(QUERY_CACHE_ENABLED=True)
+    def test_joined_table_writes_invalidate(self):
+        self.assertEqual(self._titles(department__is_active=True), ['First'])
+        with connection.execute_wrapper(watch_writes):
+            Department.objects.update(is_active=False)
+        self.assertEqual(self._titles(department__is_active=True), [])
+
+
+class ProfilingTests(BoardTestCase):
+
+    def test_only_staff_requests_are_profiled(self):
+        self.assertNotIn('X-Profile-Id', self.client.get('/announcements/', {'_profile': 1}))
+
+        self.client.login(username='staff', password='pw')
+        self.assertNotIn('X-Profile-Id', self.client.get('/announcements/'))
+        response = self.client.get('/announcements/', {'_profile': 1, 'priority': 'high'})
+        profile_id = int(response['X-Profile-Id'])
+
+        capture = profiling.get(profile_id)
+        self.assertEqual(
+            (capture['path'], capture['query'], capture['user']),
+            ('/announcements/', '_profile=1&priority=high', 'staff'),
+        )
+        self.assertTrue(capture['sql'])
+
+        report = self.client.get(f'/admin/profiles/{profile_id}.txt')
+        self.assertContains(report, 'GET /announcements/?_profile=1&priority=high')
+        self.assertContains(report, 'board_announcement')
+        self.assertEqual(self.client.get(f'/admin/profiles/{profile_id}.prof')['Content-Disposition'],
+                         f'attachment; filename="profile-{profile_id}.prof"')
+
+    @override_settings(PROFILE_BUFFER_SIZE=2)
+    def test_ring_buffer_keeps_the_newest_captures(self):
+        ids = [profiling.save({'n': n}) for n in range(3)]
+        self.assertEqual(ids, [1, 2, 3])
+        self.assertIsNone(profiling.get(1))
+        self.assertEqual([c['n'] for c in profiling.recent()], [2, 1])
+
+
+class _Origin(http.server.BaseHTTPRequestHandler):
+    """Stand-in for the server a result document lives on"""
+
+    def do_GET(self):
+        origin = self.server
+        origin.requests.append((self.path, self.headers.get('If-None-Match')))
+        if origin.failing:
+            self.send_error(503)
+            return
+        origin.started.set()
+        origin.release.wait(5)
+        if self.headers.get('If-None-Match') == origin.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(origin.body)))
+        self.send_header('ETag', origin.etag)
+        self.end_headers()
+        self.wfile.write(origin.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(RESULT_PROXY_MAX_AGE=3600, RESULT_PROXY_TIMEOUT=5, RESULT_PROXY_MAX_BYTES=1000)
+class DocumentStoreTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.origin = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Origin)
+        self.origin.requests = []
+        self.origin.failing = False
+        self.origin.body = b'%PDF-1.4 results'
+        self.origin.etag = '"v1"'
+        self.origin.started = threading.Event()
+        self.origin.release = threading.Event()
+        self.origin.release.set()
+        threading.Thread(target=self.origin.serve_forever, daemon=True).start()
+        self.addCleanup(self.origin.server_close)
+        self.addCleanup(self.origin.shutdown)
+
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.store = DocumentStore(root)
+        self.url = f'http://127.0.0.1:{self.origin.server_port}/docs/csc101.pdf'
+
+    def test_first_fetch_stores_the_body_and_reuses_it(self):
+        document = self.store.get(self.url)
+        with open(document.path, 'rb') as fh:
+            self.assertEqual(fh.read(), b'%PDF-1.4 results')
+        self.assertEqual((document.size, document.content_type, document.filename),
+                         (16, 'application/pdf', 'csc101.pdf'))
+        self.assertEqual(self.store.get(self.url), document)
+        self.assertEqual(len(self.origin.requests), 1)
+
+    def test_concurrent_misses_fetch_once(self):
+        self.origin.release.clear()
+        found = []
+        threads = [threading.Thread(target=lambda: found.append(self.store.get(self.url))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(self.origin.started.wait(5))
+        time.sleep(0.1)
+        self.origin.release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(found), 5)
+        self.assertEqual(len({d.sha256 for d in found}), 1)
+        self.assertEqual(len(self.origin.requests), 1)
+
+    def test_expired_copy_is_revalidated(self):
+        first = self.store.get(self.url)
+        with override_settings(RESULT_PROXY_MAX_AGE=0):
+            again = self.store.get(self.url)
+            self.assertEqual(self.origin.requests[-1], ('/docs/csc101.pdf', '"v1"'))
+            self.assertEqual(again.sha256, first.sha256)
+            self.assertGreaterEqual(again.fetched_at, first.fetched_at)
+
+            self.origin.body, self.origin.etag = b'%PDF-1.4 corrected', '"v2"'
+            changed = self.store.get(self.url)
+        self.assertNotEqual(changed.sha256, first.sha256)
+        self.assertEqual(changed.size, 18)
+
+    def test_stale_copy_is_served_while_the_origin_is_down(self):
+        first = self.store.get(self.url)
+        self.origin.failing = True
+        with override_settings(RESULT_PROXY_MAX_AGE=0):
+            self.assertEqual(self.store.get(self.url).sha256, first.sha256)
+        with self.assertRaises(DocumentUnavailable):
+            self.store.get(self.url + '?other')
+
+    def test_oversized_documents_are_refused(self):
+        self.origin.body = b'x' * 1001
+        with self.assertRaises(DocumentUnavailable):
+            self.store.get(self.url)
+        blobs = os.path.join(self.store.root, 'blobs')
+        self.assertEqual([f for _, _, files in os.walk(blobs) for f in files], [])
+
+
+class DocumentRangeTests(BoardTestCase):
+
+    def test_parse_range(self):
+        cases = {
+            'bytes=0-99': (0, 99),
+            'bytes=10-': (10, 999),
+            'bytes=-100': (900, 999),
+            'bytes=-5000': (0, 999),
+            'bytes=990-5000': (990, 999),
+            'bytes=1000-': False,
+            'bytes=5-4': False,
+            'bytes=-0': False,
+            '': None,
+            'bytes=-': None,
+            'bytes=0-1,5-6': None,
+            'items=0-1': None,
+            'bytes=+1-2': None,
+            'bytes=1_0-20': None,
+            'bytes=a-b': None,
+        }
+        for header, expected in cases.items():
+            self.assertEqual(parse_range(header, 1000), expected, header)
+        self.assertEqual(parse_range('bytes=0-', 0), False)
+
+    @override_settings(RESULT_PROXY_ENABLED=True)
+    def test_document_ranges_and_416(self):
+        with tempfile.NamedTemporaryFile(delete=False) as fh:
+            fh.write(bytes(range(100)))
+        self.addCleanup(os.remove, fh.name)
+        document = Document(fh.name, 'abc', 100, 'application/pdf', 'result.pdf', time.time())
+        result = Result.objects.create(
+            session='2025/2026', semester='first', department=self.department, level='100L',
+            course_code='CSC101', course_title='Intro', file_url='https://example.org/r.pdf',
+            is_published=True, created_by=self.staff,
+        )
+        url = f'/results/{result.pk}/document/'
+        with mock.patch('board.views.documents.get', return_value=document):
+            response = self.client.get(url, HTTP_RANGE='bytes=10-19')
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+            self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+            response = self.client.get(url, HTTP_RANGE='bytes=100-')
+            self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */100'))
+
+            # A changed document ignores the range and sends the whole body
+            response = self.client.get(url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"old"')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(b''.join(response.streaming_content)), 100)
+
+
+class ScheduleConflictTests(BoardTestCase):
+
+    def _entry(self, start, end, **fields):
+        values = {
+            'department': self.department, 'day_of_week': 'monday', 'course_code': 'CSC 101',
+            'course_title': 'Intro', 'lecturer': 'Ada Obi', 'venue': 'LT1', 'level': '100L',
+            'start_time': datetime.time(*start), 'end_time': datetime.time(*end), 'created_by': self.staff,
+        }
+        values.update(fields)
+        return Timetable(**values)
+
+    def test_interval_set_matches_brute_force(self):
+        rng = random.Random(7)
+        intervals = IntervalSet()
+        added = []
+        for n in range(300):
+            start = rng.randrange(0, 1400)
+            end = start + rng.randrange(1, 120)
+            intervals.add(start, end, n)
+            added.append((start, end, n))
+            query_start = rng.randrange(0, 1400)
+            query_end = query_start + rng.randrange(1, 120)
+            expected = {m for s, e, m in added if s < query_end and e > query_start}
+            self.assertEqual(set(intervals.overlapping(query_start, query_end)), expected)
+        self.assertEqual(intervals.starts, sorted(intervals.starts))
+        self.assertTrue(all(e <= s for e, s in zip(intervals.ends, intervals.starts[1:])))
+
+    def test_back_to_back_classes_do_not_clash(self):
+        intervals = IntervalSet()
+        intervals.add(540, 600, 'a')
+        self.assertEqual(intervals.overlapping(600, 660), [])
+        self.assertEqual(intervals.overlapping(480, 540), [])
+        self.assertEqual(intervals.overlapping(599, 601), ['a'])
+
+    def test_batch_reports_each_kind_of_clash(self):
+        first = self._entry((9,), (11,))
+        clashes = validate_batch([
+            first,
+            self._entry((10,), (12,), lecturer='B. Eze', level='200L', course_code='CSC 201'),
+            self._entry((10, 30), (11, 30), venue='lt1 ', level='300L', lecturer='C. Okafor'),
+            self._entry((11,), (13,), venue='LT2', lecturer='ada  obi', level='400L'),
+            self._entry((10,), (11,), venue='LT3', lecturer='D. Nwosu', day_of_week='tuesday'),
+        ])
+        self.assertEqual([c.kind for c in clashes], ['venue', 'venue'])
+        self.assertEqual(clashes[0].others, [first])
+
+    def test_saved_entries_are_checked_in_one_query(self):
+        saved = self._entry((9,), (11,))
+        saved.save()
+        with self.assertNumQueries(1):
+            clashes = find_conflicts(self._entry((10,), (12,), venue='LT9', lecturer='Other'))
+        self.assertEqual([(c.kind, c.others) for c in clashes], [('cohort', [saved])])
+        # An entry never clashes with its own saved row
+        self.assertEqual(find_conflicts(saved), [])
+
+    def test_saved_and_batch_checks_normalise_alike(self):
+        saved = self._entry((9,), (11,), venue='LT  1', lecturer=' ada   OBI', semester='First ')
+        saved.save()
+        new = self._entry((10,), (12,), venue='lt 1', lecturer='Ada Obi', semester='first', level='200L')
+        from_db = [(c.kind, c.others) for c in find_conflicts(new)]
+        in_memory = [(c.kind, c.others) for c in validate_batch([saved, new])]
+        self.assertEqual(from_db, [('venue', [saved]), ('lecturer', [saved])])
+        self.assertEqual(in_memory, from_db)
+
+    def test_exclusion_constraints_cover_every_slot_key(self):
+        self.assertEqual(
+            sorted(EXCLUSION_CONSTRAINTS),
+            ['board_tt_no_cohort_overlap', 'board_tt_no_lecturer_overlap', 'board_tt_no_venue_overlap'],
+        )
+        sql = exclusion_constraint_sql('board_tt_no_lecturer_overlap')
+        self.assertIn("lower(regexp_replace(btrim(lecturer), '\\s+', ' ', 'g')) WITH =", sql)
+        self.assertTrue(sql.endswith('WITH &&) WHERE (is_active)'))
+        with self.assertRaises(CommandError):
+            call_command('check_timetable', install_constraint=True, stdout=io.StringIO())
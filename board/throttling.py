@@ -0,0 +1,154 @@
+# board/throttling.py
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .coalescing import cached_page
+
+BUCKET_KEY = 'board:throttle:{route}:{client}'
+# Replaced with the "search is busy" notice in throttled pages (see base.html)
+NOTICE_MARKER = b'<!-- search-throttled -->'
+NOTICE = (
+    b'<div class="messages"><div class="alert alert-error">'
+    b'Search is busy right now, so everything is shown unfiltered. '
+    b'Please try your search again in a moment.</div></div>'
+)
+
+# What a cache backend raises when its server is unreachable
+CACHE_ERRORS = (OSError,)
+try:
+    from redis.exceptions import RedisError
+    CACHE_ERRORS += (RedisError,)
+except ImportError:
+    pass
+try:
+    from pymemcache.exceptions import MemcacheError
+    CACHE_ERRORS += (MemcacheError,)
+except ImportError:
+    pass
+
+# Buckets used while the shared cache is unreachable: key -> (tokens, updated_at)
+_local_buckets = {}
+_local_lock = threading.Lock()
+
+_search_slots = None
+_search_slots_lock = threading.Lock()
+
+
+def client_ip(request):
+    if settings.THROTTLE_TRUST_X_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            # The proxy in front of us appends the address it saw last
+            return forwarded.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _refill(state, rate, burst, now):
+    tokens, updated_at = state or (burst, now)
+    return min(burst, tokens + (now - updated_at) * rate)
+
+
+def take_token(key, rate, burst):
+    """
+    Spend one token from the bucket at `key`, refilled at `rate` per second
+    up to `burst`. Returns (allowed, seconds until the next token).
+
+    Buckets live in the shared cache so every worker sees the same count;
+    the read-modify-write is not atomic, which can let a burst through a
+    token or two early but never starves anyone. If the cache is down, each
+    process keeps its own buckets instead. A `rate` of 0 turns the limit off.
+    """
+    if rate <= 0:
+        return True, 0
+    now = time.time()
+    try:
+        tokens = _refill(cache.get(key), rate, burst, now)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        cache.set(key, (tokens, now), int(burst / rate) + 1)
+    except CACHE_ERRORS:
+        with _local_lock:
+            tokens = _refill(_local_buckets.get(key), rate, burst, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            _local_buckets[key] = (tokens, now)
+    return allowed, 0 if allowed else (1 - tokens) / rate
+
+
+def _slots():
+    global _search_slots
+    with _search_slots_lock:
+        if _search_slots is None:
+            _search_slots = threading.BoundedSemaphore(settings.SEARCH_MAX_CONCURRENT)
+        return _search_slots
+
+
+def _degraded(view, request, args, kwargs, params, status, retry_after):
+    """
+    The page without the expensive parameters, with a retry hint. `view` is
+    the @coalesced view, so with PAGE_COALESCING on this is the page cache's
+    copy of the unfiltered page; the notice is added here, outside the cache.
+    """
+    request.GET = request.GET.copy()
+    for param in params:
+        request.GET.pop(param, None)
+    response = view(request, *args, **kwargs)
+    response.status_code = status
+    response['Retry-After'] = str(max(1, round(retry_after)))
+    if hasattr(response, 'render'):
+        response.render()
+    if not response.streaming:
+        response.content = response.content.replace(NOTICE_MARKER, NOTICE, 1)
+    return response
+
+
+def throttled_search(*params):
+    """
+    Rate-limit requests that use any of `params` (free-text search filters).
+
+    Each client IP gets a token bucket per view (SEARCH_RATE per second, up
+    to SEARCH_BURST), and each worker runs at most SEARCH_MAX_CONCURRENT
+    searches at once. Over the rate the client gets a 429, and with no free
+    slot a 503, both carrying Retry-After and the unfiltered page with a
+    notice instead of the search results. Requests without the parameters,
+    and searches the page cache already holds, are never throttled. Goes
+    above @coalesced, so the unfiltered fallback comes from the page cache.
+    """
+
+    def decorator(view):
+        route = view.__name__
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not settings.SEARCH_THROTTLE_ENABLED or not any(request.GET.get(p, '').strip() for p in params):
+                return view(request, *args, **kwargs)
+            if cached_page(request) is not None:
+                # Answered from the page cache: costs nothing to serve
+                return view(request, *args, **kwargs)
+
+            key = BUCKET_KEY.format(route=route, client=client_ip(request))
+            allowed, retry_after = take_token(key, settings.SEARCH_RATE, settings.SEARCH_BURST)
+            if not allowed:
+                return _degraded(view, request, args, kwargs, params, 429, retry_after)
+
+            slots = _slots()
+            if not slots.acquire(timeout=settings.SEARCH_QUEUE_WAIT):
+                return _degraded(view, request, args, kwargs, params, 503, settings.SEARCH_QUEUE_WAIT or 1)
+            try:
+                response = view(request, *args, **kwargs)
+                # A TemplateResponse runs its queries when rendered, so render while holding the slot
+                if hasattr(response, 'render'):
+                    response.render()
+                return response
+            finally:
+                slots.release()
+
+        return wrapper
+
+    return decorator
@@ -1,6 +1,6 @@
 # board/urls.py
 from django.urls import path
-from . import views
+from . import views, feeds
 
 urlpatterns = [
     path('ping/', views.ping_view, name='ping'),
@@ -11,6 +11,16 @@ urlpatterns = [
     path('events/', views.events_view, name='events'),
     path('timetable/', views.timetable_view, name='timetable'),
     path('results/', views.results_view, name='results'),
+    path('results/<int:pk>/document/', views.result_document, name='result_document'),
+    path('autocomplete/courses/', views.autocomplete_courses, name='autocomplete_courses'),
+    
+    # Calendar feeds
+    path('calendar/events.ics', views.events_ics, name='events_ics'),
+    path('calendar/timetable.ics', views.timetable_ics, name='timetable_ics'),
+    
+    # Announcement feeds
+    path('feeds/announcements.rss', feeds.rss_feed, name='announcements_rss'),
+    path('feeds/announcements.atom', feeds.atom_feed, name='announcements_atom'),
     
     # Admin Authentication
     path('admin/login/', views.admin_login, name='admin_login'),
@@ -19,6 +29,9 @@ urlpatterns = [
     # Admin Dashboard
     path('admin/', views.admin_dashboard, name='admin_dashboard'),
     
+    # Admin Exports
+    path('admin/export/<str:name>.<str:fmt>', views.admin_export, name='admin_export'),
+    
     # Admin Announcement URLs
     path('admin/announcements/', views.admin_announcements, name='admin_announcements'),
     path('admin/announcements/add/', views.admin_add_announcement, name='admin_add_announcement'),
@@ -48,4 +61,12 @@ urlpatterns = [
     path('admin/departments/add/', views.admin_add_department, name='admin_add_department'),
     path('admin/departments/edit/<int:pk>/', views.admin_edit_department, name='admin_edit_department'),
     path('admin/departments/delete/<int:pk>/', views.admin_delete_department, name='admin_delete_department'),
+    
+    # Admin Background Tasks
+    path('admin/tasks/', views.admin_tasks, name='admin_tasks'),
+    path('admin/tasks/retry/<int:pk>/', views.admin_retry_task, name='admin_retry_task'),
+    
+    # Admin Request Profiling
+    path('admin/profiles/', views.admin_profiles, name='admin_profiles'),
+    path('admin/profiles/<int:pk>.<str:fmt>', views.admin_profile_download, name='admin_profile_download'),
 ]
\ No newline at end of file
@@ -1,31 +1,54 @@
 # board/views.py
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
 from django.utils import timezone
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse, Http404, HttpResponse, FileResponse
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+from urllib.parse import urlencode
 from django.core.paginator import Paginator
-from .models import Announcement, Event, Timetable, Result, Department
+from .models import Announcement, Event, Timetable, Result, Department, Task, VersionConflict
 from .forms import AdminLoginForm, AnnouncementForm, EventForm, TimetableForm, ResultForm, DepartmentForm
+from .departments import departments
+from .autocomplete import courses
+from .facets import facet_counts, facet_values
+from .admin_lists import AdminList, ListFilter
+from .concurrency import save_changed_fields, submitted_version, version_etag
+from .ical import stream_calendar, feed_etag, event_window
+from .ranking import RankedPage, SORT_CHOICES
+from .event_windows import EventWindow, EventPage, WINDOW_CHOICES
+from .documents import documents, DocumentUnavailable, parse_range, read_range
+from .coalescing import coalesced
+from .throttling import throttled_search
+from .exports import FORMATS, stream_export
+from .purge import purge_progress, start_purge
+from .tasks import REGISTRY as TASK_REGISTRY
+from .partitions import year_bounds
+from . import profiling
 
 
 def ping_view(request):
     return JsonResponse({"status": "OK"})
 
 # Public Views
+@throttled_search('search')
+@coalesced
 def home(request):
     """Homepage with latest announcements and events"""
     # Get search query if any
     search_query = request.GET.get('search', '')
     department_filter = request.GET.get('department', '')
-    
-    # Get all departments for filter
-    departments = Department.objects.all()
+    sort = request.GET.get('sort', '')
     
     # Filter announcements
-    announcements = Announcement.objects.filter(is_active=True)
+    announcements = Announcement.objects.filter(is_active=True, department__is_active=True).select_related('department', 'created_by').cached()
     if search_query:
         announcements = announcements.filter(
             Q(title__icontains=search_query) | 
@@ -35,30 +58,42 @@ def home(request):
         announcements = announcements.filter(department_id=department_filter)
     
     # Get upcoming events
-    upcoming_events = Event.objects.filter(
+    upcoming_events = Event.objects.select_related('department').filter(
         is_active=True,
-        start_date__gte=timezone.now()
-    )[:5]
+        department__is_active=True,
+    ).window('upcoming').cached()[:5]
     
-    # Get recent announcements (limit to 10)
-    recent_announcements = announcements[:10]
+    # Get recent (or highest ranked) announcements (limit to 10)
+    if sort == 'priority':
+        recent_announcements = RankedPage(announcements, {}, page_size=10).object_list
+    else:
+        recent_announcements = announcements[:10]
     
     context = {
         'announcements': recent_announcements,
         'upcoming_events': upcoming_events,
-        'departments': departments,
+        'departments': departments.all(),
+        'selected_department': departments.get(department_filter),
         'search_query': search_query,
-        'department_filter': department_filter
+        'department_filter': department_filter,
+        'sort': sort,
+        'sort_choices': SORT_CHOICES,
     }
-    return render(request, 'board/home.html', context)
+    return TemplateResponse(request, 'board/home.html', context)
 
+@throttled_search('search')
+@coalesced
 def announcements_view(request):
     """All announcements page with pagination"""
     search_query = request.GET.get('search', '')
     department_filter = request.GET.get('department', '')
+    sort = request.GET.get('sort', '')
+    years = facet_values('years', department_filter)
+    year = request.GET.get('year', '')
+    if year not in {str(y) for y in years}:
+        year = ''
     
-    departments = Department.objects.all()
-    announcements = Announcement.objects.filter(is_active=True)
+    announcements = Announcement.objects.filter(is_active=True, department__is_active=True).select_related('department', 'created_by').cached()
     
     if search_query:
         announcements = announcements.filter(
@@ -67,26 +102,42 @@ def announcements_view(request):
         )
     if department_filter:
         announcements = announcements.filter(department_id=department_filter)
-    
-    paginator = Paginator(announcements, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if year:
+        # A created_at range, so a partitioned table reads only that year's partition
+        start, end = year_bounds(int(year))
+        announcements = announcements.filter(created_at__gte=start, created_at__lt=end)
+    
+    if sort == 'priority':
+        # Ranked order pages by cursor (?after=/?before=) rather than page number
+        page_obj = RankedPage(announcements, request.GET, keep=('search', 'department', 'sort', 'year'))
+    else:
+        paginator = Paginator(announcements, 10)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
     
     context = {
         'page_obj': page_obj,
-        'departments': departments,
+        'departments': departments.all(),
+        'selected_department': departments.get(department_filter),
         'search_query': search_query,
-        'department_filter': department_filter
+        'department_filter': department_filter,
+        'sort': sort,
+        'sort_choices': SORT_CHOICES,
+        'years': years,
+        'year': year,
     }
-    return render(request, 'board/announcements.html', context)
+    return TemplateResponse(request, 'board/announcements.html', context)
 
+@throttled_search('search')
+@coalesced
 def events_view(request):
     """All events page"""
     search_query = request.GET.get('search', '')
     department_filter = request.GET.get('department', '')
     
-    departments = Department.objects.all()
-    events = Event.objects.filter(is_active=True)
+    window = EventWindow(request.GET)
+    
+    events = Event.objects.filter(is_active=True, department__is_active=True).select_related('department').cached()
     
     if search_query:
         events = events.filter(
@@ -96,21 +147,32 @@ def events_view(request):
     if department_filter:
         events = events.filter(department_id=department_filter)
     
+    # Only the requested window, a keyset page at a time, with status worked out in SQL
+    page_obj = EventPage(
+        window.apply(events), request.GET, window.descending,
+        keep=('window', 'month', 'from', 'to', 'search', 'department'),
+    )
+    
     context = {
-        'events': events,
-        'departments': departments,
+        'events': page_obj.object_list,
+        'page_obj': page_obj,
+        'window': window,
+        'window_choices': WINDOW_CHOICES,
+        'calendar_url': calendar_url('events_ics', department=department_filter),
+        'departments': departments.all(),
+        'selected_department': departments.get(department_filter),
         'search_query': search_query,
         'department_filter': department_filter
     }
-    return render(request, 'board/events.html', context)
+    return TemplateResponse(request, 'board/events.html', context)
 
+@coalesced
 def timetable_view(request):
     """Timetable view"""
     department_filter = request.GET.get('department', '')
     level_filter = request.GET.get('level', '')
     
-    departments = Department.objects.all()
-    timetables = Timetable.objects.filter(is_active=True)
+    timetables = Timetable.objects.filter(is_active=True, department__is_active=True).select_related('department').cached()
     
     if department_filter:
         timetables = timetables.filter(department_id=department_filter)
@@ -123,44 +185,180 @@ def timetable_view(request):
     for day in days:
         timetable_by_day[day] = timetables.filter(day_of_week=day)
     
-    # Get unique levels for filter
-    levels = Timetable.objects.values_list('level', flat=True).distinct()
+    # Levels (with class counts) for the filter, scoped to the selected department
+    levels = facet_counts('levels', department_filter)
     
     context = {
         'timetable_by_day': timetable_by_day,
-        'departments': departments,
+        'calendar_url': calendar_url('timetable_ics', department=department_filter, level=level_filter),
+        'departments': departments.all(),
+        'selected_department': departments.get(department_filter),
         'levels': levels,
         'department_filter': department_filter,
         'level_filter': level_filter
     }
-    return render(request, 'board/timetable.html', context)
+    return TemplateResponse(request, 'board/timetable.html', context)
 
+@coalesced
 def results_view(request):
     """Results view"""
     department_filter = request.GET.get('department', '')
     session_filter = request.GET.get('session', '')
     
-    departments = Department.objects.all()
-    results = Result.objects.filter(is_published=True)
+    results = Result.objects.filter(is_published=True, department__is_active=True).select_related('department').cached()
     
     if department_filter:
         results = results.filter(department_id=department_filter)
     if session_filter:
         results = results.filter(session=session_filter)
     
-    # Get unique sessions for filter
-    sessions = Result.objects.values_list('session', flat=True).distinct()
+    # Sessions (with result counts) for the filter, scoped to the selected department
+    sessions = facet_counts('sessions', department_filter)
     
     context = {
         'results': results,
-        'departments': departments,
+        'departments': departments.all(),
+        'selected_department': departments.get(department_filter),
         'sessions': sessions,
         'department_filter': department_filter,
-        'session_filter': session_filter
+        'session_filter': session_filter,
+        'result_proxy': settings.RESULT_PROXY_ENABLED,
     }
-    return render(request, 'board/results.html', context)
+    return TemplateResponse(request, 'board/results.html', context)
+
+def autocomplete_courses(request):
+    """Typeahead suggestions for course codes, titles and lecturers (?q=, ?department=, ?limit=)"""
+    query = request.GET.get('q', '')[:100]
+    department_filter = request.GET.get('department', '')
+    department = departments.get(department_filter) if department_filter else None
+    if department_filter and department is None:
+        suggestions = []
+    else:
+        try:
+            limit = max(int(request.GET.get('limit', '')), 1)
+        except ValueError:
+            limit = None
+        suggestions = courses.search(query, department and department.pk, limit)
+    response = JsonResponse({'query': query, 'results': suggestions})
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
+
+def result_document(request, pk):
+    """A published result's document, served from the local copy when the proxy is enabled"""
+    result = get_object_or_404(Result, pk=pk, is_published=True, department__is_active=True)
+    if not result.file_url:
+        raise Http404('No document for this result')
+    if not settings.RESULT_PROXY_ENABLED:
+        return redirect(result.file_url)
+
+    try:
+        document = documents.get(result.file_url)
+    except DocumentUnavailable:
+        return HttpResponse('The result document is temporarily unavailable. Please try again shortly.',
+                            status=502, content_type='text/plain')
+
+    etag = f'"{document.sha256}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(document.fetched_at))
+    if response is not None:
+        return response
+
+    byte_range = None
+    if request.headers.get('If-Range', etag) == etag:
+        byte_range = parse_range(request.headers.get('Range', ''), document.size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{document.size}'
+        return response
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(read_range(document.path, start, end),
+                                         status=206, content_type=document.content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{document.size}'
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(open(document.path, 'rb'), content_type=document.content_type,
+                                filename=document.filename)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(document.fetched_at)
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+# Calendar feeds
+def calendar_url(name, **params):
+    params = {k: v for k, v in params.items() if v}
+    return reverse(name) + ('?' + urlencode(params) if params else '')
+
+def calendar_department(request):
+    """Department named by ?department= (id or code), None for all; 404 if unknown"""
+    value = request.GET.get('department', '')
+    if not value:
+        return None
+    department = departments.get(value) or departments.by_code(value)
+    if department is None:
+        raise Http404('Unknown department')
+    return department
+
+def calendar_events(request):
+    department = calendar_department(request)
+    events = event_window(Event.objects.filter(is_active=True, department__is_active=True))
+    if department:
+        events = events.filter(department_id=department.pk)
+    return events, department
+
+def calendar_timetables(request):
+    department = calendar_department(request)
+    level = request.GET.get('level', '')
+    timetables = Timetable.objects.filter(is_active=True, department__is_active=True)
+    if department:
+        timetables = timetables.filter(department_id=department.pk)
+    if level:
+        timetables = timetables.filter(level=level)
+    return timetables, department, level
+
+def calendar_response(name, request, **querysets):
+    response = StreamingHttpResponse(
+        stream_calendar(name, request.get_host(), **querysets),
+        content_type='text/calendar; charset=utf-8',
+    )
+    response['Cache-Control'] = 'public, max-age=900'
+    return response
+
+def events_ics_etag(request):
+    events, department = calendar_events(request)
+    return feed_etag(events, department and department.version)
+
+def timetable_ics_etag(request):
+    timetables, department, level = calendar_timetables(request)
+    return feed_etag(timetables, department and department.version, level)
+
+@condition(etag_func=events_ics_etag)
+def events_ics(request):
+    """iCalendar feed of active events, optionally for one department"""
+    events, department = calendar_events(request)
+    name = f'{department.name} Events' if department else 'Events'
+    return calendar_response(name, request, events=events)
+
+@condition(etag_func=timetable_ics_etag)
+def timetable_ics(request):
+    """iCalendar feed of weekly classes, optionally for one department and level"""
+    timetables, department, level = calendar_timetables(request)
+    name = ' '.join(filter(None, [department and department.code, level, 'Timetable']))
+    return calendar_response(name, request, timetables=timetables)
 
 # Admin Views
+def edit_conflict(request, form_class, model, pk, template, title):
+    """Re-show the editor's input on top of the latest row with a 409 Conflict"""
+    latest = get_object_or_404(model, pk=pk)
+    data = request.POST.copy()
+    data['version'] = latest.version
+    form = form_class(data, instance=latest)
+    messages.error(request, 'Someone else saved this entry while you were editing. '
+                            'Check your changes and save again to overwrite theirs.')
+    response = render(request, template, {'form': form, 'title': title}, status=409)
+    response['ETag'] = version_etag(latest)
+    return response
+
 def admin_login(request):
     """Custom admin login"""
     if request.user.is_authenticated:
@@ -211,15 +409,110 @@ def admin_dashboard(request):
     }
     return render(request, 'board/admin/dashboard.html', context)
 
+# Admin list configuration: sortable columns, search fields and filters
+def department_choices():
+    return [(dept.pk, dept.code) for dept in departments.all()]
+
+ACTIVE_CHOICES = [('true', 'Active'), ('false', 'Inactive')]
+
+announcement_list = AdminList(
+    Announcement,
+    sort_fields={'title': 'title', 'priority': 'priority_weight', 'created': 'created_at'},
+    default_sort='-created',
+    search_fields=['title', 'content'],
+    filters=[
+        ListFilter('department', 'department_id', 'Department', department_choices),
+        ListFilter('priority', 'priority', 'Priority', Announcement.PRIORITY_CHOICES),
+        ListFilter('status', 'is_active', 'Status', ACTIVE_CHOICES),
+    ],
+    select_related=['department'],
+)
+
+event_list = AdminList(
+    Event,
+    sort_fields={'title': 'title', 'start': 'start_date', 'created': 'created_at'},
+    default_sort='-start',
+    search_fields=['title', 'description', 'venue'],
+    filters=[
+        ListFilter('department', 'department_id', 'Department', department_choices),
+        ListFilter('type', 'event_type', 'Type', Event.EVENT_TYPE_CHOICES),
+        ListFilter('status', 'is_active', 'Status', ACTIVE_CHOICES),
+    ],
+    select_related=['department'],
+)
+
+timetable_list = AdminList(
+    Timetable,
+    sort_fields={'course': 'course_code', 'level': 'level', 'created': 'created_at'},
+    default_sort='-created',
+    search_fields=['course_code', 'course_title', 'lecturer', 'venue'],
+    filters=[
+        ListFilter('department', 'department_id', 'Department', department_choices),
+        ListFilter('day', 'day_of_week', 'Day', Timetable.DAY_CHOICES),
+        ListFilter('level', 'level', 'Level', lambda: [(v, v) for v in facet_values('levels')]),
+        ListFilter('status', 'is_active', 'Status', ACTIVE_CHOICES),
+    ],
+    select_related=['department'],
+)
+
+result_list = AdminList(
+    Result,
+    sort_fields={'course': 'course_code', 'session': 'session', 'created': 'created_at'},
+    default_sort='-created',
+    search_fields=['course_code', 'course_title'],
+    filters=[
+        ListFilter('department', 'department_id', 'Department', department_choices),
+        ListFilter('session', 'session', 'Session', lambda: [(v, v) for v in facet_values('sessions')]),
+        ListFilter('semester', 'semester', 'Semester', Result.SEMESTER_CHOICES),
+        ListFilter('status', 'is_published', 'Status', [('true', 'Published'), ('false', 'Draft')]),
+    ],
+    select_related=['department'],
+)
+
+department_list = AdminList(
+    Department,
+    sort_fields={'name': 'name', 'code': 'code', 'created': 'created_at'},
+    default_sort='name',
+    search_fields=['name', 'code'],
+    filters=[
+        ListFilter('status', 'is_active', 'Status', [('true', 'Active'), ('false', 'Deleted')]),
+    ],
+)
+
+ADMIN_LISTS = {
+    'announcements': announcement_list,
+    'events': event_list,
+    'timetables': timetable_list,
+    'results': result_list,
+    'departments': department_list,
+}
+
+@login_required
+def admin_export(request, name, fmt):
+    """Stream every row of a list (with its search and filters applied) as CSV or JSON"""
+    if not request.user.is_staff:
+        return redirect('home')
+    if name not in ADMIN_LISTS or fmt not in FORMATS:
+        raise Http404('Unknown export')
+    
+    queryset = ADMIN_LISTS[name].queryset(request.GET)
+    response = StreamingHttpResponse(stream_export(name, queryset, fmt), content_type=FORMATS[fmt][0])
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M')
+    response['Content-Disposition'] = f'attachment; filename="{name}-{stamp}.{fmt}"'
+    return response
+
 # Announcement CRUD
 @login_required
 def admin_announcements(request):
-    """List all announcements in admin"""
+    """List announcements in admin (searchable, filterable, keyset-paginated)"""
     if not request.user.is_staff:
         return redirect('home')
     
-    announcements = Announcement.objects.all()
-    return render(request, 'board/admin/announcements/list.html', {'announcements': announcements})
+    listing = announcement_list.page(request)
+    return render(request, 'board/admin/announcements/list.html', {
+        'announcements': listing.object_list,
+        'listing': listing,
+    })
 
 @login_required
 def admin_add_announcement(request):
@@ -251,13 +544,19 @@ def admin_edit_announcement(request, pk):
     if request.method == 'POST':
         form = AnnouncementForm(request.POST, instance=announcement)
         if form.is_valid():
-            form.save()
+            try:
+                save_changed_fields(form, submitted_version(request, form))
+            except VersionConflict:
+                return edit_conflict(request, AnnouncementForm, Announcement, pk,
+                                     'board/admin/announcements/form.html', 'Edit Announcement')
             messages.success(request, 'Announcement updated successfully!')
             return redirect('admin_announcements')
     else:
         form = AnnouncementForm(instance=announcement)
     
-    return render(request, 'board/admin/announcements/form.html', {'form': form, 'title': 'Edit Announcement'})
+    response = render(request, 'board/admin/announcements/form.html', {'form': form, 'title': 'Edit Announcement'})
+    response['ETag'] = version_etag(announcement)
+    return response
 
 @login_required
 def admin_delete_announcement(request, pk):
@@ -278,8 +577,8 @@ def admin_delete_announcement(request, pk):
 def admin_events(request):
     if not request.user.is_staff:
         return redirect('home')
-    events = Event.objects.all()
-    return render(request, 'board/admin/events/list.html', {'events': events})
+    listing = event_list.page(request)
+    return render(request, 'board/admin/events/list.html', {'events': listing.object_list, 'listing': listing})
 
 @login_required
 def admin_add_event(request):
@@ -309,13 +608,19 @@ def admin_edit_event(request, pk):
     if request.method == 'POST':
         form = EventForm(request.POST, instance=event)
         if form.is_valid():
-            form.save()
+            try:
+                save_changed_fields(form, submitted_version(request, form))
+            except VersionConflict:
+                return edit_conflict(request, EventForm, Event, pk,
+                                     'board/admin/events/form.html', 'Edit Event')
             messages.success(request, 'Event updated successfully!')
             return redirect('admin_events')
     else:
         form = EventForm(instance=event)
     
-    return render(request, 'board/admin/events/form.html', {'form': form, 'title': 'Edit Event'})
+    response = render(request, 'board/admin/events/form.html', {'form': form, 'title': 'Edit Event'})
+    response['ETag'] = version_etag(event)
+    return response
 
 @login_required
 def admin_delete_event(request, pk):
@@ -335,8 +640,8 @@ def admin_delete_event(request, pk):
 def admin_timetables(request):
     if not request.user.is_staff:
         return redirect('home')
-    timetables = Timetable.objects.all()
-    return render(request, 'board/admin/timetables/list.html', {'timetables': timetables})
+    listing = timetable_list.page(request)
+    return render(request, 'board/admin/timetables/list.html', {'timetables': listing.object_list, 'listing': listing})
 
 @login_required
 def admin_add_timetable(request):
@@ -366,13 +671,19 @@ def admin_edit_timetable(request, pk):
     if request.method == 'POST':
         form = TimetableForm(request.POST, instance=timetable)
         if form.is_valid():
-            form.save()
+            try:
+                save_changed_fields(form, submitted_version(request, form))
+            except VersionConflict:
+                return edit_conflict(request, TimetableForm, Timetable, pk,
+                                     'board/admin/timetables/form.html', 'Edit Timetable Entry')
             messages.success(request, 'Timetable entry updated successfully!')
             return redirect('admin_timetables')
     else:
         form = TimetableForm(instance=timetable)
     
-    return render(request, 'board/admin/timetables/form.html', {'form': form, 'title': 'Edit Timetable Entry'})
+    response = render(request, 'board/admin/timetables/form.html', {'form': form, 'title': 'Edit Timetable Entry'})
+    response['ETag'] = version_etag(timetable)
+    return response
 
 @login_required
 def admin_delete_timetable(request, pk):
@@ -392,8 +703,8 @@ def admin_delete_timetable(request, pk):
 def admin_results(request):
     if not request.user.is_staff:
         return redirect('home')
-    results = Result.objects.all()
-    return render(request, 'board/admin/results/list.html', {'results': results})
+    listing = result_list.page(request)
+    return render(request, 'board/admin/results/list.html', {'results': listing.object_list, 'listing': listing})
 
 @login_required
 def admin_add_result(request):
@@ -423,13 +734,19 @@ def admin_edit_result(request, pk):
     if request.method == 'POST':
         form = ResultForm(request.POST, instance=result)
         if form.is_valid():
-            form.save()
+            try:
+                save_changed_fields(form, submitted_version(request, form))
+            except VersionConflict:
+                return edit_conflict(request, ResultForm, Result, pk,
+                                     'board/admin/results/form.html', 'Edit Result')
             messages.success(request, 'Result updated successfully!')
             return redirect('admin_results')
     else:
         form = ResultForm(instance=result)
     
-    return render(request, 'board/admin/results/form.html', {'form': form, 'title': 'Edit Result'})
+    response = render(request, 'board/admin/results/form.html', {'form': form, 'title': 'Edit Result'})
+    response['ETag'] = version_etag(result)
+    return response
 
 @login_required
 def admin_delete_result(request, pk):
@@ -449,8 +766,11 @@ def admin_delete_result(request, pk):
 def admin_departments(request):
     if not request.user.is_staff:
         return redirect('home')
-    departments = Department.objects.all()
-    return render(request, 'board/admin/departments/list.html', {'departments': departments})
+    listing = department_list.page(request)
+    for department in listing.object_list:
+        if not department.is_active:
+            department.purge = purge_progress(department.pk)
+    return render(request, 'board/admin/departments/list.html', {'departments': listing.object_list, 'listing': listing})
 
 @login_required
 def admin_add_department(request):
@@ -473,28 +793,99 @@ def admin_edit_department(request, pk):
     if not request.user.is_staff:
         return redirect('home')
     
-    department = get_object_or_404(Department, pk=pk)
+    department = get_object_or_404(Department, pk=pk, is_active=True)
     
     if request.method == 'POST':
         form = DepartmentForm(request.POST, instance=department)
         if form.is_valid():
-            form.save()
+            try:
+                save_changed_fields(form, submitted_version(request, form))
+            except VersionConflict:
+                return edit_conflict(request, DepartmentForm, Department, pk,
+                                     'board/admin/departments/form.html', 'Edit Department')
             messages.success(request, 'Department updated successfully!')
             return redirect('admin_departments')
     else:
         form = DepartmentForm(instance=department)
     
-    return render(request, 'board/admin/departments/form.html', {'form': form, 'title': 'Edit Department'})
+    response = render(request, 'board/admin/departments/form.html', {'form': form, 'title': 'Edit Department'})
+    response['ETag'] = version_etag(department)
+    return response
 
 @login_required
 def admin_delete_department(request, pk):
     if not request.user.is_staff:
         return redirect('home')
     
-    department = get_object_or_404(Department, pk=pk)
+    department = get_object_or_404(Department, pk=pk, is_active=True)
     if request.method == 'POST':
-        department.delete()
-        messages.success(request, 'Department deleted successfully!')
+        # Hide it everywhere now; its rows are deleted in batches in the background
+        department.soft_delete()
+        start_purge(department.pk, user=request.user)
+        messages.success(request, 'Department deleted. Its announcements, events, timetables '
+                                  'and results are being removed in the background.')
         return redirect('admin_departments')
     
-    return render(request, 'board/admin/departments/delete.html', {'department': department})
\ No newline at end of file
+    return render(request, 'board/admin/departments/delete.html', {'department': department})
+
+# Background tasks
+task_list = AdminList(
+    Task,
+    sort_fields={'created': 'created_at'},
+    default_sort='-created',
+    search_fields=['name', 'message'],
+    filters=[
+        ListFilter('status', 'status', 'Status', Task.STATUS_CHOICES),
+        ListFilter('name', 'name', 'Task', lambda: [(name, name) for name in sorted(TASK_REGISTRY)]),
+    ],
+    select_related=['created_by'],
+)
+
+@login_required
+def admin_tasks(request):
+    """Queued, running and finished background tasks with their progress"""
+    if not request.user.is_staff:
+        return redirect('home')
+    listing = task_list.page(request)
+    return render(request, 'board/admin/tasks/list.html', {'tasks': listing.object_list, 'listing': listing})
+
+@login_required
+def admin_retry_task(request, pk):
+    if not request.user.is_staff:
+        return redirect('home')
+    if request.method == 'POST':
+        updated = Task.objects.filter(pk=pk, status='failed').update(
+            status='queued', run_after=timezone.now(), attempts=0, error='', finished_at=None,
+        )
+        if updated:
+            messages.success(request, 'Task queued again.')
+        else:
+            messages.error(request, 'Only failed tasks can be retried.')
+    return redirect('admin_tasks')
+
+# Request profiling
+@login_required
+def admin_profiles(request):
+    """Recent profiled requests (add ?_profile=1 or an X-Profile header to any page while signed in)"""
+    if not request.user.is_staff:
+        return redirect('home')
+    return render(request, 'board/admin/profiles/list.html', {
+        'captures': profiling.recent(),
+        'profile_param': settings.PROFILE_PARAM,
+        'buffer_size': settings.PROFILE_BUFFER_SIZE,
+    })
+
+@login_required
+def admin_profile_download(request, pk, fmt):
+    """One capture as a text report (profile and SQL trace) or a .prof file for pstats/snakeviz"""
+    if not request.user.is_staff:
+        return redirect('home')
+    capture = profiling.get(pk)
+    if capture is None or fmt not in ('txt', 'prof'):
+        raise Http404('Capture no longer in the buffer')
+    if fmt == 'txt':
+        response = HttpResponse(profiling.report(capture), content_type='text/plain; charset=utf-8')
+    else:
+        response = HttpResponse(capture['stats'], content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="profile-{pk}.prof"'
+    return response
@@ -28,6 +28,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'board.middleware.ProfilingMiddleware',
+    'board.middleware.PublicPageMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -59,6 +61,8 @@ import dj_database_url
 DATABASES = {
     'default': dj_database_url.parse(config('DATABASE_URL'))
 }
+# Set when connecting through a transaction-pooling PgBouncer (e.g. Supabase's pooler)
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = config('DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool)
 
 
 # DATABASES = {
@@ -70,6 +74,14 @@ DATABASES = {
 
 # DATABASES['default'] = dj_database_url.parse(os.environ['DATABASE_URL'])
 
+# Cache shared by all workers (point CACHE_BACKEND at Redis/Memcached in production)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='student-info-board'),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -99,4 +111,95 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = 'admin_login'
 LOGIN_REDIRECT_URL = 'admin_dashboard'
-LOGOUT_REDIRECT_URL = 'home'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'home'
+
+# Seconds a worker trusts its in-process department list before re-checking the shared cache
+DEPARTMENT_REGISTRY_LOCAL_TTL = config('DEPARTMENT_REGISTRY_LOCAL_TTL', default=30, cast=int)
+# Lifetime of the registry's generation and data keys. Bumps only reach workers
+# sharing the cache, so with a per-process cache (LocMem) this bounds how long
+# another worker can go on without a newly added department.
+DEPARTMENT_REGISTRY_TIMEOUT = config('DEPARTMENT_REGISTRY_TIMEOUT', default=300, cast=int)
+
+# Upper bound on how long level/session filter counts are cached (writes also invalidate them)
+FACET_CACHE_TIMEOUT = config('FACET_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Upper bound on how long rendered RSS/Atom bodies are cached (announcement saves also invalidate them)
+FEED_CACHE_TIMEOUT = config('FEED_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Static snapshots of the public pages (manage.py export_static)
+STATIC_EXPORT_ROOT = config('STATIC_EXPORT_ROOT', default=str(BASE_DIR / 'static_export'))
+STATIC_EXPORT_ON_CHANGE = config('STATIC_EXPORT_ON_CHANGE', default=False, cast=bool)
+
+# Sessions are only needed by the admin: keep them in the cache (backed by the
+# database), flash messages in a cookie, and serve every other path anonymously
+# so public pages never read the session store (manage.py benchmark_requests)
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.cached_db')
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+SESSION_PATH_PREFIXES = ['/admin/', '/django-admin/']
+
+# Local proxy and disk cache for Result.file_url documents (board/documents.py)
+RESULT_PROXY_ENABLED = config('RESULT_PROXY_ENABLED', default=False, cast=bool)
+RESULT_DOCUMENT_ROOT = config('RESULT_DOCUMENT_ROOT', default=str(BASE_DIR / 'result_documents'))
+RESULT_PROXY_MAX_AGE = config('RESULT_PROXY_MAX_AGE', default=3600, cast=int)
+RESULT_PROXY_TIMEOUT = config('RESULT_PROXY_TIMEOUT', default=20, cast=int)
+RESULT_PROXY_MAX_BYTES = config('RESULT_PROXY_MAX_BYTES', default=50 * 1024 * 1024, cast=int)
+
+# Results-day traffic mode: concurrent anonymous requests for the same public
+# page share one render, fresh for PAGE_CACHE_TTL seconds and then served stale
+# for up to PAGE_CACHE_STALE more while one request refreshes it
+PAGE_COALESCING = config('PAGE_COALESCING', default=False, cast=bool)
+PAGE_CACHE_TTL = config('PAGE_CACHE_TTL', default=5, cast=int)
+PAGE_CACHE_STALE = config('PAGE_CACHE_STALE', default=60, cast=int)
+# How long a request waits for another's render before rendering itself
+PAGE_CACHE_WAIT = config('PAGE_CACHE_WAIT', default=10, cast=int)
+
+# Rows removed per DELETE statement when purging a deleted department
+DEPARTMENT_PURGE_BATCH_SIZE = config('DEPARTMENT_PURGE_BATCH_SIZE', default=1000, cast=int)
+
+# Background tasks (board/tasks.py), run by `manage.py run_tasks`
+TASK_MAX_ATTEMPTS = config('TASK_MAX_ATTEMPTS', default=3, cast=int)
+# Seconds before the first retry; doubles on each further attempt
+TASK_RETRY_DELAY = config('TASK_RETRY_DELAY', default=30, cast=int)
+# A task running longer than this is assumed to have lost its worker and is requeued
+TASK_TIMEOUT = config('TASK_TIMEOUT', default=3600, cast=int)
+# Run tasks in-process right after the request commits (development without a worker)
+TASKS_EAGER = config('TASKS_EAGER', default=False, cast=bool)
+
+# Opt-in ORM read cache for querysets marked .cached() (board/querycache.py).
+# Every process that writes to the database must run with the same value, since
+# writes are only seen (and cached reads invalidated) where it is enabled.
+QUERY_CACHE_ENABLED = config('QUERY_CACHE_ENABLED', default=False, cast=bool)
+QUERY_CACHE_TIMEOUT = config('QUERY_CACHE_TIMEOUT', default=300, cast=int)
+
+# Course/lecturer typeahead (board/autocomplete.py): seconds a worker trusts its
+# in-process index before re-checking the shared generation, and result limits
+AUTOCOMPLETE_LOCAL_TTL = config('AUTOCOMPLETE_LOCAL_TTL', default=30, cast=int)
+# Lifetime of the shared generation and rows (see DEPARTMENT_REGISTRY_TIMEOUT)
+AUTOCOMPLETE_TIMEOUT = config('AUTOCOMPLETE_TIMEOUT', default=300, cast=int)
+AUTOCOMPLETE_DEFAULT_LIMIT = config('AUTOCOMPLETE_DEFAULT_LIMIT', default=10, cast=int)
+AUTOCOMPLETE_MAX_LIMIT = config('AUTOCOMPLETE_MAX_LIMIT', default=25, cast=int)
+
+# Free-text search throttling (board/throttling.py): each client IP may run
+# SEARCH_RATE searches per second per page, in bursts of up to SEARCH_BURST,
+# and each worker runs at most SEARCH_MAX_CONCURRENT searches at once (waiting
+# up to SEARCH_QUEUE_WAIT seconds for a slot). Over either limit the page is
+# served unfiltered with a 429/503 and Retry-After. SEARCH_RATE=0 turns the
+# per-client limit off.
+SEARCH_THROTTLE_ENABLED = config('SEARCH_THROTTLE_ENABLED', default=True, cast=bool)
+SEARCH_RATE = config('SEARCH_RATE', default=1.0, cast=float)
+SEARCH_BURST = config('SEARCH_BURST', default=30, cast=int)
+# The per-worker slot limit only matters for workers that serve several requests
+# at once (gunicorn gthread/gevent, ASGI). A sync worker or a serverless
+# function handles one request at a time, so there only the rate limit applies.
+SEARCH_MAX_CONCURRENT = config('SEARCH_MAX_CONCURRENT', default=4, cast=int)
+SEARCH_QUEUE_WAIT = config('SEARCH_QUEUE_WAIT', default=1.0, cast=float)
+# Only behind a reverse proxy that sets X-Forwarded-For; otherwise clients could pick their own address
+THROTTLE_TRUST_X_FORWARDED_FOR = config('THROTTLE_TRUST_X_FORWARDED_FOR', default=False, cast=bool)
+
+# Staff-only request profiling (board/profiling.py): add ?_profile=1 or an
+# X-Profile header to a request; the last PROFILE_BUFFER_SIZE captures are kept
+# for PROFILE_TTL seconds and listed at /admin/profiles/
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_BUFFER_SIZE = config('PROFILE_BUFFER_SIZE', default=20, cast=int)
+PROFILE_TTL = config('PROFILE_TTL', default=7 * 24 * 60 * 60, cast=int)